@@ -1,23 +1,35 @@
-from copy import copy, deepcopy
+from array import array
 from datetime import datetime
-from gzip import GzipFile
-from hashlib import sha256
-from io import BytesIO
-from multiprocessing import Pool, cpu_count
-from os import SEEK_END
-from tarfile import TarFile
-from time import sleep
-from typing import List, Union
-from zipfile import ZipFile, BadZipFile
-from zlib import error as zlib_error
-
-from langdetect import detect_langs
+from multiprocessing import cpu_count
+from pathlib import Path
+from time import monotonic
+from typing import BinaryIO, Callable, Dict, Iterator, List, Tuple, Union
+
+from langdetect import DetectorFactory, detect_langs
+from langdetect.detector_factory import init_factory
+from langdetect.lang_detect_exception import LangDetectException
 
 from Interfaces.ModuleInterface import ModuleInterface
-from Utils.ImageHandler import ImageHandler
+from Utils.ArchiveExpander import ArchiveExpander
+from Utils.Entropy import Entropy
+from Utils.HashCache import HashCache, Key
+from Utils.HashEngine import HashEngine
+from Utils.HashSet import HashSets
+from Utils.ImageHandler import HandlePool
+from Utils.IoScheduler import IoScheduler
+from Utils.Journal import Journal
 from Utils.Logging.Logging import Logging
+from Utils.Pipeline import Pipeline, Result
+from Utils.RecordStore import RecordStore
+from Utils.Sniffer import HeadSniffer, Sniffer
+from Utils.TextSampler import TextSample, TextSampler
+from Utils.Timeline import Timeline, Times
 from Utils.XlsxWriter import XlsxWriter
 
+# Partition, name, extension, type, create, modify and change date, size,
+# path and meta address of a file
+Row = Tuple[Union[str, int, datetime], ...]
+
 lang_dict = {
     'af': 'Afrikaans',
     'ar': 'Arabic',
@@ -78,16 +90,50 @@ lang_dict = {
 
 
 class Files(ModuleInterface):
+    # 'prefix' reads the first LANGUAGE_READ_SIZE bytes of a text file,
+    # 'windows' reads up to LANGUAGE_WINDOWS windows spread over the file
+    LANGUAGE_SAMPLING = 'windows'
+    LANGUAGE_READ_SIZE = 1024 * 1024
+    LANGUAGE_WINDOW_SIZE = 64 * 1024
+    LANGUAGE_WINDOWS = 8
+    LANGUAGE_TOLERANCE = 0.05
+    HASH_BATCH_BYTES = 64 * 1024 * 1024
+    HASH_BATCH_FILES = 256
+    ARCHIVE_DEPTH = 5
+    ARCHIVE_BYTES = 4 * 1024 * 1024 * 1024
+    CHECKPOINT_INTERVAL = 30
+    PROCESSES = cpu_count()
+
     def __init__(self):
         self.logger = Logging(self.__class__.__name__).logger
 
         self.options = {}
-
+        self.identity = None
+        self.journal = None
+        # File id -> 'bad' for files in a known-bad hash set, None when no
+        # hash sets are configured
+        self.known = None
+        # Ids of the files in a known-good hash set, they keep their hash but
+        # aren't listed in the hashes sheet
+        self.known_good = set()
+        # Files of the image, the columns stay in the store
+        self.store = RecordStore()
+        # Detected type and row of the files that were found inside an
+        # archive
+        self.archive_members = []
+        # File ids in the order they are listed in
+        self.order = array('q')
+
+        # The files are the rows, their id is their index. A file id points
+        # to a record in the store, or to -1 - its position in the archive
+        # members. The results of the functions are columns by file id on
+        # top of the rows, rows are only built to write them
         self.data = {
-            'files': [],
-            'hashing': [],
-            'timeline': [],
-            'language': [],
+            'files': array('q'),
+            'hashing': {},
+            'entropy': {},
+            'timeline': None,
+            'language': {},
             'merged': []
         }
 
@@ -117,11 +163,23 @@ class Files(ModuleInterface):
             'language': args[2]
         }
 
+        # Results of an interrupted run on the same image are picked up from
+        # the journal
+        self.identity = HandlePool.get().image_identity()
+        self.journal = Journal(self.identity, 'files')
+
         self.get_files()
 
+        # The hash pass detects the types of the files it reads, so the
+        # archives are expanded after it
         if self.options['hashing']:
             self.hashes()
 
+        self.expand_archives()
+
+        if self.options['hashing']:
+            self.filter_known(self.data['hashing'])
+
         if self.options['timeline']:
             self.timeline()
 
@@ -160,505 +218,776 @@ class Files(ModuleInterface):
         if count > 0:
             xlsx_writer.close()
 
+        if self.data['timeline'] is not None:
+            self.data['timeline'].close()
+
+        # The run is saved, a next run has to start over
+        if self.journal is not None:
+            self.journal.clear()
+            self.journal.close()
+            self.journal = None
+
     @staticmethod
-    def zipped_sha_hash(file):
+    def member_engine(ext: str, kind: str, hashing: bool,
+                      language: bool) -> HashEngine:
         """
-        Get the sha 256 hash of a file inside a compressed file
+        Get the engine for a file inside a compressed file, the entropy is
+        counted and a text file is sampled for its language in the same pass
+        as the hash. Only the functions the user selected are run
 
-        :param file: File like object
+        :param ext: Extension of the file
+        :param kind: Type of the file that was detected from its content
+        :param hashing: Whether to hash the file and count its entropy
+        :param language: Whether to sample a text file for its language
 
-        :return: Sha256 hash
+        :return: Engine with the selected digest and consumers
         """
-        sha256_sum = sha256()
+        consumers = {}
+
+        if hashing:
+            consumers['entropy'] = Entropy
 
-        buf = file.read()
-        sha256_sum.update(buf)
+        if language and Files.is_text(ext, kind):
+            consumers['language'] = lambda: TextSample(Files.sampler(),
+                                                       Files.detect_languages)
 
-        return sha256_sum.hexdigest()
+        return HashEngine(['sha256'] if hashing else [], consumers)
 
     @staticmethod
-    def zipped_language(file: any, raw: bool=False) -> str:
+    def is_text(ext: str, kind: str) -> bool:
         """
-        Get the language of a text file inside a compressed file
+        Check if the language of a file should be detected
 
-        :param file:
-        :param raw: Pure text or encoded text
+        :param ext: Extension of the file
+        :param kind: Type of the file that was detected from its content
 
-        :return: Language of the file
+        :return: Whether the file is a text file or not
         """
-        languages_string = ''
-        text = file.readlines()
-        decoded = ''
-        if raw:
-            decoded = file
-        else:
-            for i in text:
-                try:
-                    decoded += i.decode('utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        decoded += i.decode('utf-8')
-                    except UnicodeDecodeError:
-                        pass
-
-        languages = detect_langs(decoded)
+        return ext == 'txt' or kind == Sniffer.TEXT
 
-        if languages is not None:
-            languages_string = ', '.join(
-                ['{:.2f}% {}'.format(
-                    float(str(lang)[3:]) * 100,
-                    lang_dict[str(lang)[:2]]
-                ) for lang in languages])
+    @staticmethod
+    def expand_archive(task: Tuple[int, int, str, str, str, bool, bool]) \
+            -> List[Tuple[str, Row, Dict[str, str]]]:
+        """
+        List all files in an archive and the archives inside it, the files
+        are hashed and text files are sampled for their language while they
+        are extracted when those functions are selected
 
-        return languages_string
+        :param task: Partition address, meta address, name, path and format
+                     of the archive, and whether hashing and language are
+                     selected
 
-    def zip_file(self, file: object, partition: str, _: any, path: str) -> \
-            List[Union[str, datetime]]:
+        :return: Detected type, file information and the results by function
+                 of every file in the archive
         """
-        Extract all files in a zip file
+        partition, inode, name, path, archive_format, hashing, language = \
+            task
 
-        :param file: File like object
-        :param partition: Partition number
-        :param _: Unused
-        :param path: Path to the file
+        stream = HandlePool.get().open_stream(partition, inode=inode)
+        if stream is None:
+            return []
 
-        :return: File information
-        """
+        expander = ArchiveExpander(
+            lambda ext, kind: Files.member_engine(ext, kind, hashing,
+                                                  language),
+            Files.ARCHIVE_DEPTH, Files.ARCHIVE_BYTES)
+
+        with stream:
+            members = expander.expand(stream, name, path, archive_format)
+
+        part = 'PARTITION {}'.format(partition)
         lst = []
 
-        try:
-            with ZipFile(file) as zf:
-                for file_info in zf.infolist():
-                    try:
-                        filename = file_info.filename.split('/')[-1] \
-                            if '.' in file_info.filename else \
-                            file_info.filename.replace('/', '')
-
-                        extension = file_info.filename.split('.')[-1].lower() \
-                            if '.' in file_info.filename else ''
-
-                        fd = 'FILE' \
-                            if file_info.compress_size != 0 \
-                            and file_info.file_size != 0 \
-                            else 'DIR'
-
-                        size = '{} / {}'.format(file_info.compress_size,
-                                                file_info.file_size) \
-                            if file_info.compress_size != 0 \
-                               and file_info.file_size != 0 \
-                            else ''
-
-                        file_path = '{}/{}'.format(path, file_info.filename)
-
-                        item = [
-                            partition,
-                            filename,
-                            extension,
-                            fd,
-                            '',
-                            datetime(*file_info.date_time),
-                            '',
-                            size,
-                            file_path
-                        ]
-
-                        if fd == 'FILE':
-                            file = BytesIO(zf.read(file_info))
-                            item.append(self.zipped_sha_hash(file))
-                        else:
-                            item.append('')
-
-                        if extension == 'txt':
-                            item.append(
-                                self.zipped_language(
-                                    BytesIO(zf.read(file_info.filename))))
-                        else:
-                            item.append('')
-
-                        lst.append(item)
-                    except zlib_error:
-                        continue
-                    except BadZipFile:
-                        continue
-        except BadZipFile:
-            pass
+        for filename, ext, f_type, modify, size, file_path, kind, results \
+                in members:
+            values = {}
+
+            if 'sha256' in results:
+                values['hashing'] = results['sha256']
+
+            if 'entropy' in results:
+                values['entropy'] = Files.format_entropy(results['entropy'])
+
+            if 'language' in results:
+                values['language'] = Files.format_languages(
+                    results['language'])
+
+            lst.append((kind, (part, filename, ext, f_type, '', modify, '',
+                               size, file_path, ''), values))
 
         return lst
 
-    def tar_file(self, file: object, partition: str, _: any, path: str) -> \
-            List[Union[str, datetime]]:
+    def get_files(self) -> None:
         """
-        Extract all files in a tarball
+        Create a list of all files of the image, the files stay in the record
+        store and only their indexes are listed. The id of a file of the
+        image is its position in the first partition
 
-        :param file: file like object
-        :param partition: Partition number
-        :param _: Unused
-        :param path: Path to the file
+        :return: None
+        """
+        store = HandlePool.get().records()
+        partitions = store.partitions()
+
+        self.store = store
+        self.archive_members = []
+        self.data['files'] = array('q', store.select(
+            partition=partitions[0]) if len(partitions) > 0 else [])
+        self.order = array('q', range(len(self.data['files'])))
+        self.data['hashing'] = {}
+        self.data['entropy'] = {}
+        self.data['language'] = {}
+
+    def expand_archives(self) -> None:
+        """
+        Add the files inside the archives of the image to the list, the
+        members get the ids after the files of the image and are listed
+        after their archive. Only files whose type isn't known yet from the
+        catalog or the hash pass are sniffed
 
-        :return: File information
+        :return: None
         """
-        lst = []
+        handler = HandlePool.get()
+        store = self.store
+        indexes = [index for index in self.data['files'] if index >= 0]
+        handler.detect_types(store, indexes, self.PROCESSES)
+
+        # Archives are independent of each other so they are expanded on
+        # multiple processes
+        archives = [(file_id, ArchiveExpander.archive_format(
+                        store.ext_table[store.ext[index]],
+                        store.get_kind(index)))
+                    for file_id, index in enumerate(indexes)
+                    if not store.name[index].startswith('._')]
+        archives = [(file_id, archive_format)
+                    for file_id, archive_format in archives
+                    if archive_format is not None]
+        members = {}
+
+        if len(archives) > 0:
+            # The langdetect profiles are only loaded for the language
+            with Pipeline(self.PROCESSES,
+                          self.init_language_worker
+                          if self.options['language'] else
+                          HandlePool.init_worker,
+                          self.progress('archives')) as pipeline:
+                for position, result, error in pipeline.map(
+                        self.expand_archive,
+                        [(*self.key(file_id), store.name[indexes[file_id]],
+                          self.path(file_id), archive_format,
+                          self.options['hashing'], self.options['language'])
+                         for file_id, archive_format in archives],
+                        ordered=True):
+                    if error is None:
+                        members[archives[position][0]] = result
+
+        order = array('q')
+
+        for file_id in range(len(indexes)):
+            order.append(file_id)
+            for kind, member, values in members.get(file_id, []):
+                for part, value in values.items():
+                    self.data[part][len(self.data['files'])] = value
+                order.append(len(self.data['files']))
+                self.data['files'].append(-1 - len(self.archive_members))
+                self.archive_members.append((kind, member))
+
+        self.order = order
+
+    def row(self, file_id: int) -> Row:
+        """
+        Get the information of a file, the row of a file of the image is
+        built from the columns of the store
 
-        with TarFile(fileobj=file) as zf:
-            for member in zf.getnames():
-                if '._' not in member:
-                    f = zf.extractfile(member)
+        :param file_id: Id of the file
 
-                    filename = member.split('/')[-1] if '.' in member else \
-                        member.replace('/', '')
+        :return: File information
+        """
+        index = self.data['files'][file_id]
 
-                    extension = member.split('.')[-1].lower() \
-                        if '.' in member else ''
+        if index < 0:
+            return self.archive_members[-1 - index][1]
 
-                    f.seek(0, SEEK_END)
+        return tuple(self.store.row(index))
+
+    def kind(self, file_id: int) -> str:
+        """
+        Get the type of a file that was detected from its content
 
-                    item = [
-                        partition,
-                        filename,
-                        extension,
-                        'FILE',
-                        '',
-                        '',
-                        '',
-                        f.tell(),
-                        '{}/{}'.format(path, member),
-                        self.zipped_sha_hash(f)
-                    ]
+        :param file_id: Id of the file
 
-                    if extension == 'txt':
-                        item.append(self.zipped_language(f.read()))
-                    else:
-                        item.append('')
+        :return: Detected type, an empty string when it isn't known
+        """
+        index = self.data['files'][file_id]
 
-                    lst.append(item)
+        if index < 0:
+            return self.archive_members[-1 - index][0]
 
-        return lst
+        return self.store.get_kind(index)
 
-    def gzip_file(self, file: object, partition: str,
-                  filename: str, path: str) -> List[str]:
+    def path(self, file_id: int) -> str:
         """
-        Extract a gzipped file
+        Get the full path of a file
 
-        :param file: File like object
-        :param partition: Partition number
-        :param filename: Name of the file
-        :param path: Path to the file
+        :param file_id: Id of the file
 
-        :return: File information
+        :return: Path of the file
         """
-        lst = []
-        with GzipFile(fileobj=file) as zf:
-            file_content = BytesIO(zf.read())
-
-            name = ImageHandler().rreplace(filename, '.gz', '')
-
-            extension = name.split('.')[-1].lower() \
-                if '.' in name else ''
-
-            item = [
-                partition,
-                name,
-                extension,
-                'FILE',
-                '',
-                '',
-                '',
-                len(file_content.getbuffer()),
-                '{}/{}'.format(path, name),
-                self.zipped_sha_hash(file_content)
-            ]
-
-            if extension == 'txt':
-                item.append(self.zipped_language(file_content))
-            else:
-                item.append('')
+        index = self.data['files'][file_id]
 
-            lst.append(item)
+        if index < 0:
+            return self.archive_members[-1 - index][1][8]
 
-            if extension == 'tar':
-                tar = self.tar_file(file_content, partition, filename, path)
+        return self.store.directory_table[self.store.directory[index]] + \
+            self.store.name[index]
 
-                for item in tar:
-                    lst.append(item)
+    def timeline(self) -> None:
+        """
+        Generate a timeline of the create, change and modify dates of all
+        files, the events are sorted on disk so the timeline of millions of
+        files is built in bounded memory
 
-        return lst
+        :return: None
+        """
+        path = Timeline.get_timeline_path(self.identity)
+
+        count = Timeline.build(((file_id, self.times(file_id))
+                                for file_id in range(len(self.data['files']))),
+                               path)
+        self.logger.info('Timeline: {} events for {} files'.format(
+            count, len(self.data['files'])))
+
+        self.data['timeline'] = Timeline(path)
 
-    def compressed_files(self, file: List[Union[str, datetime]]):
+    def times(self, file_id: int) -> Times:
         """
-        Wrapper to extract data from compressed files
+        Get the timestamps of a file by timestamp type
 
-        :param file: File information
+        :param file_id: Id of the file
 
-        :return: File like object and flie information
+        :return: Date time by timestamp type
         """
-        stream = ImageHandler().single_file(int(file[0][-1]),
-                                            ImageHandler.rreplace(
-                                                file[8],
-                                                file[1],
-                                                ''),
-                                            file[1])
+        index = self.data['files'][file_id]
 
-        return {
-            'zip': self.zip_file,
-            'gz': self.gzip_file
-        }.get(file[2], 'pass')(BytesIO(stream), file[0], file[1], file[8])
+        # Archive members only have a modify date, zip members keep it in
+        # the change column
+        if index < 0:
+            return {'m': self.archive_members[-1 - index][1][5]}
 
-    def get_files(self) -> None:
+        return {'b': RecordStore.convert_time(self.store.crtime[index]),
+                'c': RecordStore.convert_time(self.store.ctime[index]),
+                'm': RecordStore.convert_time(self.store.mtime[index])}
+
+    @staticmethod
+    def init_language_worker() -> None:
         """
-        Create a list of all files
+        Initializer for language worker processes, the langdetect profiles
+        are loaded once per process before the first file arrives
 
         :return: None
         """
-        data = ImageHandler().files()
+        HandlePool.init_worker()
 
-        lst = []
-        count = 0
-        for item in data[0]:
-            item[0:0] = [count]
-            count += 1
-            lst.append(item)
-            if any(ext == item[3] for ext in ['zip', 'gz']) \
-                    and not item[2].startswith('._'):
-                for i in self.compressed_files(item[1:]):
-                    i[0:0] = [count]
-                    count += 1
-                    lst.append(i)
-
-        self.data['files'] = lst
-
-    # noinspection PyUnresolvedReferences
-    def timeline(self):
-        """
-        Generate a timeline based on the create, change and modify dates of all
-        files
+        # Same input, same outcome
+        DetectorFactory.seed = 0
+        init_factory()
 
-        :return: None
+    @staticmethod
+    def detect_languages(text: str) -> Dict[str, float]:
+        """
+        Detect the languages of a text
+
+        :param text: Text to detect the languages of
+
+        :return: Probability of every language
+        """
+        try:
+            return {lang.lang: lang.prob for lang in detect_langs(text)}
+        except LangDetectException:
+            return {}
+
+    @staticmethod
+    def detect_language(key: Tuple[int, int]) -> str:
         """
-        results = []
+        Detect the language of a text file from a sample of its text
 
-        for item in self.data['files']:
-            create = item[5].strftime('%d-%m-%Y %H:%M:%S') if \
-                isinstance(item[5], datetime) else None
-            modify = item[6].strftime('%d-%m-%Y %H:%M:%S') if \
-                isinstance(item[6], datetime) else None
-            change = item[7].strftime('%d-%m-%Y %H:%M:%S') if \
-                isinstance(item[7], datetime) else None
+        :param key: Partition address and meta address of the file
 
-            results.append(item)
+        :return: Language of the file
+        """
+        stream = HandlePool.get().open_stream(key[0], inode=key[1])
+        if stream is None:
+            return ''
 
-            if all(x is not None for x in [create, modify, change]):
-                if create != modify:
-                    results.append(copy(item))
+        with stream:
+            return Files.sample_language(stream)
 
-                if (create != change and change != modify) or \
-                        (modify != change and change != create):
-                    results.append(copy(item))
+    @staticmethod
+    def sampler() -> TextSampler:
+        """
+        Get a text sampler with the language settings
 
-            elif sum(x is not None for x in [create, modify, change]) == 2:
-                values = [x for x in [create, modify, change] if x is not None]
+        :return: Text sampler
+        """
+        return TextSampler(Files.LANGUAGE_SAMPLING,
+                           Files.LANGUAGE_READ_SIZE,
+                           Files.LANGUAGE_WINDOW_SIZE,
+                           Files.LANGUAGE_WINDOWS,
+                           Files.LANGUAGE_TOLERANCE)
 
-                if values[0] != values[1]:
-                    results.append(copy(item))
+    @staticmethod
+    def sample_language(stream: BinaryIO) -> str:
+        """
+        Detect the language of a sample of the text in a stream
 
-        results.sort(
-            key=lambda x: x[7] if isinstance(x[7], datetime) else datetime.min)
-        results.sort(
-            key=lambda x: x[6] if isinstance(x[6], datetime) else datetime.min)
-        results.sort(
-            key=lambda x: x[5] if isinstance(x[5], datetime) else datetime.min)
+        :param stream: Seekable file like object
 
-        self.data['timeline'] = results
+        :return: Languages of the text
+        """
+        return Files.format_languages(
+            Files.sampler().sample(stream, Files.detect_languages))
 
     @staticmethod
-    def detect_language(file: List[Union[str, datetime]]) \
-            -> List[Union[str, datetime]]:
+    def format_languages(languages: Dict[str, float]) -> str:
         """
-        Detect the language of a text file
+        Format the probabilities of languages, the most likely first
 
-        :param file: File information
+        :param languages: Probability of every language
 
-        :return: Language of the file
+        :return: Languages of the text
+        """
+        return ', '.join(['{:.2f}% {}'.format(
+            probability * 100, lang_dict.get(lang, lang)
+        ) for lang, probability in sorted(languages.items(),
+                                          key=lambda x: x[1],
+                                          reverse=True)])
+
+    def resume(self, stage: str, files: List[int]) -> \
+            Tuple[Dict[int, str], List[int]]:
         """
-        if len(file) > 10:
-            return file
-
-        languages = None
-        languages_string = ''
-        if file[3].lower() == 'txt':
-            text = ImageHandler().single_file(int(file[1][-1]),
-                                              ImageHandler.rreplace(
-                                                  file[9],
-                                                  file[2],
-                                                  ''),
-                                              file[2])
-            try:
-                languages = detect_langs(text.decode('utf-8'))
-            except UnicodeDecodeError:
-                try:
-                    languages = detect_langs(text.decode('utf-16'))
-                except UnicodeDecodeError:
-                    pass
-
-            if languages is not None:
-                languages_string = ', '.join(['{:.2f}% {}'.format(
-                    float(str(lang)[3:]) * 100,
-                    lang_dict[str(lang)[:2]]
-                ) for lang in languages])
-
-        file.append(languages_string)
-
-        return file
+        Get the results of an interrupted run from the journal
 
-    def language(self) -> None:
+        :param stage: Name of the stage, for example 'hashing'
+        :param files: File ids
+
+        :return: Results by file id from the journal and the ids of the files
+                 that still have to be processed
+        """
+        journaled = self.journal.results(stage)
+        done = {}
+        pending = []
+
+        for file_id in files:
+            result = journaled.get(file_id)
+
+            if result is not None and result[0] == self.path(file_id):
+                done[file_id] = result[1]
+            else:
+                pending.append(file_id)
+
+        if len(done) > 0:
+            self.logger.info('Resuming {} with {} of {} files done'.format(
+                stage, len(done), len(files)))
+
+        return done, pending
+
+    def checkpoint(self, stage: str,
+                   results: Dict[int, Union[str, Dict[str, str]]],
+                   file_ids: List[int]) -> None:
+        """
+        Write new results of a stage to the journal, a task that has results
+        for more than one stage writes them to every stage
+
+        :param stage: Name of the stage
+        :param results: Results of the stage by file id, or results by stage
+                        by file id
+        :param file_ids: Files that got a result since the last checkpoint
+
+        :return: None
         """
-        Wrapper to detect the language of files on multiple threads and save
-        the outcome
+        entries = {}
+
+        for x in file_ids:
+            values = results[x] if isinstance(results[x], dict) else \
+                {stage: results[x]}
+
+            for name, value in values.items():
+                entries.setdefault(name, []).append(
+                    (x, self.path(x), value))
+
+        for name, lst in entries.items():
+            self.journal.add(name, lst)
+
+    def collect(self, stage: str, files: List[int],
+                results: Dict[int, Union[str, Dict[str, str]]],
+                tasks: Iterator[Result],
+                duplicates: Dict[int, List[int]] = None) -> None:
+        """
+        Add the outcome of every task to the results while the tasks stream
+        in, the results are written to the journal every checkpoint
+        interval. Files of failed tasks don't get a result
+
+        :param stage: Name of the stage
+        :param files: File ids, tasks are tagged with an index in it
+        :param results: Results by file id the outcomes are added to
+        :param tasks: Tag, outcome and error of every task
+        :param duplicates: Other files that get the outcome of a task
 
         :return: None
         """
-        data = [x for x in self.data['files'] if x[3] == 'txt']
-        with Pool(processes=cpu_count()) as pool:
-            results = []
-            [
-                pool.apply_async(self.detect_language,
-                                 (x,),
-                                 callback=results.append)
-                for x in data
-            ]
+        fresh = []
+        checkpoint = monotonic()
+
+        for index, outcome, error in tasks:
+            if error is None:
+                for file_id in [files[index],
+                                *(duplicates or {}).get(index, [])]:
+                    results[file_id] = outcome
+                    fresh.append(file_id)
+
+            if monotonic() - checkpoint >= self.CHECKPOINT_INTERVAL:
+                self.checkpoint(stage, results, fresh)
+                fresh = []
+                checkpoint = monotonic()
+
+        self.checkpoint(stage, results, fresh)
+
+    def progress(self, stage: str) -> Callable[[int, int], None]:
+        """
+        Get a progress callback for a stage
+
+        :param stage: Name of the stage
+
+        :return: Progress callback
+        """
+        def callback(done: int, total: int) -> None:
+            self.logger.debug('{}: {} of {} files'.format(stage, done, total))
+
+        return callback
+
+    def key(self, file_id: int) -> Tuple[int, int]:
+        """
+        Get the smallest task argument that identifies a file in the image
+
+        :param file_id: Id of a file of the image
+
+        :return: Partition address and meta address of the file
+        """
+        index = self.data['files'][file_id]
+
+        return self.store.partition_table[self.store.partition[index]], \
+            self.store.inode[index]
+
+    def language(self) -> None:
+        """
+        Wrapper to detect the language of files on multiple processes and
+        save the outcome
 
-            while len(data) != len(results):
-                sleep(0.05)
+        :return: None
+        """
+        # Archive members were sampled while they were expanded
+        data = [x for x, index in enumerate(self.data['files'])
+                if index >= 0 and
+                self.is_text(self.store.ext_table[self.store.ext[index]],
+                             self.store.get_kind(index))]
+        results, pending = self.resume('language', data)
+        results.update(self.data['language'])
+
+        with Pipeline(self.PROCESSES, self.init_language_worker,
+                      self.progress('language')) as pipeline:
+            self.collect('language', pending, results,
+                         pipeline.map(self.detect_language,
+                                      [self.key(x) for x in pending]))
+
+        # Files that couldn't be read are listed without a language
+        for file_id in pending:
+            results.setdefault(file_id, '')
 
         self.data['language'] = results
 
     @staticmethod
-    def hash(file: List[Union[str, datetime]]) -> List[Union[str, datetime]]:
+    def hash(key: Tuple[int, int]) -> Dict[str, str]:
         """
-        Hash a single file
+        Hash a single file, count its entropy and detect its type in the same
+        read pass
 
-        :param file: File information
+        :param key: Partition address and meta address of the file
 
-        :return: Hash of the file
+        :return: Hash, entropy and detected type of the file, empty strings
+                 and no type when the file couldn't be read
         """
-        if len(file) > 10:
-            return file
+        results = HandlePool.get().file_digests(
+            key[0], inode=key[1],
+            engine=HashEngine(consumers={'entropy': Entropy,
+                                         'kind': HeadSniffer}))
+
+        if len(results) == 0:
+            return {'hashing': '', 'entropy': ''}
 
-        if '._' in file[1]:
-            return file
+        return {'hashing': results['sha256'],
+                'entropy': Files.format_entropy(results['entropy']),
+                'kind': results['kind']}
 
-        sha_sum = ImageHandler().single_file(int(file[1][-1]),
-                                             ImageHandler.rreplace(
-                                                 file[9],
-                                                 file[2],
-                                                 ''),
-                                             file[2],
-                                             True)
+    @staticmethod
+    def format_entropy(entropy: float) -> str:
+        """
+        Format the entropy of a file
+
+        :param entropy: Entropy in bits per byte
+
+        :return: Entropy with three decimals
+        """
+        return '{:.3f}'.format(entropy)
 
-        file.append(sha_sum)
+    @staticmethod
+    def physical_offset(key: Tuple[int, int]) -> int:
+        """
+        Get the offset of the data of a file in the image
+
+        :param key: Partition address and meta address of the file
+
+        :return: Offset in bytes
+        """
+        return HandlePool.get().physical_offset(key[0], inode=key[1])
+
+    def cache_key(self, file_id: int) -> Key:
+        """
+        Get the key of a file in the hash cache
+
+        :param file_id: Id of a file of the image
+
+        :return: Partition, meta address, size and MAC times of the file
+        """
+        index = self.data['files'][file_id]
 
-        return file
+        return HashCache.key(
+            *self.key(file_id), self.store.size[index],
+            *[RecordStore.convert_time(column[index])
+              for column in [self.store.crtime, self.store.ctime,
+                             self.store.mtime]])
 
     def hashes(self) -> None:
         """
-        Wrapper to hash files on multiple threads and save the outcome
+        Wrapper to hash files on multiple processes and save the outcome,
+        files are hashed in the order of their data in the image so the reads
+        sweep over the image instead of jumping around. Files that are in the
+        hash cache aren't read again and every meta address is only read
+        once. The types of the files that are read are detected from the
+        same read
 
         :return: None
         """
-        with Pool(processes=cpu_count()) as pool:
-            results = []
-            [
-                pool.apply_async(self.hash, (x,), callback=results.append)
-                for x in self.data['files']
-            ]
+        # Archive members are hashed while they are expanded after this pass
+        files = [x for x, index in enumerate(self.data['files'])
+                 if index >= 0 and '._' not in self.store.name[index]]
+        results, pending = self.resume('hashing', files)
+        entropy, _ = self.resume('entropy', files)
+
+        cache = HashCache(self.identity)
+        cached = cache.get()
+        cached_entropy = cache.get('entropy')
+        start = len(results)
+
+        unique = []
+        duplicates = {}
+        first = {}
+
+        for file_id in pending:
+            digest = cached.get(self.cache_key(file_id))
+            value = cached_entropy.get(self.cache_key(file_id))
+            key = self.key(file_id)
+
+            # Files that were cached without their entropy are read again
+            if digest is not None and value is not None:
+                results[file_id] = digest
+                entropy[file_id] = value
+            elif key in first:
+                # Hard links and other references to the same meta address
+                duplicates.setdefault(first[key], []).append(file_id)
+            else:
+                first[key] = len(unique)
+                unique.append(file_id)
+
+        self.logger.info('Hashing {} files, {} from the hash cache'.format(
+            len(pending), len(results) - start))
+
+        hashed = {}
+        keys = [self.key(x) for x in unique]
+
+        with Pipeline(self.PROCESSES, HandlePool.init_worker,
+                      self.progress('hashing')) as pipeline:
+            offsets = [-1 if error is not None else offset
+                       for _, offset, error in pipeline.map(
+                           self.physical_offset, keys, ordered=True,
+                           chunk_size=self.HASH_BATCH_FILES)]
+
+            batches = IoScheduler.batches(
+                list(range(len(unique))),
+                offsets,
+                [self.store.size[self.data['files'][x]] for x in unique],
+                self.HASH_BATCH_BYTES,
+                self.HASH_BATCH_FILES)
+
+            self.collect('hashing', unique, hashed, pipeline.map_chunks(
+                self.hash,
+                [[(i, keys[i]) for i in batch] for batch in batches],
+                total=len(unique)), duplicates)
+
+        cache.add((self.cache_key(x), values['hashing'])
+                  for x, values in hashed.items())
+        cache.add(((self.cache_key(x), values['entropy'])
+                   for x, values in hashed.items()), 'entropy')
+        cache.close()
+
+        sniffed = []
+
+        for x, values in hashed.items():
+            results[x] = values['hashing']
+            entropy[x] = values['entropy']
+
+            if 'kind' in values:
+                self.store.set_kind(self.data['files'][x], values['kind'])
+                sniffed.append(self.data['files'][x])
+
+        # Photos and the next runs get the types from the catalog
+        HandlePool.get().save_types(self.store, sniffed)
+
+        self.data['entropy'] = {x: value for x, value in entropy.items()
+                                if value != ''}
+        self.data['hashing'] = {x: digest for x, digest in results.items()
+                                if digest != ''}
+
+    def filter_known(self, hashes: Dict[int, str]) -> None:
+        """
+        Check the hashes against the known-good and known-bad hash sets,
+        known-good files are left out of the hashes sheet and known-bad
+        files are flagged. Every file keeps its hash for the other sheets.
+        The sets are memory mapped so no worker holds them in memory
+
+        :param hashes: Hash by file id
+
+        :return: None
+        """
+        self.known_good = set()
+        hash_sets = HashSets()
 
-            while len(self.data['files']) != len(results):
-                sleep(0.05)
+        if len(hash_sets) == 0:
+            hash_sets.close()
+            return
 
-        self.data['hashing'] = [x for x in results if x[10] != '']
+        self.known = {}
 
-    def format_items(self, part: str) -> List[Union[str, int]]:
+        for file_id, digest in hashes.items():
+            status = hash_sets.status(digest)
+
+            if status == 'bad':
+                self.known[file_id] = status
+            elif status == 'good':
+                self.known_good.add(file_id)
+
+        self.logger.info('Hash sets {}: {} known-good and {} known-bad '
+                         'files'.format(hash_sets.stats(),
+                                        len(self.known_good),
+                                        len(self.known)))
+        hash_sets.close()
+
+    def format_items(self, part: str) -> List[List[str]]:
         """
-        Format the items to be writable to a XLSX workbook
+        Format the items to be writable to a XLSX workbook, every item is
+        built from the row of a file and the columns of the part
 
         :param part: Part to format
 
         :return: Formatted items
         """
-        items = []
-
-        if part == 'hashing' or part == 'language':
-            data = sorted(self.data[part])
-        elif part == 'combined':
-            data = self.combined_data()
+        if part == 'timeline' or \
+                (part == 'combined' and self.options['timeline']):
+            # Files without timestamps are listed without a type
+            rows = ((file_id, '' if date is None else types)
+                    for date, file_id, types in self.data['timeline'])
+        elif part == 'hashing':
+            rows = ((file_id, None) for file_id in self.order
+                    if file_id in self.data[part] and
+                    file_id not in self.known_good)
+        elif part == 'language':
+            rows = ((file_id, None) for file_id in self.order
+                    if file_id in self.data[part])
         else:
-            data = deepcopy(self.data[part])
+            rows = ((file_id, None) for file_id in self.order)
 
-        for item in data:
-            item.pop(0)
-            if part == 'files' or part == 'timeline':
-                if len(item) > 9:
-                    del item[9:11]
-            if part == 'hashing':
-                if len(item) > 10:
-                    item.pop(10)
-            if part == 'language':
-                if len(item) > 10:
-                    item.pop(9)
+        columns = self.columns(part)
 
-            item[4] = item[4].strftime('%d-%m-%Y %H:%M:%S') if \
-                isinstance(item[4], datetime) else ''
-            item[5] = item[5].strftime('%d-%m-%Y %H:%M:%S') if \
-                isinstance(item[5], datetime) else ''
-            item[6] = item[6].strftime('%d-%m-%Y %H:%M:%S') if \
-                isinstance(item[6], datetime) else ''
-            item[7] = str(item[7])
+        return [self.format_item(file_id, columns, types)
+                for file_id, types in rows]
 
-            items.append(item)
+    def columns(self, part: str) -> List[Callable[[int], str]]:
+        """
+        Get the columns that are added to the file information of a part
 
-        return items
+        :param part: Part to get the columns of
 
-    def combined_data(self):
+        :return: Function that gets the value by file id of every column
         """
-        Combine the results of multiple data sources if multiple option were
-        selected by the user
+        if part == 'files':
+            if not self.options['hashing']:
+                return [self.kind]
 
-        :return: Combined data
+            return [self.kind, self.column(self.data['entropy']),
+                    self.column({
+                        x: 'Yes' for x, value in self.data['entropy'].items()
+                        if Entropy.is_high(float(value))})]
+
+        if part == 'hashing':
+            if self.known is None:
+                return [self.column(self.data['hashing'])]
+
+            return [self.column(self.data['hashing']),
+                    self.column({x: 'Known bad' for x in self.known})]
+
+        if part == 'language':
+            return [self.column(self.data['language'])]
+
+        if part == 'combined':
+            return [self.column(self.data[x]) for x in ['hashing', 'language']
+                    if self.options[x]]
+
+        return []
+
+    @staticmethod
+    def column(values: Dict[int, str]) -> Callable[[int], str]:
         """
-        if self.options['timeline']:
-            data = deepcopy(self.data['timeline'])
-        else:
-            data = deepcopy(self.data['files'])
+        Get the function that gets the value of a column by file id
 
-        lst = []
+        :param values: Value by file id
 
-        for item in data:
-            if len(item) > 10:
-                if not self.options['hashing']:
-                    item.pop(10)
+        :return: Function that gets the value of a file, an empty string
+                 when the file has no value
+        """
+        return lambda file_id: values.get(file_id, '')
 
-                if not self.options['language'] and not \
-                        self.options['hashing']:
-                    item.pop(10)
-                elif not self.options['language']:
-                    item.pop(11)
-            else:
-                if self.options['hashing']:
-                    y = [i for i in self.data['hashing'] if i[0] == item[0]]
-                    if y:
-                        item.append(y[0][10])
-                    else:
-                        item.append('')
-
-                if self.options['language']:
-                    y = [i for i in self.data['language'] if i[0] == item[0]]
-                    if y:
-                        item.append(y[0][10])
-                    else:
-                        item.append('')
-
-            lst.append(item)
+    def format_item(self, file_id: int, columns: List[Callable[[int], str]],
+                    types: str = None) -> List[str]:
+        """
+        Format the information of a single file
 
-        return lst
+        :param file_id: Id of the file
+        :param columns: Function that gets the value by file id of every
+                        column to add
+        :param types: Timestamp types of a timeline event
+
+        :return: Formatted file information
+        """
+        file = self.row(file_id)
+
+        item = [*file[0:4], *[x.strftime('%d-%m-%Y %H:%M:%S')
+                              if isinstance(x, datetime) else ''
+                              for x in file[4:7]],
+                str(file[7]), file[8],
+                *[column(file_id) for column in columns]]
+
+        if types is not None:
+            item.append(types)
+
+        return item
 
     def save_merged(self, xlsx_writer) -> None:
         """
@@ -676,6 +1005,9 @@ class Files(ModuleInterface):
         if self.options['language']:
             lst.append('Language')
 
+        if self.options['timeline']:
+            lst.append('Timestamp type')
+
         xlsx_writer.add_worksheet('Combined')
         xlsx_writer.write_headers('Combined', [
             *self.headers,
@@ -692,7 +1024,11 @@ class Files(ModuleInterface):
         :return: None
         """
         xlsx_writer.add_worksheet('Files')
-        xlsx_writer.write_headers('Files', self.headers)
+        xlsx_writer.write_headers('Files', [
+            *self.headers,
+            *['Detected type'],
+            *(['Entropy', 'High entropy'] if self.options['hashing'] else [])
+        ])
         xlsx_writer.write_items('Files', self.format_items('files'))
 
     def save_hashes(self, xlsx_writer) -> None:
@@ -706,7 +1042,8 @@ class Files(ModuleInterface):
         xlsx_writer.add_worksheet('Hashes')
         xlsx_writer.write_headers('Hashes', [
             *self.headers,
-            *['SHA256 hash']
+            *['SHA256 hash'],
+            *([] if self.known is None else ['Known'])
         ])
         xlsx_writer.write_items('Hashes', self.format_items('hashing'))
 
@@ -719,9 +1056,44 @@ class Files(ModuleInterface):
         :return: None
         """
         xlsx_writer.add_worksheet('Timeline')
-        xlsx_writer.write_headers('Timeline', self.headers)
+        xlsx_writer.write_headers('Timeline', [
+            *self.headers,
+            *['Timestamp type']
+        ])
         xlsx_writer.write_items('Timeline', self.format_items('timeline'))
 
+        self.save_bodyfile()
+
+    def save_bodyfile(self) -> None:
+        """
+        Save the timestamps of all files as a bodyfile next to the XLSX
+        workbook, mactime and other timeline tools read this format. The
+        lines are built from the columns of the store and the archive
+        members, not from the rows of the sheets
+
+        :return: None
+        """
+        path = Path(XlsxWriter.get_save_path('timeline')).with_suffix('.body')
+
+        with open(str(path), 'w', encoding='UTF-8') as f:
+            for file_id in self.order:
+                index = self.data['files'][file_id]
+
+                if index < 0:
+                    _, _, _, f_type, _, _, _, size, file_path, inode = \
+                        self.archive_members[-1 - index][1]
+                else:
+                    f_type = RecordStore.TYPES[self.store.type[index]]
+                    size = self.store.size[index]
+                    file_path = self.path(file_id)
+                    inode = max(self.store.inode[index], 0)
+
+                f.write(Timeline.body_line(
+                    file_path, inode,
+                    'd/d---------' if f_type == 'DIR' else 'r/r---------',
+                    size if isinstance(size, int) else 0,
+                    self.times(file_id)))
+
     def save_language(self, xlsx_writer) -> None:
         """
         Save the language data to a XLSX workbook
@@ -1,5 +1,4 @@
 import abc
-import hashlib
 from datetime import datetime
 from functools import partial
 from itertools import chain
@@ -15,6 +14,7 @@ import pyshark
 from ipwhois import IPWhois
 
 from Interfaces.ModuleInterface import ModuleInterface
+from Utils.HashEngine import HashEngine
 from Utils.Logging.Logging import Logging
 from Utils.XlsxWriter import XlsxWriter
 
@@ -333,6 +333,7 @@ class PysharkReader(Reader):
 
 class Hasher():
     BLOCKSIZE = 65536
+    DIGESTS = ['md5']
 
     @staticmethod
     def getSize(f: str) -> int:
@@ -353,11 +354,7 @@ class Hasher():
         # if s == 0:
         #     return (fi, "")
 
-        with open(fi, 'rb') as f:
-            hasher = hashlib.md5()
-            hasher.update(f.read())
-
-            return (fi, hasher.hexdigest())
+        return (fi, HashEngine(Hasher.DIGESTS).read_path(fi)['md5'])
 
 
 class CompatibleException(Exception):
@@ -382,6 +379,7 @@ def check_and_set_compatible(func):
 
 
 class PcapReader(ModuleInterface):
+    PROCESSES = cpu_count()
 
     def __init__(self, files):
         self.logger = Logging(self.__class__.__name__).logger
@@ -389,7 +387,7 @@ class PcapReader(ModuleInterface):
         self.to_check = PcapReader.get_config_save_path('ip')
         self.dpkt_compatible = []
         self.pyshark_compatible = []
-        self.pool = Pool(cpu_count())
+        self.pool = Pool(self.PROCESSES)
 
         self.data = {
             "hashes": [],
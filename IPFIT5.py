@@ -2,6 +2,7 @@ from collections import defaultdict
 from datetime import datetime
 from multiprocessing import Process
 from sys import exit as exit_application
+from threading import Thread
 
 from asciimatics.exceptions import ResizeScreenError, NextScene, \
     StopApplication
@@ -16,6 +17,7 @@ from IP import capreader
 
 from os import path, listdir
 
+from Utils.Batch import Batch
 from Utils.FilePicker import FilepickerFrame
 from Utils.ImageHandler import ImageHandler
 from Utils.Logging.Store.Logging import LoggingStore
@@ -23,6 +25,7 @@ from Utils.Logging.Store.Logging import LoggingStoreActions
 from Utils.Store.Actions.CredentialsStoreActions import CredentialsStoreActions
 from Utils.Store.Credentials import CredentialStore
 from Utils.Store.Image import ImageStore
+from Utils.Verifier import Verifier
 
 
 class MenuFrame(Frame):
@@ -36,10 +39,14 @@ class MenuFrame(Frame):
             'FA': False,
             'FB': False,
             'FC': False,
-            'IB': False
+            'IB': False,
+            'BA': False
         }
 
         self.image_handler = None
+        self.verify_thread = None
+        self.verify_progress = ''
+        self.verify_results = []
         self.image_store = ImageStore().image_store
         credentials = CredentialStore()
         self.credentials_store = credentials.credential_store
@@ -97,6 +104,16 @@ class MenuFrame(Frame):
         self.image_info_button = Button('Image info', self.file_info)
         self.image_info_button.disabled = True
 
+        self.verify_button = Button('Verify image', self.verify_image)
+        self.verify_button.disabled = True
+        self.verify_label = Label('', height=1)
+
+        self.batch_btn = CheckBox('Process all images in the folder',
+                                  label='',
+                                  name='BA',
+                                  on_change=self.on_change)
+        self.batch_btn.disabled = True
+
         self.photos_btn = CheckBox('Analyze photo\'s',
                                    label='',
                                    name='PA',
@@ -162,15 +179,25 @@ class MenuFrame(Frame):
         image_layout.add_widget(Divider(height=3), 1)
 
         image_layout.add_widget(self.image_label, 1)
+        image_layout.add_widget(self.verify_label, 1)
 
-        image_buttons_layout = Layout([1, 25, 25, 1])
+        image_buttons_layout = Layout([1, 17, 17, 17, 1])
         self.add_layout(image_buttons_layout)
 
         image_buttons_layout.add_widget(
             Button('Select image/PCAP', self.file_picker), 1)
         image_buttons_layout.add_widget(self.image_info_button, 2)
+        image_buttons_layout.add_widget(self.verify_button, 3)
         image_buttons_layout.add_widget(Divider(height=3), 1)
         image_buttons_layout.add_widget(Divider(height=3), 2)
+        image_buttons_layout.add_widget(Divider(height=3), 3)
+
+        batch_layout = Layout([1, 50, 1])
+        self.add_layout(batch_layout)
+
+        batch_layout.add_widget(Label('Batch', height=2), 1)
+        batch_layout.add_widget(self.batch_btn, 1)
+        batch_layout.add_widget(Divider(height=3), 1)
 
         photos_layout = Layout([1, 50, 1])
         self.add_layout(photos_layout)
@@ -212,6 +239,9 @@ class MenuFrame(Frame):
         if self.image_handler.check_file():
             self.form_data['IA'] = self.image_store.get_state()
             self.image_info_button.disabled = False
+            self.batch_btn.disabled = False
+            self.verify_button.disabled = \
+                not self.image_handler.encase_image(self.image_handler.ext)
 
             self.photos_btn.disabled = False
             self.files_one_btn.disabled = False
@@ -220,6 +250,8 @@ class MenuFrame(Frame):
             self.pcap_btn.disabled = True
         else:
             self.image_info_button.disabled = True
+            self.verify_button.disabled = True
+            self.batch_btn.disabled = True
             self.photos_btn.disabled = True
             self.files_one_btn.disabled = True
             self.files_two_btn.disabled = True
@@ -261,6 +293,58 @@ class MenuFrame(Frame):
             PopUpDialog(self._screen,
                         '\n'.join([*metadata, *volume_information]), ['OK']))
 
+    def verify_image(self):
+        if self.verify_thread is not None:
+            return
+
+        self.verify_button.disabled = True
+        self.verify_progress = 'Verifying image'
+        self.verify_results = []
+
+        # The image is read on a thread so the form keeps responding
+        self.verify_thread = Thread(target=self.verify_worker, daemon=True)
+        self.verify_thread.start()
+
+    def verify_worker(self):
+        def progress(stats):
+            self.verify_progress = 'Verifying image: {}'.format(
+                Verifier.format_stats(stats))
+
+        try:
+            self.verify_results = self.image_handler.verify_image(progress)
+        except Exception as e:
+            self.verify_results = ['EWF Verification', '',
+                                   '- Failed: {}'.format(e)]
+
+    def show_verification(self):
+        if self.verify_thread is None:
+            return
+
+        if self.verify_thread.is_alive():
+            self.verify_label.text = self.verify_progress
+            return
+
+        self.verify_thread = None
+        self.verify_label.text = ''
+        self.verify_button.disabled = False
+
+        self._scene.add_effect(
+            PopUpDialog(self._screen, '\n'.join(self.verify_results),
+                        ['OK']))
+
+    @property
+    def frame_update_count(self):
+        # Redraw every second while the image is verified
+        if self.verify_thread is not None:
+            return 20
+
+        return super(MenuFrame, self).frame_update_count
+
+    def _update(self, frame_no):
+        self.show_verification()
+
+        super(MenuFrame, self)._update(frame_no)
+
     def quit(self):
         self._scene.add_effect(
             PopUpDialog(self._screen,
@@ -312,7 +396,29 @@ class MenuFrame(Frame):
         ip.run()
         ip.results()
 
+    def exec_batch(self):
+        pth = path.dirname(self.image_store.get_state())
+
+        failed = Batch(pth, self.data).run()
+
+        self.finished(['{} failed for {}'.format(module, name)
+                       for module, name in failed])
+
+    def finished(self, failed):
+        msg = 'All jobs have finished!'
+
+        if len(failed) > 0:
+            msg = '\n'.join(['Some jobs have failed, see the log:', '',
+                             *failed])
+
+        self._scene.add_effect(
+            PopUpDialog(self._screen, msg, ['OK'], on_close=self.quit_on_yes))
+
     def exec(self):
+        if self.data.get('BA', False):
+            self.exec_batch()
+            return
+
         photos = Photo.Photos()
         files = Files()
 
@@ -336,31 +442,32 @@ class MenuFrame(Frame):
 
         if self.data.get('PA', False):
             execute_list.append(
-                Process(target=self.exec_photos, args=(photos,))
+                ('Photos', Process(target=self.exec_photos, args=(photos,)))
             )
 
         if self.data.get('FA', False) or \
                 self.data.get('FB', False) or \
                 self.data.get('FC', False):
             execute_list.append(
-                Process(target=self.exec_files, args=(files,))
+                ('Files', Process(target=self.exec_files, args=(files,)))
             )
 
         if self.data.get('IB', False):
 
             self.exec_ip(ip)
 
-        processes = []
-        for p in execute_list:
+        for _, p in execute_list:
             p.start()
-            processes.append(p)
 
-        for p in processes:
+        failed = []
+        for name, p in execute_list:
             p.join()
 
-        self._scene.add_effect(
-            PopUpDialog(self._screen, 'All jobs have finished!', ['OK'],
-                        on_close=self.quit_on_yes))
+            if p.exitcode != 0:
+                failed.append('{} failed with exit code {}'.format(
+                    name, p.exitcode))
+
+        self.finished(failed)
 
     def get_settings(self):
         settings = self.credentials_store.get_state()
@@ -1,13 +1,19 @@
-from io import BytesIO
+from multiprocessing import cpu_count
+
 from exifread import process_file
 
 from Interfaces.ModuleInterface import ModuleInterface
-from Utils.ImageHandler import ImageHandler
+from Utils.HashCache import HashCache
+from Utils.ImageHandler import HandlePool, ImageHandler
+from Utils.IoScheduler import IoScheduler
 from Utils.Logging.Logging import Logging
+from Utils.Pipeline import Pipeline
 from Utils.XlsxWriter import XlsxWriter
 
 
 class Photos(ModuleInterface):
+    PROCESSES = cpu_count()
+
     def __init__(self):
         # instancieer de debug logger
         self.logger = Logging(self.__class__.__name__).logger
@@ -20,7 +26,7 @@ class Photos(ModuleInterface):
 
         :return: None
         """
-        files = self.get_files()[0]
+        files = self.get_files()
         filtered = self.filter_files(files)
         hashed = self.hash(filtered)
 
@@ -45,6 +51,8 @@ class Photos(ModuleInterface):
         for row in self.data:
             # print(row[4])
             row[4] = str(row[4])
+            # Drop the meta address, it's only used to open the file
+            row.pop(9)
         xlsx_writer.write_items("Photos", self.data)
 
         """
@@ -57,70 +65,143 @@ class Photos(ModuleInterface):
     @staticmethod
     def get_files():
         """
-        Create a list of all files
+        Create a record store of all files
 
-        :return: None
+        :return: Record store with all files
         """
-        return ImageHandler().files()
+        return HandlePool.get().records()
 
     @staticmethod
     def filter_files(files):
-        lst = []
+        """
+        Get the photos from the first partition, by extension or by the type
+        detected from their content
 
-        for file in files:
-            if file[2] == 'jpeg' and '._' not in file[1] or \
-                    file[2] == 'jpg' and '._' not in file[1] or \
-                    file[2] == 'png' and '._' not in file[1]:
-                lst.append(file)
+        :param files: Record store with all files
+
+        :return: Rows of all photos
+        """
+        partitions = files.partitions()
+
+        if len(partitions) == 0:
+            return []
+
+        # Renamed photos are found by their first bytes
+        HandlePool.get().detect_types(
+            files, files.select(partition=partitions[0]), Photos.PROCESSES)
+
+        return [file for file in files.rows(files.select(
+            partition=partitions[0],
+            extensions=['jpeg', 'jpg', 'png'],
+            kinds=['jpeg', 'png'])) if '._' not in file[1]]
+
+    @staticmethod
+    def key(file):
+        """
+        Get the partition address and meta address of a file
+
+        :param file: Single file information
+
+        :return: Key of the file
+        """
+        return ImageHandler.partition_number(file[0]), file[9]
 
-        return lst
+    @staticmethod
+    def physical_offset(key):
+        """
+        Get the offset of the data of a single file in the image
+
+        :param key: Partition address and meta address of the file
+
+        :return: Offset in bytes
+        """
+        return HandlePool.get().physical_offset(key[0], inode=key[1])
 
     @staticmethod
-    def hash(files):
+    def file_hash(key):
         """
         Hash a single file
 
-        :param files:List of all filtered files
+        :param key: Partition address and meta address of the file
 
         :return: Hash of the file
         """
-        lst = []
-        for file in files:
-            sha_sum = ImageHandler().single_file(int(file[0][-1]),
-                                                 ImageHandler.rreplace(
-                                                     file[8],
-                                                     file[1],
-                                                     ''),
-                                                 file[1],
-                                                 True)
+        return HandlePool.get().file_hash(key[0], inode=key[1])
+
+    @staticmethod
+    def cache_key(file):
+        """
+        Get the key of a file in the hash cache
 
-            file.append(sha_sum)
-            lst.append(file)
+        :param file: Single file information
 
-        return lst
+        :return: Partition, meta address, size and MAC times of the file
+        """
+        return HashCache.key(ImageHandler.partition_number(file[0]), file[9],
+                             file[7], file[4], file[5], file[6])
+
+    def hash(self, files):
+        """
+        Hash all photos on multiple processes, photos that are in the hash
+        cache aren't read again and every meta address is only read once
+
+        :param files: List of all filtered files
+
+        :return: Files with their hash
+        """
+        cache = HashCache(HandlePool.get().image_identity())
+        cached = cache.get()
+        references = {}
+
+        for index, file in enumerate(files):
+            digest = cached.get(self.cache_key(file))
+
+            if digest is not None:
+                file.append(digest)
+            else:
+                references.setdefault(self.key(file), []).append(index)
+
+        keys = list(references)
+
+        with Pipeline(self.PROCESSES, HandlePool.init_worker) as pipeline:
+            offsets = [-1 if error is not None else offset
+                       for _, offset, error in pipeline.map(
+                           self.physical_offset, keys, ordered=True)]
+
+            # Read the photos in the order of their data in the image
+            order = IoScheduler.order(keys, offsets)
+
+            for position, sha_sum, error in pipeline.map(self.file_hash,
+                                                         order):
+                for index in references[order[position]]:
+                    files[index].append('' if error is not None else sha_sum)
+
+        cache.add((self.cache_key(files[index]), files[index][10])
+                  for indexes in references.values() for index in indexes)
+        cache.close()
+
+        return files
 
     @staticmethod
-    def get_bytes(file):
+    def get_stream(file):
         """
-        Get the bytes of a single file
+        Get a stream over a single file
 
         :param file: Single file information
 
-        :return: Bytes of a file
+        :return: File like object
         """
-        bts = ImageHandler().single_file(int(file[0][-1]),
-                                         ImageHandler.rreplace(
-                                             file[8],
-                                             file[1],
-                                             ''),
-                                         file[1])
-
-        return bts
+        return HandlePool.get().open_stream(
+            ImageHandler.partition_number(file[0]), inode=file[9])
 
     def get_exif(self, files):
         for file in files:
-            fake_file = BytesIO(self.get_bytes(file))
-            tags = process_file(fake_file)
+            stream = self.get_stream(file)
+            if stream is None:
+                continue
+
+            with stream:
+                tags = process_file(stream)
 
             for _ in tags.keys():
                 # if tag not in ('JPEGThumbnail', 'TIFFThumbnail', 'Filename',
@@ -0,0 +1,88 @@
+import unittest
+from bz2 import compress
+from gzip import GzipFile
+from hashlib import sha256
+from io import BytesIO
+from tarfile import TarFile, TarInfo
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from Utils.ArchiveExpander import ArchiveExpander
+from Utils.HashEngine import HashEngine
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.text = b'Dit is een tekst.\n' * 100
+
+        tar = BytesIO()
+        with TarFile(fileobj=tar, mode='w') as tf:
+            info = TarInfo('docs/tekst.txt')
+            info.size = len(self.text)
+            tf.addfile(info, BytesIO(self.text))
+
+        tar_gz = BytesIO()
+        with GzipFile(fileobj=tar_gz, mode='wb') as gz:
+            gz.write(tar.getvalue())
+
+        self.archive = BytesIO()
+        with ZipFile(self.archive, 'w', ZIP_DEFLATED) as zf:
+            zf.writestr('map/', b'')
+            zf.writestr('map/docs.tar.gz', tar_gz.getvalue())
+            zf.writestr('tekst.txt.bz2', compress(self.text))
+
+    @staticmethod
+    def engine(*_):
+        return HashEngine()
+
+    def test_expand(self):
+        expander = ArchiveExpander(self.engine)
+        members = expander.expand(self.archive, 'archief.zip', '/archief.zip')
+        text_hash = sha256(self.text).hexdigest()
+
+        assert [(m[0], m[2], m[5]) for m in members] == [
+            ('map', 'DIR', '/archief.zip/map/'),
+            ('docs.tar.gz', 'FILE', '/archief.zip/map/docs.tar.gz'),
+            ('docs.tar', 'FILE', '/archief.zip/map/docs.tar.gz/docs.tar'),
+            ('tekst.txt', 'FILE',
+             '/archief.zip/map/docs.tar.gz/docs.tar/docs/tekst.txt'),
+            ('tekst.txt.bz2', 'FILE', '/archief.zip/tekst.txt.bz2'),
+            ('tekst.txt', 'FILE', '/archief.zip/tekst.txt.bz2/tekst.txt')
+        ]
+        assert members[0][6:] == ('', {})
+        assert [m[6] for m in members[1:]] == ['gz', 'tar', 'text', 'bz2',
+                                               'text']
+        assert members[3][4] == len(self.text)
+        assert members[3][7] == {'sha256': text_hash}
+        assert members[5][7] == {'sha256': text_hash}
+
+    def test_expand_depth(self):
+        expander = ArchiveExpander(self.engine, max_depth=2)
+        members = expander.expand(self.archive, 'archief.zip', '/archief.zip')
+
+        assert [m[0] for m in members] == ['map', 'docs.tar.gz', 'docs.tar',
+                                           'tekst.txt.bz2', 'tekst.txt']
+
+    def test_expand_bytes(self):
+        expander = ArchiveExpander(self.engine, max_bytes=len(self.text))
+        members = expander.expand(self.archive, 'archief.zip', '/archief.zip')
+
+        # The tarball is bigger than the text, expanding stops inside it
+        assert [m[0] for m in members] == ['map']
+
+    def test_expand_renamed(self):
+        archive = BytesIO()
+        with ZipFile(archive, 'w') as zf:
+            zf.writestr('bijlage.dat', self.archive.getvalue())
+
+        expander = ArchiveExpander(self.engine)
+        members = expander.expand(archive, 'foto.jpg', '/foto.jpg', 'zip')
+
+        assert [m[0] for m in members[:3]] == ['bijlage.dat', 'map',
+                                               'docs.tar.gz']
+        assert members[0][6] == 'zip'
+
+    def test_expand_broken(self):
+        expander = ArchiveExpander(self.engine)
+
+        assert expander.expand(BytesIO(b'not a zip'), 'kapot.zip',
+                               '/kapot.zip') == []
@@ -0,0 +1,17 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from Utils.Cache import Cache
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        folder = patch.object(Cache, 'get_cache_folder', staticmethod(
+            lambda: Path(self.tmp.name)))
+        folder.start()
+        self.addCleanup(folder.stop)
@@ -0,0 +1,86 @@
+from threading import Thread
+
+from Tests.CacheTest import CacheTestCase
+from Utils.Catalog import Catalog
+
+
+class TestMethods(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.catalog = Catalog('test')
+        self.catalog.begin()
+        self.catalog.clear()
+        self.catalog.add([
+            (2, 'a.txt', 'txt', 'FILE', 0, 0, 0, 10, '/a.txt', 64),
+            (2, 'b.zip', 'zip', 'FILE', 0, 0, 0, 20, '/b.zip', 65),
+            (3, 'c.txt', 'txt', 'FILE', 0, 0, 0, 30, '/c.txt', 66)
+        ])
+        self.catalog.commit()
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def test_catalog_complete(self):
+        assert not self.catalog.is_complete()
+
+        self.catalog.mark_complete()
+        assert self.catalog.is_complete()
+
+        reopened = Catalog('test')
+        assert reopened.is_complete()
+        reopened.close()
+
+    def test_catalog_records(self):
+        assert self.catalog.partitions() == [2, 3]
+        assert len(list(self.catalog.records(2))) == 2
+        assert len(list(self.catalog.records())) == 3
+        assert next(self.catalog.records(3))[9] == 66
+        assert [r[1] for r in self.catalog.records(2, r'\.ZIP$')] == ['b.zip']
+
+    def test_catalog_checkpoint(self):
+        assert self.catalog.checkpoint() == 0
+
+        self.catalog.lock()
+        self.catalog.begin()
+        self.catalog.set_checkpoint(2)
+        self.catalog.commit()
+        self.catalog.unlock()
+
+        reopened = Catalog('test')
+        assert reopened.checkpoint() == 2
+        reopened.close()
+
+    def test_catalog_lock(self):
+        self.catalog.lock()
+        other = Catalog('test')
+        waiter = Thread(target=other.lock)
+        waiter.start()
+
+        # The second walker waits until the first one is done
+        waiter.join(0.5)
+        assert waiter.is_alive()
+
+        self.catalog.unlock()
+        waiter.join(5)
+        assert not waiter.is_alive()
+        other.close()
+
+    def test_catalog_kinds(self):
+        assert self.catalog.kinds() == {}
+
+        self.catalog.begin()
+        self.catalog.add_kinds([(2, 64, 'text'), (2, 65, 'zip'),
+                                (3, 66, '')])
+        self.catalog.add_kinds([(2, 65, 'text')])
+        self.catalog.commit()
+
+        reopened = Catalog('test')
+        assert reopened.kinds() == {(2, 64): 'text', (2, 65): 'text',
+                                    (3, 66): ''}
+        reopened.close()
+
+        self.catalog.begin()
+        self.catalog.clear()
+        self.catalog.commit()
+        assert self.catalog.kinds() == {}
@@ -0,0 +1,40 @@
+import unittest
+from os import urandom
+
+from Utils.Entropy import Entropy
+from Utils.HashEngine import HashEngine
+
+
+class TestMethods(unittest.TestCase):
+    def test_entropy(self):
+        entropy = Entropy()
+        assert entropy.result() == 0.0
+
+        entropy.update(b'aaaa')
+        assert entropy.result() == 0.0
+
+        entropy.update(b'bbbb')
+        assert entropy.result() == 1.0
+
+        entropy = Entropy()
+        entropy.update(bytes(range(256)) * 4)
+        assert entropy.result() == 8.0
+
+    def test_entropy_sample(self):
+        entropy = Entropy(sample_size=4)
+        entropy.update(b'aaaabbbb')
+        entropy.update(b'')
+
+        # Only the start of the block was counted
+        assert entropy.result() == 0.0
+
+    def test_entropy_engine(self):
+        data = urandom(1024 * 1024) + b'\x00' * 1024
+        engine = HashEngine(consumers={'entropy': Entropy})
+        results = engine.read(lambda offset, size:
+                              data[offset:offset + size], len(data))
+
+        assert Entropy.is_high(results['entropy'])
+        assert not Entropy.is_high(
+            engine.read(lambda offset, size: b'tekst ' * (size // 6),
+                        6000)['entropy'])
@@ -0,0 +1,50 @@
+import unittest
+from array import array
+from unittest.mock import patch
+
+from Files.Files import Files
+from Utils.RecordStore import RecordStore
+
+
+class HashSets:
+    def __init__(self):
+        self.sets = {'aa': 'good', 'bb': 'bad'}
+
+    def __len__(self):
+        return len(self.sets)
+
+    def status(self, digest):
+        return self.sets.get(digest)
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.files = Files()
+        self.files.options = {'hashing': True, 'timeline': False,
+                              'language': True}
+        self.files.store = RecordStore([
+            (2, 'good.dll', 'dll', 'FILE', 0, 0, 0, 10, '/good.dll', 64),
+            (2, 'bad.exe', 'exe', 'FILE', 0, 0, 0, 20, '/bad.exe', 65),
+            (2, 'c.txt', 'txt', 'FILE', 0, 0, 0, 30, '/c.txt', 66)
+        ])
+        self.files.data['files'] = array('q', [0, 1, 2])
+        self.files.order = array('q', [0, 1, 2])
+        self.files.data['hashing'] = {0: 'aa', 1: 'bb', 2: 'cc'}
+
+    def test_known_hashes(self):
+        with patch('Files.Files.HashSets', HashSets):
+            self.files.filter_known(self.files.data['hashing'])
+
+        # Known-good files are only left out of the hashes sheet
+        assert [item[1] for item in self.files.format_items('hashing')] == \
+            ['bad.exe', 'c.txt']
+        assert self.files.format_items('hashing')[0][-1] == 'Known bad'
+        assert [item[9] for item in self.files.format_items('combined')] == \
+            ['aa', 'bb', 'cc']
+        assert self.files.data['hashing'][0] == 'aa'
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from Tests.CacheTest import CacheTestCase
+from Utils.HashCache import HashCache
+
+
+class TestMethods(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.cache = HashCache('test')
+        self.key = HashCache.key(2, 64, 10, datetime(2018, 1, 1), '', '')
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_hash_cache(self):
+        self.cache.add([(self.key, 'aa'),
+                        (HashCache.key(2, 65, 0, '', '', ''), '')])
+
+        reopened = HashCache('test')
+        other = HashCache('other')
+        assert reopened.get() == {self.key: 'aa'}
+        assert other.get() == {}
+        reopened.close()
+        other.close()
+
+    def test_hash_cache_changed_file(self):
+        self.cache.add([(self.key, 'aa')])
+
+        changed = HashCache.key(2, 64, 11, datetime(2018, 1, 1), '', '')
+        assert changed not in self.cache.get()
+
+    def test_hash_cache_algorithm(self):
+        self.cache.add([(self.key, '7.900')], 'entropy')
+
+        assert self.cache.get() == {}
+        assert self.cache.get('entropy') == {self.key: '7.900'}
@@ -0,0 +1,50 @@
+import unittest
+from hashlib import blake2b, md5, sha1, sha256
+from io import BytesIO
+
+from Utils.HashEngine import Consumer, HashEngine
+
+
+class Counter(Consumer):
+    def __init__(self):
+        self.blocks = 0
+
+    def update(self, data):
+        self.blocks += 1
+
+    def result(self):
+        return self.blocks
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.data = bytes(range(256)) * 10000
+
+    def read(self, offset, size):
+        return self.data[offset:offset + size]
+
+    def test_hash_engine_digests(self):
+        engine = HashEngine(['md5', 'sha1', 'sha256', 'blake2b'])
+        results = engine.read(self.read, len(self.data))
+
+        assert results == {
+            'md5': md5(self.data).hexdigest(),
+            'sha1': sha1(self.data).hexdigest(),
+            'sha256': sha256(self.data).hexdigest(),
+            'blake2b': blake2b(self.data).hexdigest()
+        }
+        assert engine.read_stream(BytesIO(self.data)) == results
+
+    def test_hash_engine_consumers(self):
+        engine = HashEngine()
+        engine.add_consumer('blocks', Counter)
+        results = engine.read(self.read, len(self.data))
+
+        assert results['sha256'] == sha256(self.data).hexdigest()
+        assert results['blocks'] == 3
+        assert HashEngine().read(self.read, 0)['sha256'] == \
+            sha256(b'').hexdigest()
+
+        # Only the consumers when there are no digests
+        assert HashEngine([], {'blocks': Counter}).read(
+            self.read, len(self.data)) == {'blocks': 3}
@@ -0,0 +1,69 @@
+import unittest
+from hashlib import sha1, sha256
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from Utils.HashSet import HashSet
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.digests = [sha256(str(i).encode()).hexdigest()
+                        for i in range(100)]
+
+        self.source = Path(self.tmp.name).joinpath('list.csv')
+        with open(str(self.source), 'w') as f:
+            f.write('"SHA-256","FileName"\n')
+            for digest in self.digests + self.digests[:10]:
+                f.write('"{}","file.dll"\n'.format(digest.upper()))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_set(self):
+        path = Path(self.tmp.name).joinpath('set.bin')
+
+        run_size = HashSet.RUN_SIZE
+        HashSet.RUN_SIZE = 16
+        HashSet.build([self.source], path)
+        HashSet.RUN_SIZE = run_size
+        hash_set = HashSet(path)
+
+        assert len(hash_set) == 100
+        assert all(digest in hash_set for digest in self.digests)
+        assert sha256(b'unknown').hexdigest() not in hash_set
+        assert 'not a digest' not in hash_set
+        hash_set.close()
+
+    def test_hash_set_empty(self):
+        path = Path(self.tmp.name).joinpath('empty.bin')
+
+        HashSet.build([], path)
+        hash_set = HashSet(path)
+
+        assert len(hash_set) == 0
+        assert self.digests[0] not in hash_set
+        hash_set.close()
+
+    def test_hash_set_algorithm(self):
+        source = Path(self.tmp.name).joinpath('sha1.txt')
+        with open(str(source), 'w') as f:
+            f.write('SHA-1\n')
+            for i in range(10):
+                f.write('{}\n'.format(sha1(str(i).encode()).hexdigest()))
+
+        path = Path(self.tmp.name).joinpath('sha1.bin')
+        HashSet.build([source], path, 'sha1')
+        hash_set = HashSet(path, 'sha1')
+
+        assert len(hash_set) == 10
+        assert sha1(b'0').hexdigest() in hash_set
+        hash_set.close()
+
+        # A SHA-1 list isn't read as an empty SHA-256 set
+        with self.assertRaises(ValueError):
+            HashSet.build([source], Path(self.tmp.name).joinpath('x.bin'))
+
+        with self.assertRaises(ValueError):
+            HashSet.build([self.source], path, 'sha1')
@@ -0,0 +1,201 @@
+import unittest
+from pathlib import Path
+from io import BufferedReader, SEEK_CUR, SEEK_END
+from struct import pack
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from pytsk3 import Img_Info, TSK_FS_META_TYPE_DIR
+
+from Utils.ImageHandler import BlockCache, Ewf, FileStream, ImageHandler, \
+    Raw
+
+
+class Entry:
+    def __init__(self, info, children):
+        self.info = info
+        self.children = children
+
+    def __iter__(self):
+        return iter(self.children)
+
+    def as_directory(self):
+        return self
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.data = bytes(range(256)) * 4
+        self.reads = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_block(self, offset):
+        self.reads.append(offset)
+        return self.data[offset:offset + 16]
+
+    def read_direct(self, offset, size):
+        self.reads.append((offset, size))
+        return self.data[offset:offset + size]
+
+    def test_block_cache_read(self):
+        cache = BlockCache(16, 64, 32)
+
+        # Crosses the boundary between the first and the second block
+        assert cache.read(10, 12, self.read_block, self.read_direct) == \
+            self.data[10:22]
+        assert self.reads == [0, 16]
+
+        assert cache.read(16, 4, self.read_block, self.read_direct) == \
+            self.data[16:20]
+        assert cache.stats()['hits'] == 1
+
+        # Bulk reads bypass the cache
+        assert cache.read(0, 100, self.read_block, self.read_direct) == \
+            self.data[:100]
+        assert self.reads[-1] == (0, 100)
+        assert cache.read(5, 0, self.read_block, self.read_direct) == b''
+
+    def test_block_cache_eviction(self):
+        cache = BlockCache(16, 32, 16)
+
+        cache.read(0, 1, self.read_block, self.read_direct)
+        cache.read(16, 1, self.read_block, self.read_direct)
+        # The first block is used last, so the second block is evicted
+        cache.read(0, 1, self.read_block, self.read_direct)
+        cache.read(32, 1, self.read_block, self.read_direct)
+
+        assert list(cache.blocks) == [0, 2]
+
+        cache.read(16, 1, self.read_block, self.read_direct)
+        assert self.reads == [0, 16, 32, 16]
+        assert cache.stats()['blocks'] == 2
+
+    def segment(self, name, sections):
+        path = Path(self.tmp.name).joinpath(name)
+        data = Ewf.SIGNATURE + b'\x01\x01\x00\x00\x00'
+
+        for kind, content in sections:
+            next_offset = len(data) + Ewf.SECTION_SIZE + len(content)
+            data += kind.ljust(16, b'\x00') + \
+                pack('<QQ', next_offset, Ewf.SECTION_SIZE + len(content)) + \
+                b'\x00' * 44 + content
+
+        with open(str(path), 'wb') as f:
+            f.write(data)
+
+        return str(path)
+
+    def test_ewf_sectors_per_chunk(self):
+        volume = pack('<B3xIIIQ', 1, 100, 128, 512, 12800) + b'\x00' * 64
+
+        assert Ewf.sectors_per_chunk(self.segment('image.E01', [
+            (b'header', b'\x00' * 20),
+            (b'volume', volume),
+            (b'done', b'')
+        ])) == 128
+        assert Ewf.sectors_per_chunk(self.segment('nothing.E01', [
+            (b'header', b'\x00' * 20),
+            (b'done', b'')
+        ])) is None
+        assert Ewf.sectors_per_chunk(__file__) is None
+
+    @staticmethod
+    def entry(name, addr, children=None):
+        meta = SimpleNamespace(type=TSK_FS_META_TYPE_DIR if children is not
+                               None else 0, crtime=0, ctime=0, mtime=0,
+                               size=0, addr=addr)
+
+        return Entry(SimpleNamespace(name=SimpleNamespace(name=name),
+                                     meta=meta,
+                                     fs_file=SimpleNamespace(meta=meta)),
+                     children)
+
+    def test_walk_cycle(self):
+        children = []
+        root = self.entry(b'', 1, children)
+        docs = []
+        children += [self.entry(b'.', 1, children),
+                     self.entry(b'docs', 2, docs),
+                     self.entry(b'a.txt', 3)]
+        # Links back to the root and to the directory itself
+        docs += [self.entry(b'root', 1, children),
+                 self.entry(b'self', 2, docs),
+                 self.entry(b'b.txt', 4)]
+
+        # The walker only uses its static methods
+        handler = ImageHandler.__new__(ImageHandler)
+
+        assert [(x[8], x[9]) for x in handler.walk(2, None, root)] == [
+            ('/docs', 2), ('/docs/root', 1), ('/docs/self', 2),
+            ('/docs/b.txt', 4), ('/a.txt', 3)
+        ]
+
+    def test_raw_segments(self):
+        paths = []
+        for i, size in enumerate([100, 0, 50, 30]):
+            path = Path(self.tmp.name).joinpath('image.00{}'.format(i + 1))
+            with open(str(path), 'wb') as f:
+                f.write(self.data[:size])
+            paths.append(str(path))
+
+        assert Raw.segments(paths[2]) == paths
+        assert Raw.segments(__file__) == [__file__]
+
+        raw = Raw(paths)
+        image = self.data[:100] + self.data[:50] + self.data[:30]
+
+        assert raw.get_size() == 180
+        # Crosses the empty segment and the third segment
+        assert raw.read(90, 80) == image[90:170]
+        assert raw.read(10, 20) == image[10:30]
+        assert raw.read(170, 100) == image[170:]
+        assert raw.read(200, 10) == b''
+        raw.close()
+
+    def test_raw_fallback(self):
+        paths = {}
+        for name, size in [('image.dd', 10), ('empty.dd', 0),
+                           ('image.001', 10), ('disk.vmdk', 10)]:
+            paths[name] = str(Path(self.tmp.name).joinpath(name))
+            with open(paths[name], 'wb') as f:
+                f.write(self.data[:size])
+
+        assert Raw.is_raw(paths['image.dd'])
+        assert Raw.is_raw(paths['image.001'])
+        assert not Raw.is_raw(paths['empty.dd'])
+        assert not Raw.is_raw(paths['disk.vmdk'])
+        # Block and character devices have no size to map
+        assert not Raw.is_raw('/dev/null')
+
+        raw = Raw.open(paths['image.001'])
+        assert isinstance(raw, Raw)
+        raw.close()
+
+        for name in ['empty.dd', 'disk.vmdk']:
+            handle = Raw.open(paths[name])
+            assert isinstance(handle, Img_Info)
+            assert not isinstance(handle, Raw)
+
+    def test_file_stream(self):
+        fs_object = SimpleNamespace(
+            info=SimpleNamespace(meta=SimpleNamespace(size=len(self.data))),
+            read_random=self.read_direct)
+        stream = FileStream(fs_object)
+
+        assert stream.read(10) == self.data[:10]
+        assert stream.seek(-4, SEEK_END) == len(self.data) - 4
+        assert stream.read(100) == self.data[-4:]
+        assert stream.read(100) == b''
+        assert stream.seek(-10, SEEK_CUR) == len(self.data) - 10
+        assert stream.tell() == len(self.data) - 10
+
+        with self.assertRaises(ValueError):
+            stream.seek(-1)
+
+        buffered = BufferedReader(FileStream(fs_object), 64)
+        assert buffered.read(5) == self.data[:5]
+        buffered.seek(500)
+        assert buffered.read() == self.data[500:]
@@ -0,0 +1,24 @@
+import unittest
+
+from Utils.IoScheduler import IoScheduler
+
+
+class TestMethods(unittest.TestCase):
+    def test_order(self):
+        assert IoScheduler.order(['a', 'b', 'c', 'd'], [30, 10, -1, 20]) == \
+            ['c', 'b', 'd', 'a']
+        assert IoScheduler.order([], []) == []
+
+    def test_batches(self):
+        jobs = ['a', 'b', 'c', 'd', 'e']
+        offsets = [40, 0, 30, 10, 20]
+        sizes = [10, 10, 10, 10, 100]
+
+        # Closed on the number of bytes, a job bigger than the maximum gets
+        # a batch of its own
+        assert IoScheduler.batches(jobs, offsets, sizes, 25, 10) == \
+            [['b', 'd'], ['e'], ['c', 'a']]
+        # Closed on the number of jobs
+        assert IoScheduler.batches(jobs, offsets, sizes, 1000, 2) == \
+            [['b', 'd'], ['e', 'c'], ['a']]
+        assert IoScheduler.batches([], [], [], 25, 10) == []
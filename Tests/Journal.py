@@ -0,0 +1,25 @@
+from Tests.CacheTest import CacheTestCase
+from Utils.Journal import Journal
+
+
+class TestMethods(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.journal = Journal('test', 'files')
+
+    def tearDown(self):
+        self.journal.close()
+
+    def test_journal_results(self):
+        self.journal.add('hashing', [(0, '/a.txt', 'aa'), (1, '/b.txt', 'bb')])
+        self.journal.add('language', [(0, '/a.txt', '100.00% Dutch')])
+
+        reopened = Journal('test', 'files')
+        assert reopened.results('hashing') == {0: ('/a.txt', 'aa'),
+                                               1: ('/b.txt', 'bb')}
+        assert reopened.results('language')[0][1] == '100.00% Dutch'
+        reopened.close()
+
+        self.journal.clear()
+        assert self.journal.results('hashing') == {}
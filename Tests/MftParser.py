@@ -0,0 +1,88 @@
+import unittest
+from struct import pack
+
+from Utils.MftParser import MftParser
+
+FILETIME = MftParser.FILETIME_EPOCH + 1500000000 * 10000000
+
+
+def attribute(attribute_type, content):
+    length = 24 + len(content) + (-len(content) % 8)
+    header = pack('<IIBBHHHIHBB', attribute_type, length, 0, 0, 0, 0, 0,
+                  len(content), 24, 0, 0)
+    return (header + content).ljust(length, b'\x00')
+
+
+def file_name(parent, name, namespace=1):
+    encoded = name.encode('UTF-16-LE')
+    return attribute(0x30, pack('<QQQQQQQIIBB', parent | (1 << 48),
+                                FILETIME, FILETIME, FILETIME, FILETIME,
+                                0, 0, 0, 0, len(name), namespace) + encoded)
+
+
+def record(attributes, directory=False):
+    flags = 0x03 if directory else 0x01
+    body = b''.join(attributes) + pack('<I', 0xFFFFFFFF)
+    header = pack('<4sHHQHHHHII', b'FILE', 48, 3, 0, 1, 1, 56, flags,
+                  56 + len(body), 1024) + pack('<QHHI', 0, 0, 0, 0)
+    data = bytearray((header + pack('<HHH', 7, 0, 0)).ljust(56, b'\x00') +
+                     body)
+    data = data.ljust(1024, b'\x00')
+
+    # Move the last two bytes of every sector to the update sequence array
+    for i in (1, 2):
+        data[48 + i * 2:50 + i * 2] = data[i * 512 - 2:i * 512]
+        data[i * 512 - 2:i * 512] = pack('<H', 7)
+
+    return bytes(data)
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        standard_information = attribute(
+            0x10, pack('<QQQQ', FILETIME, FILETIME + 10000000, FILETIME,
+                       FILETIME))
+
+        mft = [b'\x00' * 1024] * 5
+        mft.append(record([file_name(5, '.')], True))
+        mft.append(record([standard_information, file_name(5, 'Users')],
+                          True))
+        mft.append(record([standard_information,
+                           file_name(6, 'NOTES~1.TXT', 2),
+                           file_name(6, 'Notes.TXT'),
+                           attribute(0x80, b'hello')]))
+        mft.append(record([file_name(42, 'lost.bin')]))
+
+        self.mft = b''.join(mft)
+
+    def test_mft_records(self):
+        assert MftParser.record_size(self.mft[5 * 1024:]) == 1024
+
+        parser = MftParser()
+        parser.parse_block(self.mft, 0, 1024)
+        records = list(parser.records(2))
+
+        assert records[0] == (2, 'Users', '', 'DIR', 1500000000, 1500000000,
+                              1500000001, 0, '/Users', 6)
+        assert records[1][1:4] == ('Notes.TXT', 'txt', 'FILE')
+        assert records[1][7:] == (5, '/Users/Notes.TXT', 7)
+        assert records[2][8] == '/$OrphanFiles/lost.bin'
+        assert len(records) == 3
+
+    def test_mft_time_range(self):
+        # A corrupt or timestomped record with the largest FILETIME
+        stomped = attribute(0x10, pack('<QQQQ', 0x7fffffffffffffff,
+                                       FILETIME, 0x7fffffffffffffff, 0))
+        mft = [b'\x00' * 1024] * 5
+        mft.append(record([file_name(5, '.')], True))
+        mft.append(record([stomped, file_name(5, 'stomped.txt'),
+                           attribute(0x80, b'hello')]))
+
+        parser = MftParser()
+        parser.parse_block(b''.join(mft), 0, 1024)
+
+        assert next(parser.records(2))[4:7] == (0, 0, 1500000000)
+        assert MftParser.convert_time(0) == 0
+        assert MftParser.convert_time(
+            MftParser.FILETIME_EPOCH + MftParser.MAX_TIME * 10000000) == \
+            MftParser.MAX_TIME
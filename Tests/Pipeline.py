@@ -0,0 +1,33 @@
+import unittest
+
+from Utils.Pipeline import Pipeline
+
+
+def square(x):
+    if x == 3:
+        raise ValueError('three')
+
+    return x * x
+
+
+class TestMethods(unittest.TestCase):
+    def test_pipeline_ordered(self):
+        progress = []
+        with Pipeline(2, progress=lambda done, total:
+                      progress.append((done, total))) as pipeline:
+            results = list(pipeline.map(square, range(10), ordered=True,
+                                        chunk_size=3))
+
+        assert [r[0] for r in results] == list(range(10))
+        assert results[2] == (2, 4, None)
+        assert results[3][1] is None and 'three' in results[3][2]
+        assert pipeline.errors == [results[3]]
+        assert progress[-1] == (10, 10)
+
+    def test_pipeline_chunks(self):
+        with Pipeline(2) as pipeline:
+            results = pipeline.map_chunks(square, [[('a', 2)], [('b', 4)]])
+
+            assert sorted(results) == [('a', 4, None), ('b', 16, None)]
+            assert list(pipeline.map(square, [])) == []
+            assert list(pipeline.map(lambda x: x, [1]))[0][1] is None
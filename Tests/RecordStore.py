@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+
+from Utils.RecordStore import RecordStore
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.store = RecordStore([
+            (2, 'Users', '', 'DIR', 0, 0, 0, 56, '/Users', 64),
+            (2, 'a.jpg', 'jpg', 'FILE', 10, 20, 30, 1024, '/Users/a.jpg', 65),
+            (2, 'b.txt', 'txt', 'FILE', 5, 5, 5, 10, '/Users/b.txt', 66),
+            (3, 'c.jpg', 'jpg', 'FILE', 1, 1, 1, 20, '/c.jpg', 67)
+        ])
+
+    def test_record_store_rows(self):
+        assert len(self.store) == 4
+        assert self.store.record(1) == \
+            (2, 'a.jpg', 'jpg', 'FILE', 10, 20, 30, 1024, '/Users/a.jpg', 65)
+
+        row = self.store.row(1)
+        assert row[0] == 'PARTITION 2'
+        assert row[4] == datetime.utcfromtimestamp(10)
+        assert row[8] == '/Users/a.jpg'
+        assert self.store.row(0)[4] == ''
+        # Out of range timestamps are listed without a date
+        assert RecordStore.convert_time(910692730085) == ''
+
+    def test_record_store_select(self):
+        assert self.store.partitions() == [2, 3]
+        assert self.store.select(extensions=['jpg']) == [1, 3]
+        assert self.store.select(partition=2, extensions=['jpg']) == [1]
+        assert self.store.select(f_type='DIR') == [0]
+        assert self.store.select(extensions=['png']) == []
+        assert self.store.order_by('mtime', [1, 2, 3]) == [3, 2, 1]
+        assert self.store.stats()['directories'] == 2
+
+    def test_record_store_kinds(self):
+        assert self.store.get_kind(2) == ''
+
+        self.store.set_kind(2, 'jpeg')
+
+        assert self.store.get_kind(2) == 'jpeg'
+        assert self.store.select(extensions=['png'], kinds=['jpeg']) == [2]
+        assert self.store.select(extensions=['jpg'], kinds=['jpeg']) == \
+            [1, 2, 3]
+        assert self.store.select(partition=3, kinds=['jpeg']) == []
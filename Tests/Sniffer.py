@@ -0,0 +1,49 @@
+import unittest
+from bz2 import compress as bz2_compress
+from gzip import compress as gzip_compress
+from io import BytesIO
+from lzma import compress as lzma_compress
+from tarfile import TarFile, TarInfo
+from zipfile import ZipFile
+
+from Utils.HashEngine import HashEngine
+from Utils.Sniffer import HeadSniffer, Sniffer
+
+
+class TestMethods(unittest.TestCase):
+    def test_detect_archives(self):
+        archive = BytesIO()
+        with ZipFile(archive, 'w') as zf:
+            zf.writestr('a.txt', b'a')
+
+        tar = BytesIO()
+        with TarFile(fileobj=tar, mode='w') as tf:
+            tf.addfile(TarInfo('a.txt'))
+
+        assert Sniffer.detect(archive.getvalue()[:512]) == 'zip'
+        assert Sniffer.detect(tar.getvalue()[:512]) == 'tar'
+        assert Sniffer.detect(gzip_compress(b'a')) == 'gz'
+        assert Sniffer.detect(bz2_compress(b'a')) == 'bz2'
+        assert Sniffer.detect(lzma_compress(b'a')) == 'xz'
+
+    def test_detect_photos(self):
+        assert Sniffer.detect(b'\xff\xd8\xff\xe0\x00\x10JFIF') == 'jpeg'
+        assert Sniffer.detect(b'\x89PNG\r\n\x1a\n\x00\x00') == 'png'
+
+    def test_detect_text(self):
+        assert Sniffer.detect('Dit is een tekst.\r\n'.encode()) == 'text'
+        # A character that was cut off at the end is still text
+        assert Sniffer.detect('tekst é'.encode()[:-1]) == 'text'
+        assert Sniffer.detect('tekst'.encode('utf-16')) == 'text'
+        assert Sniffer.detect(b'\x00\x01\x02\x03') == ''
+        assert Sniffer.detect(b'') == ''
+
+    def test_head_sniffer(self):
+        engine = HashEngine([], {'kind': HeadSniffer})
+        data = b'\x00' * 257 + b'ustar' + b'\x00' * 1000
+
+        # The head is spread over more than one block
+        engine.BLOCK_SIZE = 100
+        assert engine.read(lambda offset, size: data[offset:offset + size],
+                           len(data)) == {'kind': 'tar'}
+        assert engine.read_stream(BytesIO(b'tekst')) == {'kind': 'text'}
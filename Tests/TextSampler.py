@@ -0,0 +1,49 @@
+import unittest
+from io import BytesIO
+
+from Utils.TextSampler import TextSampler
+
+
+class TestMethods(unittest.TestCase):
+    def test_offsets(self):
+        sampler = TextSampler('windows', window_size=10, windows=4)
+
+        assert sampler.offsets(25) == [(0, 25)]
+        assert sampler.offsets(1000) == [(0, 10), (330, 10), (660, 10),
+                                         (990, 10)]
+        assert TextSampler('prefix', read_size=100).offsets(1000) == \
+            [(0, 100)]
+
+    def test_encoding(self):
+        assert TextSampler.encoding('tekst é'.encode('utf-8')[:-1]) == \
+            'utf-8'
+        assert TextSampler.encoding('tekst'.encode('utf-16')) == \
+            'utf-16-le'
+        assert TextSampler.encoding(b'\xff\xfe\x00\xdc\x41\x00') is None
+
+    def test_sample(self):
+        stream = BytesIO((b'a' * 100 + b'b' * 100) * 5)
+        sampler = TextSampler('windows', window_size=10, windows=8,
+                              tolerance=0.01)
+        texts = []
+
+        def detect(text):
+            texts.append(text)
+            return {'en': 0.9, 'nl': 0.1}
+
+        assert sampler.sample(stream, detect) == {'en': 0.9, 'nl': 0.1}
+        # Stops at the second window because the result didn't change
+        assert len(texts) == 2
+
+    def test_sample_utf16(self):
+        stream = BytesIO(('woord ' * 1000).encode('utf-16'))
+        sampler = TextSampler('windows', window_size=101, windows=3)
+        texts = []
+
+        def detect(text):
+            texts.append(text)
+            return {}
+
+        assert sampler.sample(stream, detect) == {}
+        assert len(texts) == 3
+        assert all(set(text) <= set('woord ﻿') for text in texts)
@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from Utils.Timeline import Timeline
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name).joinpath('files.timeline')
+
+        self.files = [
+            (0, {'b': datetime(2018, 1, 1), 'c': datetime(2018, 3, 1),
+                 'm': datetime(2018, 3, 1)}),
+            (1, {'b': datetime(1965, 5, 5), 'c': '', 'm': ''}),
+            (2, {'m': datetime(2018, 2, 1, 12, 30)}),
+            (3, {'b': '', 'c': '', 'm': ''})
+        ]
+
+        run_size = Timeline.RUN_SIZE
+        Timeline.RUN_SIZE = 2
+        self.count = Timeline.build(self.files, self.path)
+        Timeline.RUN_SIZE = run_size
+
+        self.timeline = Timeline(self.path)
+
+    def tearDown(self):
+        self.timeline.close()
+        self.tmp.cleanup()
+
+    def test_timeline(self):
+        assert self.count == 5
+        assert len(self.timeline) == 5
+        assert list(self.timeline) == [
+            (datetime(1965, 5, 5), 1, '...b'),
+            (datetime(2018, 1, 1), 0, '...b'),
+            (datetime(2018, 2, 1, 12, 30), 2, 'm...'),
+            (datetime(2018, 3, 1), 0, 'm.c.'),
+            (None, 3, '....')
+        ]
+
+    def test_timeline_range(self):
+        assert [e[1] for e in self.timeline.range(
+            datetime(2018, 1, 1), datetime(2018, 2, 1, 12, 30))] == [0, 2]
+        assert [e[1] for e in self.timeline.range(
+            start=datetime(2018, 2, 1))] == [2, 0]
+        assert [e[1] for e in self.timeline.range(
+            end=datetime(2017, 12, 31))] == [1]
+        assert list(self.timeline.range(datetime(2019, 1, 1))) == []
+        assert [e[1] for e in self.timeline.range()][-1] == 3
+
+    def test_body_line(self):
+        assert Timeline.body_line('/a|b.txt', 12, 'r/r---------', 10,
+                                  self.files[0][1]) == \
+            '0|/a\\|b.txt|12|r/r---------|0|0|10|0|1519862400|' \
+            '1519862400|1514764800\n'
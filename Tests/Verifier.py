@@ -0,0 +1,33 @@
+import unittest
+from hashlib import md5, sha1
+
+from Utils.Verifier import Verifier
+
+
+class TestMethods(unittest.TestCase):
+    def setUp(self):
+        self.media = bytes(range(256)) * 40000
+        self.stored = {
+            'MD5': md5(self.media).hexdigest().upper(),
+            'SHA1': ''
+        }
+
+    def read(self, offset, size):
+        return self.media[offset:offset + size]
+
+    def test_verifier_run(self):
+        progress = []
+        verifier = Verifier(self.read, len(self.media), progress.append)
+        computed = verifier.run()
+
+        assert computed['md5'] == md5(self.media).hexdigest()
+        assert computed['sha1'] == sha1(self.media).hexdigest()
+        assert progress[-1]['done'] == len(self.media)
+        assert Verifier.compare(computed, self.stored) == \
+            {'md5': True, 'sha1': None}
+
+    def test_verifier_short_media(self):
+        verifier = Verifier(self.read, len(self.media) + 1)
+
+        with self.assertRaises(IOError):
+            verifier.run()
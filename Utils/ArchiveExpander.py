@@ -0,0 +1,397 @@
+from bz2 import BZ2File
+from datetime import datetime
+from gzip import GzipFile
+from lzma import LZMAError, LZMAFile
+from shutil import COPY_BUFSIZE
+from tarfile import TarError, open as tar_open
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Tuple, \
+    Union
+from zipfile import BadZipFile, ZipFile
+from zlib import error as zlib_error
+
+from Utils.HashEngine import EngineReader, HashEngine
+from Utils.Logging.Logging import Logging
+from Utils.Sniffer import Sniffer
+
+# Name, extension, type, modify date, size, path, detected type and the
+# results of the engine, no results for a directory
+Member = Tuple[str, str, str, Union[str, datetime], Union[str, int], str,
+               str, Dict[str, Any]]
+
+
+class ArchiveLimit(Exception):
+    pass
+
+
+class HeadReader:
+    def __init__(self, head: bytes, stream: BinaryIO) -> None:
+        """
+        Put bytes that were already read back in front of a stream that
+        can't seek
+
+        :param head: Bytes that were read from the stream
+        :param stream: Rest of the stream
+        """
+        self.head = head
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read from the head first and then from the stream
+
+        :param size: Number of bytes to read, everything when negative
+
+        :return: Bytes that were read
+        """
+        if len(self.head) == 0:
+            return self.stream.read(size)
+
+        if size < 0:
+            data, self.head = self.head + self.stream.read(), b''
+        else:
+            data, self.head = self.head[:size], self.head[size:]
+
+        return data
+
+
+class ArchiveExpander:
+    FORMATS = {
+        'zip': 'zip',
+        'tar': 'tar',
+        'tgz': 'tar',
+        'tbz2': 'tar',
+        'txz': 'tar',
+        'gz': 'gz',
+        'bz2': 'bz2',
+        'xz': 'xz'
+    }
+    COMPRESSORS = {
+        'gz': lambda f: GzipFile(fileobj=f, mode='rb'),
+        'bz2': BZ2File,
+        'xz': LZMAFile
+    }
+    ERRORS = (BadZipFile, TarError, EOFError, OSError, LZMAError,
+              zlib_error)
+    # Encrypted members and unsupported compression methods
+    MEMBER_ERRORS = (BadZipFile, EOFError, zlib_error, RuntimeError,
+                     NotImplementedError)
+    MAX_DEPTH = 5
+    MAX_BYTES = 4 * 1024 * 1024 * 1024
+    SPOOL_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, engine: Callable[[str, str], HashEngine],
+                 max_depth: int = None, max_bytes: int = None) -> None:
+        """
+        Expand archives in archives, every member is listed and archives
+        inside the archive are expanded as well until max_depth is reached.
+        Members are decompressed in blocks that go to the engine and to the
+        parser of a nested archive in the same pass, so memory use doesn't
+        depend on the size of a member. Expanding stops when max_bytes were
+        decompressed so a zip bomb can't fill the disk
+
+        :param engine: Creates the engine for a file member by its
+                       extension and detected type, for example to hash it
+        :param max_depth: Number of nested archives to expand, MAX_DEPTH when
+                          None
+        :param max_bytes: Number of decompressed bytes to expand for a single
+                          archive, MAX_BYTES when None
+        """
+        self.logger = Logging(self.__class__.__name__).logger
+        self.engine = engine
+        self.max_depth = max_depth or self.MAX_DEPTH
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.expanded = 0
+
+    @staticmethod
+    def archive_format(ext: str, kind: str) -> Union[str, None]:
+        """
+        Get the format of an archive, the detected type wins over the
+        extension so a renamed archive is still expanded
+
+        :param ext: Extension of the file
+        :param kind: Type of the file that was detected from its content
+
+        :return: 'zip', 'tar', 'gz', 'bz2', 'xz' or None when the file isn't
+                 an archive
+        """
+        if kind in ArchiveExpander.FORMATS.values():
+            return kind
+
+        return ArchiveExpander.FORMATS.get(ext)
+
+    def expand(self, stream: BinaryIO, name: str, path: str,
+               archive_format: str = None) -> List[Member]:
+        """
+        Expand an archive and all archives inside it
+
+        :param stream: Seekable file like object of the archive
+        :param name: Name of the archive
+        :param path: Path to the archive
+        :param archive_format: Format of the archive, based on the extension
+                               when None
+
+        :return: Members of the archive
+        """
+        self.expanded = 0
+        members = []
+
+        try:
+            for member in self.members(stream, name, path, 1,
+                                       archive_format):
+                members.append(member)
+        except ArchiveLimit as e:
+            self.logger.warning('Stopped expanding {}: {}'.format(path, e))
+
+        return members
+
+    def members(self, stream: BinaryIO, name: str, path: str, depth: int,
+                archive_format: str = None) -> Iterator[Member]:
+        """
+        List the members of a single archive, a broken archive yields the
+        members that could be read
+
+        :param stream: File like object of the archive, only a zip file has
+                       to be seekable
+        :param name: Name of the archive
+        :param path: Path to the archive
+        :param depth: Nesting depth of the archive, 1 for an archive that
+                      isn't inside another archive
+        :param archive_format: Format of the archive, based on the extension
+                               when None
+
+        :return: Members of the archive and the archives inside it
+        """
+        archive_format = archive_format or \
+            self.FORMATS.get(name.split('.')[-1].lower())
+
+        try:
+            if archive_format == 'zip':
+                yield from self.zip_members(stream, path, depth)
+            elif archive_format == 'tar':
+                yield from self.tar_members(stream, path, depth)
+            elif archive_format is not None:
+                yield from self.compressed_member(stream, archive_format,
+                                                  name, path, depth)
+        except self.ERRORS as e:
+            self.logger.warning('Could not expand {}: {}'.format(path, e))
+
+    def zip_members(self, stream: BinaryIO, path: str, depth: int) -> \
+            Iterator[Member]:
+        """
+        List the members of a zip file
+
+        :param stream: Seekable file like object of the zip file
+        :param path: Path to the zip file
+        :param depth: Nesting depth of the zip file
+
+        :return: Members of the zip file
+        """
+        with ZipFile(stream) as zf:
+            for file_info in zf.infolist():
+                filename = file_info.filename.split('/')[-1] \
+                    if '.' in file_info.filename else \
+                    file_info.filename.replace('/', '')
+
+                extension = file_info.filename.split('.')[-1].lower() \
+                    if '.' in file_info.filename else ''
+
+                file_path = '{}/{}'.format(path, file_info.filename)
+
+                if file_info.compress_size == 0 or file_info.file_size == 0:
+                    yield filename, extension, 'DIR', \
+                        datetime(*file_info.date_time), '', file_path, '', {}
+                    continue
+
+                # The declared size is checked before anything is
+                # decompressed
+                self.reserve(file_info.file_size, 0)
+
+                try:
+                    with zf.open(file_info) as source:
+                        yield from self.file_member(
+                            source, filename, extension,
+                            datetime(*file_info.date_time),
+                            '{} / {}'.format(file_info.compress_size,
+                                             file_info.file_size),
+                            file_path, depth)
+                except self.MEMBER_ERRORS as e:
+                    self.logger.warning('Could not extract {}: {}'.format(
+                        file_path, e))
+
+    def tar_members(self, stream: BinaryIO, path: str, depth: int) -> \
+            Iterator[Member]:
+        """
+        List the members of a tarball, the tarball is read as a single
+        stream and compressed tarballs are decompressed on the fly
+
+        :param stream: File like object of the tarball
+        :param path: Path to the tarball
+        :param depth: Nesting depth of the tarball
+
+        :return: Members of the tarball
+        """
+        with tar_open(fileobj=stream, mode='r|*') as tf:
+            for member in tf:
+                if '._' in member.name or not member.isfile():
+                    continue
+
+                filename = member.name.split('/')[-1] \
+                    if '.' in member.name else member.name.replace('/', '')
+
+                extension = member.name.split('.')[-1].lower() \
+                    if '.' in member.name else ''
+
+                self.reserve(member.size, 0)
+
+                with tf.extractfile(member) as source:
+                    yield from self.file_member(
+                        source, filename, extension, '', member.size,
+                        '{}/{}'.format(path, member.name), depth)
+
+    def compressed_member(self, stream: BinaryIO, archive_format: str,
+                          name: str, path: str, depth: int) -> \
+            Iterator[Member]:
+        """
+        List the single file in a gz, bz2 or xz file
+
+        :param stream: File like object of the compressed file
+        :param archive_format: 'gz', 'bz2' or 'xz'
+        :param name: Name of the compressed file
+        :param path: Path to the compressed file
+        :param depth: Nesting depth of the compressed file
+
+        :return: The compressed file
+        """
+        # A renamed compressed file keeps its name
+        filename = name[:-len(archive_format) - 1] \
+            if name.lower().endswith('.' + archive_format) else name
+
+        extension = filename.split('.')[-1].lower() if '.' in filename else ''
+
+        with self.COMPRESSORS[archive_format](stream) as source:
+            yield from self.file_member(
+                source, filename, extension, '', None,
+                '{}/{}'.format(path, filename), depth)
+
+    def file_member(self, source: BinaryIO, filename: str, extension: str,
+                    modify: Union[str, datetime], size: Union[str, int, None],
+                    path: str, depth: int) -> Iterator[Member]:
+        """
+        Describe a file in an archive, the file is expanded as well when it
+        is an archive itself. The results of a nested archive are only known
+        after its members were read, so it comes before them once they are
+        all done
+
+        :param source: Decompressed content of the file
+        :param filename: Name of the file
+        :param extension: Extension of the file
+        :param modify: Modify date of the file
+        :param size: Size of the file, the number of decompressed bytes when
+                     None
+        :param path: Path to the file
+        :param depth: Nesting depth of the archive the file is in
+
+        :return: The file and its members
+        """
+        head = self.read_head(source)
+        kind = Sniffer.detect(head)
+        archive_format = self.archive_format(extension, kind)
+
+        reader = EngineReader(HeadReader(head, source),
+                              self.engine(extension, kind),
+                              lambda used: self.reserve(used, used))
+        members = []
+
+        if archive_format is not None:
+            if depth < self.max_depth:
+                members = list(self.nested(reader, filename, path, depth + 1,
+                                           archive_format))
+            else:
+                self.logger.warning('Not expanding {}: more than {} nested '
+                                    'archives'.format(path, self.max_depth))
+
+        reader.drain()
+
+        yield filename, extension, 'FILE', modify, \
+            reader.size if size is None else size, path, kind, \
+            reader.results()
+        yield from members
+
+    @staticmethod
+    def read_head(source: BinaryIO) -> bytes:
+        """
+        Read the first bytes of a file to detect its type
+
+        :param source: Decompressed content of the file
+
+        :return: First SNIFF_SIZE bytes, less for a smaller file
+        """
+        head = b''
+
+        while len(head) < Sniffer.SNIFF_SIZE:
+            data = source.read(Sniffer.SNIFF_SIZE - len(head))
+            if not data:
+                break
+
+            head += data
+
+        return head
+
+    def nested(self, reader: EngineReader, name: str, path: str,
+               depth: int, archive_format: str) -> Iterator[Member]:
+        """
+        List the members of an archive inside an archive, a zip file is
+        copied to a temporary file because its directory is at the end
+
+        :param reader: Decompressed content of the archive
+        :param name: Name of the archive
+        :param path: Path to the archive
+        :param depth: Nesting depth of the archive
+        :param archive_format: Format of the archive
+
+        :return: Members of the archive
+        """
+        if archive_format != 'zip':
+            yield from self.members(reader, name, path, depth, archive_format)
+            return
+
+        with self.spool(reader) as content:
+            content.seek(0)
+            yield from self.members(content, name, path, depth,
+                                    archive_format)
+
+    def spool(self, source: BinaryIO) -> SpooledTemporaryFile:
+        """
+        Copy a decompressed file to a temporary file that stays in memory
+        while it is small
+
+        :param source: Decompressed content of the file
+
+        :return: Seekable copy of the file, the position is at the end
+        """
+        content = SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+
+        try:
+            for data in iter(lambda: source.read(COPY_BUFSIZE), b''):
+                content.write(data)
+        except BaseException:
+            content.close()
+            raise
+
+        return content
+
+    def reserve(self, size: int, used: int) -> None:
+        """
+        Check if a number of bytes can be expanded
+
+        :param size: Number of bytes that are going to be expanded
+        :param used: Number of bytes that were expanded
+
+        :return: None
+        """
+        if self.expanded + size > self.max_bytes:
+            raise ArchiveLimit('more than {} bytes expanded'.format(
+                self.max_bytes))
+
+        self.expanded += used
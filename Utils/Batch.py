@@ -0,0 +1,196 @@
+from multiprocessing import Process, cpu_count
+from multiprocessing.connection import wait
+from os import walk
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from Files.Files import Files
+from IP.capreader import PcapReader
+from Photos.Photo import Photos
+from Utils.ImageHandler import ImageHandler
+from Utils.Logging.Logging import Logging
+from Utils.Store.Actions.ImageStoreActions import ImageStoreActions
+from Utils.Store.Image import ImageStore
+from Utils.XlsxWriter import XlsxWriter
+
+
+class Batch:
+    RAW_EXTENSIONS = ['dd', 'raw', 'img', '001']
+    PCAP_EXTENSIONS = ['pcap', 'pcapng']
+    CONCURRENT_JOBS = 4
+    WORKER_BUDGET = cpu_count()
+
+    def __init__(self, folder: str, options: Dict[str, bool]) -> None:
+        """
+        Run the modules over multiple images at the same time, the worker
+        processes of all jobs together stay within the worker budget. The
+        images and PCAPs are searched in the case folder and its sub folders
+
+        :param folder: Case folder
+        :param options: The 'PA', 'FA', 'FB', 'FC' and 'IB' menu options
+        """
+        self.logger = Logging(self.__class__.__name__).logger
+        self.images = self.find_images(folder)
+        self.pcaps = self.find_pcaps(folder)
+        self.options = options
+
+    @staticmethod
+    def is_image(file_name: str) -> bool:
+        """
+        Check if a file is the first segment of an image based on the
+        extension
+
+        :param file_name: Name of the file
+
+        :return: Whether the file is an image or not
+        """
+        ext = Path(file_name).suffix.lower()[1:]
+
+        return not file_name.startswith('._') and \
+            (ImageHandler.encase_image(ext) or ext in Batch.RAW_EXTENSIONS)
+
+    @staticmethod
+    def find_images(folder: str) -> List[str]:
+        """
+        Find all images in a case folder and its sub folders
+
+        :param folder: Case folder
+
+        :return: Paths to the first segment of every image
+        """
+        images = []
+
+        for root, _, file_names in walk(folder):
+            images += [str(Path(root).joinpath(file_name))
+                       for file_name in file_names
+                       if Batch.is_image(file_name)]
+
+        return sorted(images)
+
+    @staticmethod
+    def find_pcaps(folder: str) -> Dict[str, List[str]]:
+        """
+        Find all PCAPs in a case folder and its sub folders
+
+        :param folder: Case folder
+
+        :return: PCAPs by folder
+        """
+        pcaps = {}
+
+        for root, _, file_names in walk(folder):
+            files = sorted(str(Path(root).joinpath(file_name))
+                           for file_name in file_names
+                           if not file_name.startswith('._') and
+                           Path(file_name).suffix.lower()[1:] in
+                           Batch.PCAP_EXTENSIONS)
+
+            if len(files) > 0:
+                pcaps[root] = files
+
+        return {folder: pcaps[folder] for folder in sorted(pcaps)}
+
+    def jobs(self) -> List[Tuple[str, str, List[str]]]:
+        """
+        Get a job for every module and image or PCAP folder
+
+        :return: Module, name of the workbook and the image or PCAPs
+        """
+        jobs = []
+
+        for image in self.images:
+            name = Path(image).name.replace('.', '-')
+
+            if self.options.get('FA') or self.options.get('FB') or \
+                    self.options.get('FC'):
+                jobs.append(('files', name, [image]))
+
+            if self.options.get('PA'):
+                jobs.append(('photos', name, [image]))
+
+        if self.options.get('IB'):
+            for folder, files in self.pcaps.items():
+                jobs.append(('ips', Path(folder).name, files))
+
+        return jobs
+
+    def run(self) -> List[Tuple[str, str]]:
+        """
+        Run all jobs, at most CONCURRENT_JOBS jobs run at the same time
+
+        :return: Module and name of every job that failed
+        """
+        jobs = self.jobs()
+        concurrent = max(1, min(self.CONCURRENT_JOBS, len(jobs)))
+        workers = max(1, self.WORKER_BUDGET // concurrent)
+        running = {}
+        failed = []
+
+        self.logger.info('Running {} jobs for {} images, {} at a time with '
+                         '{} workers each'.format(len(jobs), len(self.images),
+                                                  concurrent, workers))
+
+        def collect(processes: List[Process]) -> None:
+            for process in processes:
+                process.join()
+                job = running.pop(process)
+
+                if process.exitcode != 0:
+                    self.logger.error('Job {} for {} failed with exit code '
+                                      '{}'.format(job[0], job[1],
+                                                  process.exitcode))
+                    failed.append((job[0], job[1]))
+
+        for job in jobs:
+            if len(running) == concurrent:
+                finished = wait([p.sentinel for p in running])
+                collect([p for p in running if p.sentinel in finished])
+
+            process = Process(target=self.run_job,
+                              args=(job, self.options, workers))
+            process.start()
+            running[process] = job
+
+        collect(list(running))
+
+        return failed
+
+    @staticmethod
+    def run_job(job: Tuple[str, str, List[str]], options: Dict[str, bool],
+                workers: int) -> None:
+        """
+        Run a single job in its own process
+
+        :param job: Module, name of the workbook and the image or PCAPs
+        :param options: The menu options
+        :param workers: Number of worker processes the job may use
+
+        :return: None
+        """
+        module, name, paths = job
+
+        XlsxWriter.IMAGE_NAME = name
+        ImageHandler.WALK_PROCESSES = workers
+        Files.PROCESSES = workers
+        PcapReader.PROCESSES = workers
+        Photos.PROCESSES = workers
+
+        if module == 'ips':
+            ip = PcapReader(paths)
+            ip.run()
+            ip.results()
+            return
+
+        ImageStore().image_store.dispatch(
+            ImageStoreActions.set_image(paths[0]))
+
+        if module == 'files':
+            files = Files()
+            files.run(options.get('FA', False),
+                      options.get('FB', False),
+                      options.get('FC', False))
+            files.results()
+        else:
+            photos = Photos()
+            photos.run()
+            photos.results()
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+
+class Cache:
+    @staticmethod
+    def get_cache_folder() -> Path:
+        """
+        Get the cache folder shared by the catalogs, journals, hash cache,
+        hash sets and timelines, the folder is made when it doesn't exist
+
+        :return: Path to the cache folder
+        """
+        # Make cache folder
+        cache_path = Path(__file__).parent.parent.joinpath('Cache')
+        Path.mkdir(Path(cache_path), exist_ok=True)
+
+        return cache_path
@@ -0,0 +1,322 @@
+from pathlib import Path
+from re import search, I
+from sqlite3 import connect
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+try:
+    from fcntl import LOCK_EX, LOCK_UN, flock
+except ImportError:
+    # Windows
+    flock = None
+    from msvcrt import LK_LOCK, LK_UNLCK, locking
+
+from Utils.Cache import Cache
+
+Record = Tuple[int, str, str, str, int, int, int, int, str, int]
+
+
+class Catalog:
+    SCHEMA_VERSION = 1
+    BUSY_TIMEOUT = 3600
+
+    def __init__(self, identity: str) -> None:
+        self.identity = identity
+        self.path = self.get_catalog_path(identity)
+
+        self.connection = connect(str(self.path),
+                                  timeout=self.BUSY_TIMEOUT,
+                                  isolation_level=None)
+        self.connection.create_function('regexp', 2, self.regexp)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.lock_file = None
+
+        self.create_tables()
+
+    @staticmethod
+    def get_catalog_path(identity: str) -> Path:
+        """
+        Get the path of the catalog database of an image
+
+        :param identity: Identity of the image
+
+        :return: Path to the catalog database
+        """
+        cache_path = Cache.get_cache_folder()
+
+        return Path(cache_path.joinpath('{}.sqlite'.format(identity)))
+
+    @staticmethod
+    def regexp(pattern: str, value: str) -> bool:
+        """
+        Case insensitive regex match used by the REGEXP operator
+
+        :param pattern: Regex to search for
+        :param value: Value to search in
+
+        :return: Whether the value matches the regex or not
+        """
+        return value is not None and search(pattern, value, I) is not None
+
+    def create_tables(self) -> None:
+        """
+        Create the catalog tables and indexes, a catalog written by an older
+        schema is dropped
+
+        :return: None
+        """
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta ('
+                                'key TEXT PRIMARY KEY, value TEXT)')
+
+        if self.get_meta('schema') != str(self.SCHEMA_VERSION):
+            self.connection.execute('DROP TABLE IF EXISTS files')
+            self.connection.execute('DROP TABLE IF EXISTS kinds')
+            self.connection.execute('DELETE FROM meta')
+            self.set_meta('schema', str(self.SCHEMA_VERSION))
+
+        self.connection.execute('CREATE TABLE IF NOT EXISTS files ('
+                                'id INTEGER PRIMARY KEY, '
+                                'partition INTEGER, '
+                                'name TEXT, '
+                                'ext TEXT, '
+                                'type TEXT, '
+                                'crtime INTEGER, '
+                                'ctime INTEGER, '
+                                'mtime INTEGER, '
+                                'size INTEGER, '
+                                'path TEXT, '
+                                'inode INTEGER)')
+
+        for column in ['path', 'ext', 'partition', 'inode']:
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS files_{0} ON files ({0})'.format(
+                    column))
+
+        # Types detected from the content of the files, so the files are
+        # only sniffed once for every module and run
+        self.connection.execute('CREATE TABLE IF NOT EXISTS kinds ('
+                                'partition INTEGER, '
+                                'inode INTEGER, '
+                                'kind TEXT, '
+                                'PRIMARY KEY (partition, inode)) '
+                                'WITHOUT ROWID')
+
+    def get_meta(self, key: str) -> Union[str, None]:
+        """
+        Get a value from the meta table
+
+        :param key: Key of the value
+
+        :return: The value or None when the key doesn't exist
+        """
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?',
+                                      (key,)).fetchone()
+
+        return None if row is None else row[0]
+
+    def set_meta(self, key: str, value: str) -> None:
+        """
+        Set a value in the meta table
+
+        :param key: Key of the value
+        :param value: Value to save
+
+        :return: None
+        """
+        self.connection.execute('INSERT OR REPLACE INTO meta (key, value) '
+                                'VALUES (?, ?)', (key, value))
+
+    def is_complete(self) -> bool:
+        """
+        Check if a full walk of the image has been written to the catalog
+
+        :return: Whether the catalog is complete or not
+        """
+        return self.get_meta('complete') == '1'
+
+    def lock(self) -> None:
+        """
+        Take the walk lock, waits without a deadline until another process
+        walking the same image is done. The lock is an operating system lock
+        on a separate file so the catalog itself can be committed while the
+        walk is running
+
+        :return: None
+        """
+        if self.lock_file is not None:
+            return
+
+        lock_file = open(str(self.path.with_suffix('.lock')), 'a+b')
+
+        if flock is not None:
+            flock(lock_file.fileno(), LOCK_EX)
+        else:
+            # msvcrt gives up after 10 seconds, so it is tried again until
+            # the lock is released
+            while True:
+                try:
+                    lock_file.seek(0)
+                    locking(lock_file.fileno(), LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+
+        self.lock_file = lock_file
+
+    def unlock(self) -> None:
+        """
+        Release the walk lock
+
+        :return: None
+        """
+        if self.lock_file is None:
+            return
+
+        if flock is not None:
+            flock(self.lock_file.fileno(), LOCK_UN)
+        else:
+            self.lock_file.seek(0)
+            locking(self.lock_file.fileno(), LK_UNLCK, 1)
+
+        self.lock_file.close()
+        self.lock_file = None
+
+    def checkpoint(self) -> int:
+        """
+        Get the number of walk units that have been written to the catalog
+        by an earlier, interrupted walk
+
+        :return: Number of walked units
+        """
+        return int(self.get_meta('checkpoint') or 0)
+
+    def set_checkpoint(self, units: int) -> None:
+        """
+        Save the number of walk units that have been written to the catalog,
+        must be committed in the same transaction as the records
+
+        :param units: Number of walked units
+
+        :return: None
+        """
+        self.set_meta('checkpoint', str(units))
+
+    def begin(self) -> None:
+        """
+        Start a write transaction, waits until other processes writing to
+        the same catalog are done
+
+        :return: None
+        """
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def commit(self) -> None:
+        """
+        Commit the current transaction
+
+        :return: None
+        """
+        self.connection.execute('COMMIT')
+
+    def rollback(self) -> None:
+        """
+        Rollback the current transaction
+
+        :return: None
+        """
+        self.connection.execute('ROLLBACK')
+
+    def clear(self) -> None:
+        """
+        Remove all records from the catalog
+
+        :return: None
+        """
+        self.connection.execute('DELETE FROM files')
+        self.connection.execute('DELETE FROM kinds')
+        self.set_meta('complete', '0')
+        self.set_checkpoint(0)
+
+    def add(self, records: Iterable[Record]) -> None:
+        """
+        Add records to the catalog
+
+        :param records: Records produced by the walker
+
+        :return: None
+        """
+        self.connection.executemany('INSERT INTO files (partition, name, ext, '
+                                    'type, crtime, ctime, mtime, size, path, '
+                                    'inode) VALUES (?, ?, ?, ?, ?, ?, ?, ?, '
+                                    '?, ?)', records)
+
+    def kinds(self) -> Dict[Tuple[int, int], str]:
+        """
+        Get the types of the files that were detected from their content
+
+        :return: Detected type by partition address and meta address, an
+                 empty string for a file with an unknown type
+        """
+        return {row[:2]: row[2] for row in self.connection.execute(
+            'SELECT partition, inode, kind FROM kinds')}
+
+    def add_kinds(self, kinds: Iterable[Tuple[int, int, str]]) -> None:
+        """
+        Save the types of files that were detected from their content
+
+        :param kinds: Partition address, meta address and detected type of
+                      every file
+
+        :return: None
+        """
+        self.connection.executemany('INSERT OR REPLACE INTO kinds (partition, '
+                                    'inode, kind) VALUES (?, ?, ?)', kinds)
+
+    def mark_complete(self) -> None:
+        """
+        Mark the catalog as a complete walk of the image
+
+        :return: None
+        """
+        self.set_meta('complete', '1')
+
+    def partitions(self) -> List[int]:
+        """
+        Get all partitions in the catalog
+
+        :return: Partition addresses in walk order
+        """
+        return [row[0] for row in self.connection.execute(
+            'SELECT partition FROM files GROUP BY partition ORDER BY MIN(id)')]
+
+    def records(self, partition: int = None, search_str: str = None) -> \
+            Iterator[Record]:
+        """
+        Get the records in walk order, the records are fetched while iterating
+
+        :param partition: Partition address, all partitions when None
+        :param search_str: Search for a specific regex match on the filename
+
+        :return: Records in the catalog
+        """
+        query = 'SELECT partition, name, ext, type, crtime, ctime, mtime, ' \
+                'size, path, inode FROM files WHERE 1'
+        parameters = []
+
+        if partition is not None:
+            query += ' AND partition = ?'
+            parameters.append(partition)
+
+        if search_str is not None:
+            query += ' AND name REGEXP ?'
+            parameters.append(search_str)
+
+        return self.connection.execute(query + ' ORDER BY id', parameters)
+
+    def close(self) -> None:
+        """
+        Close the catalog database
+
+        :return: None
+        """
+        self.unlock()
+        self.connection.close()
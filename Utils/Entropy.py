@@ -0,0 +1,60 @@
+import numpy
+
+from Utils.HashEngine import Consumer
+
+
+class Entropy(Consumer):
+    # Bits per byte, encrypted and compressed data is close to 8
+    THRESHOLD = 7.5
+    SAMPLE_SIZE = 64 * 1024
+
+    def __init__(self, sample_size: int = None) -> None:
+        """
+        Count the bytes of a file to get its Shannon entropy, every block is
+        counted at once instead of byte by byte. Counting is slower than
+        hashing, so only the start of every block is counted, which is
+        enough to tell random data from other data
+
+        :param sample_size: Number of bytes to count of every block,
+                            SAMPLE_SIZE when None
+        """
+        self.sample_size = sample_size or self.SAMPLE_SIZE
+        self.counts = numpy.zeros(256, dtype=numpy.int64)
+
+    def update(self, data: bytes) -> None:
+        """
+        Count the bytes of the start of the next block of a file
+
+        :param data: Block of the file
+
+        :return: None
+        """
+        self.counts += numpy.bincount(
+            numpy.frombuffer(data, numpy.uint8,
+                             min(len(data), self.sample_size)),
+            minlength=256)
+
+    def result(self) -> float:
+        """
+        Get the Shannon entropy of the file
+
+        :return: Entropy in bits per byte, 0 for an empty file
+        """
+        total = self.counts.sum()
+        if total == 0:
+            return 0.0
+
+        probabilities = self.counts[self.counts > 0] / total
+
+        return float(-(probabilities * numpy.log2(probabilities)).sum())
+
+    @staticmethod
+    def is_high(entropy: float) -> bool:
+        """
+        Check if an entropy is that of encrypted or compressed data
+
+        :param entropy: Entropy in bits per byte
+
+        :return: Whether the entropy is high or not
+        """
+        return entropy >= Entropy.THRESHOLD
@@ -0,0 +1,103 @@
+from heapq import merge
+from mmap import mmap
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import BinaryIO, Iterable, Iterator
+
+
+class Records:
+    def __init__(self, data: mmap, record_size: int) -> None:
+        """
+        Sequence view over the fixed size records in a memory map, makes
+        bisect work on the map without copying it
+
+        :param data: Memory map with the records
+        :param record_size: Size of a single record in bytes
+        """
+        self.data = data
+        self.record_size = record_size
+
+    def __len__(self) -> int:
+        return len(self.data) // self.record_size
+
+    def __getitem__(self, index: int) -> bytes:
+        offset = index * self.record_size
+        return self.data[offset:offset + self.record_size]
+
+
+class ExternalSort:
+    RUN_SIZE = 1000000
+
+    @staticmethod
+    def read_run(f: BinaryIO, record_size: int) -> Iterator[bytes]:
+        """
+        Read the records of a sorted run
+
+        :param f: Run file
+        :param record_size: Size of a single record in bytes
+
+        :return: Records
+        """
+        for record in iter(lambda: f.read(record_size), b''):
+            yield record
+
+    @staticmethod
+    def sort(records: Iterable[bytes], record_size: int, path: Path,
+             unique: bool = False, run_size: int = None) -> int:
+        """
+        Sort fixed size records into a file with an external merge sort, only
+        run_size records are in memory at the same time. The records are
+        compared as bytes
+
+        :param records: Records to sort
+        :param record_size: Size of a single record in bytes
+        :param path: Path to write the sorted records to
+        :param unique: Drop duplicate records
+        :param run_size: Number of records in a run, RUN_SIZE when None
+
+        :return: Number of records written
+        """
+        run_size = run_size or ExternalSort.RUN_SIZE
+        count = 0
+
+        with TemporaryDirectory(dir=str(path.parent)) as tmp:
+            runs = []
+            run = []
+
+            def write_run() -> None:
+                run_path = Path(tmp).joinpath(str(len(runs)))
+                with open(str(run_path), 'wb') as f:
+                    f.write(b''.join(sorted(set(run) if unique else run)))
+                runs.append(run_path)
+                run.clear()
+
+            for record in records:
+                run.append(record)
+                if len(run) == run_size:
+                    write_run()
+
+            if len(run) > 0 or len(runs) == 0:
+                write_run()
+
+            files = [open(str(run_path), 'rb') for run_path in runs]
+
+            try:
+                # Write to a temporary file first so a file that is being
+                # sorted is never opened
+                part = path.with_suffix('.part')
+                with open(str(part), 'wb') as f:
+                    previous = None
+                    for record in merge(*[
+                            ExternalSort.read_run(run_file, record_size)
+                            for run_file in files]):
+                        if not unique or record != previous:
+                            f.write(record)
+                            previous = record
+                            count += 1
+            finally:
+                for run_file in files:
+                    run_file.close()
+
+            part.replace(path)
+
+        return count
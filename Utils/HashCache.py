@@ -0,0 +1,108 @@
+from datetime import datetime
+from pathlib import Path
+from sqlite3 import connect
+from typing import Dict, Iterable, Tuple, Union
+
+from Utils.Cache import Cache
+
+Key = Tuple[int, int, int, str, str, str]
+
+
+class HashCache:
+    BUSY_TIMEOUT = 3600
+    ALGORITHM = 'sha256'
+
+    def __init__(self, identity: str) -> None:
+        self.identity = identity
+        self.path = self.get_cache_path()
+
+        self.connection = connect(str(self.path),
+                                  timeout=self.BUSY_TIMEOUT,
+                                  isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+
+        self.connection.execute('CREATE TABLE IF NOT EXISTS hashes ('
+                                'identity TEXT, '
+                                'partition INTEGER, '
+                                'inode INTEGER, '
+                                'size INTEGER, '
+                                'crtime TEXT, '
+                                'ctime TEXT, '
+                                'mtime TEXT, '
+                                'algorithm TEXT, '
+                                'digest TEXT, '
+                                'PRIMARY KEY (identity, partition, inode, '
+                                'size, crtime, ctime, mtime, algorithm)) '
+                                'WITHOUT ROWID')
+
+    @staticmethod
+    def get_cache_path() -> Path:
+        """
+        Get the path of the hash cache database, the cache is shared by all
+        images
+
+        :return: Path to the hash cache database
+        """
+        cache_path = Cache.get_cache_folder()
+
+        return Path(cache_path.joinpath('hashes.sqlite'))
+
+    @staticmethod
+    def key(partition: int, inode: int, size: int,
+            create: Union[str, datetime], change: Union[str, datetime],
+            modify: Union[str, datetime]) -> Key:
+        """
+        Create the key of a file, a file that was changed gets a new key
+
+        :param partition: Partition address
+        :param inode: Meta address of the file
+        :param size: Size of the file in bytes
+        :param create: Create date
+        :param change: Change date
+        :param modify: Modify date
+
+        :return: Key of the file
+        """
+        return partition, inode, size, str(create), str(change), str(modify)
+
+    def get(self, algorithm: str = None) -> Dict[Key, str]:
+        """
+        Get all cached hashes of the image
+
+        :param algorithm: Name of the digest or other result of the read
+                          pass, for example 'entropy', ALGORITHM when None
+
+        :return: Digest by key
+        """
+        return {row[:6]: row[6] for row in self.connection.execute(
+            'SELECT partition, inode, size, crtime, ctime, mtime, digest '
+            'FROM hashes WHERE identity = ? AND algorithm = ?',
+            (self.identity, algorithm or self.ALGORITHM))}
+
+    def add(self, hashes: Iterable[Tuple[Key, str]],
+            algorithm: str = None) -> None:
+        """
+        Add hashes to the cache in a single transaction
+
+        :param hashes: Key and digest of every file
+        :param algorithm: Name of the digest or other result of the read
+                          pass, ALGORITHM when None
+
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO hashes (identity, partition, inode, '
+                'size, crtime, ctime, mtime, algorithm, digest) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((self.identity, *key, algorithm or self.ALGORITHM, digest)
+                 for key, digest in hashes if digest != ''))
+
+    def close(self) -> None:
+        """
+        Close the hash cache database
+
+        :return: None
+        """
+        self.connection.close()
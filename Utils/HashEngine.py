@@ -0,0 +1,212 @@
+from abc import ABC, abstractmethod
+from hashlib import new
+from typing import Any, BinaryIO, Callable, Dict, List
+
+
+class Consumer(ABC):
+    @abstractmethod
+    def update(self, data: bytes) -> None:
+        """
+        Process the next block of a file
+
+        :param data: Block of the file
+
+        :return: None
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def result(self) -> Any:
+        """
+        Get the result after the whole file has been processed
+
+        :return: Result of the consumer
+        """
+        raise NotImplementedError()
+
+
+class Digest(Consumer):
+    def __init__(self, algorithm: str) -> None:
+        self.hasher = new(algorithm)
+
+    def update(self, data: bytes) -> None:
+        """
+        Hash the next block of a file
+
+        :param data: Block of the file
+
+        :return: None
+        """
+        self.hasher.update(data)
+
+    def result(self) -> str:
+        """
+        Get the hex digest of the file
+
+        :return: Hex digest
+        """
+        return self.hasher.hexdigest()
+
+
+class HashEngine:
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, digests: List[str] = None,
+                 consumers: Dict[str, Callable[[], Consumer]] = None) -> None:
+        """
+        Read a file once and feed every block to all digests and consumers
+
+        :param digests: Hashlib names of the digests, for example 'md5',
+                        'sha1', 'sha256' or 'blake2b', only sha256 when
+                        None and no digests when empty
+        :param consumers: Factories of other consumers by the name of their
+                          result, for example an entropy counter
+        """
+        self.factories = {digest: (lambda name=digest: Digest(name))
+                          for digest in (['sha256'] if digests is None
+                                         else digests)}
+        self.factories.update(consumers or {})
+
+    def add_consumer(self, name: str, factory: Callable[[], Consumer]) -> None:
+        """
+        Attach another consumer to the read pass
+
+        :param name: Name of the result
+        :param factory: Creates a new consumer for every file
+
+        :return: None
+        """
+        self.factories[name] = factory
+
+    def start(self) -> Dict[str, Consumer]:
+        """
+        Create new consumers for a file
+
+        :return: Consumer by the name of its result
+        """
+        return {name: factory() for name, factory in self.factories.items()}
+
+    @staticmethod
+    def finish(consumers: Dict[str, Consumer]) -> Dict[str, Any]:
+        """
+        Get the results after the whole file has been processed
+
+        :param consumers: Consumers made by start()
+
+        :return: Result of every digest and consumer
+        """
+        return {name: consumer.result()
+                for name, consumer in consumers.items()}
+
+    def read(self, read: Callable[[int, int], bytes], size: int) -> \
+            Dict[str, Any]:
+        """
+        Process a file that is read by offset
+
+        :param read: Function that reads size bytes at an offset
+        :param size: Size of the file in bytes
+
+        :return: Result of every digest and consumer
+        """
+        consumers = self.start()
+        offset = 0
+
+        while offset < size:
+            data = read(offset, min(self.BLOCK_SIZE, size - offset))
+            if not data:
+                break
+
+            offset += len(data)
+            for consumer in consumers.values():
+                consumer.update(data)
+
+        return self.finish(consumers)
+
+    def read_stream(self, stream: BinaryIO) -> Dict[str, Any]:
+        """
+        Process a file like object from its current position to the end
+
+        :param stream: File like object
+
+        :return: Result of every digest and consumer
+        """
+        reader = EngineReader(stream, self)
+        reader.drain()
+
+        return reader.results()
+
+    def read_path(self, path: str) -> Dict[str, Any]:
+        """
+        Process a file on the local file system
+
+        :param path: Path to the file
+
+        :return: Result of every digest and consumer
+        """
+        with open(path, 'rb') as f:
+            return self.read_stream(f)
+
+
+class EngineReader:
+    def __init__(self, stream: BinaryIO, engine: HashEngine,
+                 callback: Callable[[int], None] = None) -> None:
+        """
+        File like object that feeds every block that is read through it to
+        the consumers of an engine, a stream that is parsed by something
+        else, for example tarfile, is processed in the same pass
+
+        :param stream: File like object to read from
+        :param engine: Engine with the digests and consumers
+        :param callback: Called with the size of every block before it is
+                         processed, may raise to stop reading
+        """
+        self.stream = stream
+        self.engine = engine
+        self.callback = callback
+        self.consumers = engine.start()
+        self.size = 0
+
+    def readable(self) -> bool:
+        """
+        Whether the stream can be read
+
+        :return: True
+        """
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read and process a block
+
+        :param size: Number of bytes to read, everything when negative
+
+        :return: Block of the file
+        """
+        data = self.stream.read(size)
+
+        if self.callback is not None:
+            self.callback(len(data))
+
+        if data:
+            self.size += len(data)
+            for consumer in self.consumers.values():
+                consumer.update(data)
+
+        return data
+
+    def drain(self) -> None:
+        """
+        Process the rest of the stream, the part a parser didn't need
+
+        :return: None
+        """
+        while self.read(self.engine.BLOCK_SIZE):
+            pass
+
+    def results(self) -> Dict[str, Any]:
+        """
+        Get the results of all bytes that were read
+
+        :return: Result of every digest and consumer
+        """
+        return self.engine.finish(self.consumers)
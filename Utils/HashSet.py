@@ -0,0 +1,243 @@
+from bisect import bisect_left
+from hashlib import new, sha256
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from re import compile as re_compile
+from typing import Dict, Iterator, List, Pattern, Union
+
+from Utils.Cache import Cache
+from Utils.ExternalSort import ExternalSort, Records
+from Utils.Logging.Logging import Logging
+
+
+class HashSet:
+    ALGORITHM = 'sha256'
+    RUN_SIZE = 1000000
+
+    def __init__(self, path: Path, algorithm: str = None) -> None:
+        """
+        Sorted array of binary digests that is memory mapped, every process
+        that opens the same set shares the same pages
+
+        :param path: Path to a set made by build()
+        :param algorithm: Hashlib name of the digest, ALGORITHM when None
+        """
+        self.path = path
+        self.file = open(str(path), 'rb')
+        self.data = None
+        self.records = []
+
+        if path.stat().st_size > 0:
+            self.data = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+            self.records = Records(self.data, self.record_size(algorithm))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, digest: str) -> bool:
+        """
+        Binary search for a digest
+
+        :param digest: Hex digest
+
+        :return: Whether the digest is in the set or not
+        """
+        try:
+            value = bytes.fromhex(digest)
+        except ValueError:
+            return False
+
+        index = bisect_left(self.records, value)
+
+        return index < len(self.records) and self.records[index] == value
+
+    def close(self) -> None:
+        """
+        Close the memory map
+
+        :return: None
+        """
+        if self.data is not None:
+            self.data.close()
+
+        self.file.close()
+
+    @staticmethod
+    def record_size(algorithm: str = None) -> int:
+        """
+        Get the size of a binary digest
+
+        :param algorithm: Hashlib name of the digest, ALGORITHM when None
+
+        :return: Size in bytes
+        """
+        return new(algorithm or HashSet.ALGORITHM).digest_size
+
+    @staticmethod
+    def pattern(algorithm: str = None) -> Pattern:
+        """
+        Get the pattern of a hex digest that isn't part of a longer hex
+        string, so a SHA-256 digest doesn't match as a SHA-1 digest
+
+        :param algorithm: Hashlib name of the digest, ALGORITHM when None
+
+        :return: Compiled pattern
+        """
+        return re_compile(rb'(?<![0-9a-fA-F])[0-9a-fA-F]{%d}(?![0-9a-fA-F])'
+                          % (HashSet.record_size(algorithm) * 2))
+
+    @staticmethod
+    def digests(source: Path, algorithm: str = None) -> Iterator[bytes]:
+        """
+        Read the digests from a hash list, the first digest on every line is
+        used so plain lists and CSV exports both work. A list without a
+        single digest of the algorithm is an error, it is a list of another
+        algorithm or not a hash list at all
+
+        :param source: Path to the hash list
+        :param algorithm: Hashlib name of the digest, ALGORITHM when None
+
+        :return: Binary digests
+        """
+        pattern = HashSet.pattern(algorithm)
+        lines = 0
+        found = 0
+
+        with open(str(source), 'rb') as f:
+            for line in f:
+                lines += 1
+                match = pattern.search(line)
+                if match is not None:
+                    found += 1
+                    yield bytes.fromhex(match.group().decode('ascii'))
+
+        if lines > 0 and found == 0:
+            raise ValueError('No {} digests in {}'.format(
+                algorithm or HashSet.ALGORITHM, source))
+
+    @staticmethod
+    def build(sources: List[Path], path: Path, algorithm: str = None) -> None:
+        """
+        Build a set from hash lists with an external merge sort, only
+        RUN_SIZE digests are in memory at the same time
+
+        :param sources: Paths to the hash lists
+        :param path: Path to write the set to
+        :param algorithm: Hashlib name of the digest, ALGORITHM when None
+
+        :return: None
+        """
+        ExternalSort.sort((digest for source in sources
+                           for digest in HashSet.digests(source, algorithm)),
+                          HashSet.record_size(algorithm), path, unique=True,
+                          run_size=HashSet.RUN_SIZE)
+
+
+class HashSets:
+    KINDS = ['bad', 'good']
+
+    def __init__(self, algorithm: str = None) -> None:
+        """
+        Open the known-bad and known-good sets, a set is built once from the
+        hash lists in Configs/HashSets/<kind> and rebuilt when the lists
+        change. A set with a list that has no digests of the algorithm isn't
+        used
+
+        :param algorithm: Hashlib name of the digests, HashSet.ALGORITHM when
+                          None
+        """
+        self.logger = Logging(self.__class__.__name__).logger
+        self.sets = {}
+
+        for kind in self.KINDS:
+            sources = self.get_sources(kind)
+            if len(sources) == 0:
+                continue
+
+            path = self.get_set_path(kind, sources, algorithm)
+            if not path.exists():
+                try:
+                    HashSet.build(sources, path, algorithm)
+                except ValueError as e:
+                    self.logger.error('Not using the known-{} hash set: '
+                                      '{}'.format(kind, e))
+                    continue
+
+            self.sets[kind] = HashSet(path, algorithm)
+
+    @staticmethod
+    def get_sources(kind: str) -> List[Path]:
+        """
+        Get the hash lists of a kind of set
+
+        :param kind: 'bad' or 'good'
+
+        :return: Paths to the hash lists
+        """
+        # Make hash set folder
+        source_path = Path(__file__).parent.parent.joinpath(
+            'Configs', 'HashSets', kind)
+        Path.mkdir(source_path, parents=True, exist_ok=True)
+
+        return sorted(path for path in source_path.iterdir()
+                      if path.is_file() and not path.name.startswith('.'))
+
+    @staticmethod
+    def get_set_path(kind: str, sources: List[Path],
+                     algorithm: str = None) -> Path:
+        """
+        Get the path of a built set, the name changes when a hash list is
+        added, removed or changed
+
+        :param kind: 'bad' or 'good'
+        :param sources: Paths to the hash lists
+        :param algorithm: Hashlib name of the digests, HashSet.ALGORITHM when
+                          None
+
+        :return: Path to the set
+        """
+        signature = sha256((algorithm or HashSet.ALGORITHM).encode('UTF-8'))
+        for source in sources:
+            source_stat = source.stat()
+            signature.update('{}:{}:{}'.format(
+                source.name, source_stat.st_size,
+                source_stat.st_mtime_ns).encode('UTF-8'))
+
+        cache_path = Cache.get_cache_folder()
+
+        return Path(cache_path.joinpath('hashset-{}-{}.bin'.format(
+            kind, signature.hexdigest()[:16])))
+
+    def __len__(self) -> int:
+        return len(self.sets)
+
+    def status(self, digest: str) -> Union[str, None]:
+        """
+        Check a digest against all sets, known-bad wins over known-good
+
+        :param digest: Hex digest
+
+        :return: 'bad', 'good' or None when the digest isn't known
+        """
+        for kind in self.KINDS:
+            if kind in self.sets and digest in self.sets[kind]:
+                return kind
+
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of digests in every set
+
+        :return: Size of every set
+        """
+        return {kind: len(hash_set) for kind, hash_set in self.sets.items()}
+
+    def close(self) -> None:
+        """
+        Close all sets
+
+        :return: None
+        """
+        for hash_set in self.sets.values():
+            hash_set.close()
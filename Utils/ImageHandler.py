@@ -1,25 +1,168 @@
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime
+from glob import escape as glob_escape
 from hashlib import sha256
-from os import sep
+from io import BufferedReader, RawIOBase, SEEK_CUR, SEEK_END, SEEK_SET
+from mmap import mmap, ACCESS_READ
+from multiprocessing import Pool, cpu_count
+from multiprocessing.util import Finalize
+from os import fstat, getpid, sep, stat
 from pathlib import Path as PathlibPath
+from stat import S_ISREG
+from struct import unpack_from
 from pyewf import handle, glob
 from pytsk3 import Img_Info, Volume_Info, FS_Info, Directory, File, \
-    TSK_VS_PART_INFO, TSK_IMG_TYPE_EXTERNAL, TSK_FS_META_TYPE_DIR
-from re import search, I
-from sys import setrecursionlimit
-from typing import List, Union, Tuple
-
+    TSK_VS_PART_INFO, TSK_IMG_TYPE_EXTERNAL, TSK_FS_META_TYPE_DIR, \
+    TSK_FS_ATTR_TYPE_DEFAULT, TSK_FS_ATTR_TYPE_NTFS_DATA, TSK_FS_TYPE_NTFS
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Union, \
+    Tuple
+
+from Utils.Catalog import Catalog, Record
+from Utils.HashEngine import HashEngine
 from Utils.Logging.Logging import Logging
+from Utils.MftParser import MftParser
+from Utils.Pipeline import Pipeline
+from Utils.RecordStore import RecordStore
+from Utils.Sniffer import Sniffer
 from Utils.Store.Image import ImageStore
+from Utils.Verifier import Verifier
+
+
+class BlockCache:
+    def __init__(self, block_size: int, cache_size: int,
+                 read_limit: int) -> None:
+        self.block_size = block_size
+        self.max_blocks = max(1, cache_size // block_size)
+        self.read_limit = read_limit
+
+        self.blocks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, offset: int, size: int,
+             read_block: Callable[[int], bytes],
+             read_direct: Callable[[int, int], bytes]) -> bytes:
+        """
+        Read a range of bytes through the cache, reads larger than the read
+        limit bypass the cache so bulk reads don't evict the metadata blocks
+
+        :param offset: Offset in bytes
+        :param size: Size in bytes
+        :param read_block: Function that reads a block at an aligned offset
+        :param read_direct: Function that reads a range without the cache
+
+        :return: Bytes in the range
+        """
+        if size <= 0:
+            return b''
+
+        if size > self.read_limit:
+            return read_direct(offset, size)
+
+        first = offset // self.block_size
+        last = (offset + size - 1) // self.block_size
+
+        blocks = []
+        for index in range(first, last + 1):
+            block = self.blocks.get(index)
+
+            if block is None:
+                self.misses += 1
+                block = read_block(index * self.block_size)
+
+                self.blocks[index] = block
+                if len(self.blocks) > self.max_blocks:
+                    self.blocks.popitem(last=False)
+            else:
+                self.hits += 1
+                self.blocks.move_to_end(index)
+
+            blocks.append(block)
+
+        start = offset - first * self.block_size
+        data = blocks[0] if len(blocks) == 1 else b''.join(blocks)
+
+        return data[start:start + size]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the hit and miss statistics of the cache
+
+        :return: Cache statistics
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'blocks': len(self.blocks),
+            'block_size': self.block_size
+        }
 
 
 class Ewf(Img_Info):
-    def __init__(self, ewf_handle):
+    SECTORS_PER_CHUNK = 64
+    SIGNATURE = b'EVF\x09\x0d\x0a\xff\x00'
+    HEADER_SIZE = 13
+    SECTION_SIZE = 76
+    MAX_SECTIONS = 16
+
+    def __init__(self, ewf_handle, cache_size: int, read_limit: int,
+                 sectors_per_chunk: int = None):
         self.ewf_handle = ewf_handle
+        self.cache = BlockCache(
+            ewf_handle.bytes_per_sector *
+            (sectors_per_chunk or self.SECTORS_PER_CHUNK),
+            cache_size,
+            read_limit)
         # noinspection PyArgumentList
         super(Ewf, self).__init__(url='',
                                   type=TSK_IMG_TYPE_EXTERNAL)
 
+    @staticmethod
+    def sectors_per_chunk(path: str) -> Union[int, None]:
+        """
+        Read the chunk size from the volume section of the first segment of
+        an ewf file, the cache blocks have to line up with the chunks
+
+        :param path: Path to the first segment
+
+        :return: Number of sectors in a chunk or None when the segment has no
+                 volume section that can be read
+        """
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(Ewf.SIGNATURE)) != Ewf.SIGNATURE:
+                    return None
+
+                offset = Ewf.HEADER_SIZE
+
+                for _ in range(Ewf.MAX_SECTIONS):
+                    f.seek(offset)
+                    section = f.read(Ewf.SECTION_SIZE + 12)
+                    if len(section) < Ewf.SECTION_SIZE:
+                        return None
+
+                    kind = section[:16].rstrip(b'\x00')
+                    next_offset = unpack_from('<Q', section, 16)[0]
+
+                    # Sectors per chunk follow the media type and the number
+                    # of chunks in both the EnCase and the SMART layout
+                    if kind in [b'volume', b'disk'] and \
+                            len(section) == Ewf.SECTION_SIZE + 12:
+                        sectors = unpack_from('<I', section,
+                                              Ewf.SECTION_SIZE + 8)[0]
+                        return sectors if sectors > 0 else None
+
+                    if kind in [b'next', b'done'] or next_offset <= offset:
+                        return None
+
+                    offset = next_offset
+        except OSError:
+            pass
+
+        return None
+
     def close(self):
         """
         Closes the ewf handle
@@ -31,12 +174,35 @@ class Ewf(Img_Info):
     # noinspection PyUnusedLocal
     def read(self, offset, size, **kwargs):
         """
-        Read the ewf file
+        Read the ewf file, whole chunks are read and kept in the cache so
+        a chunk is only decompressed once
 
         :param offset: Offset in bytes
         :param size: Size in bytes
         :param kwargs: Kwargs
 
+        :return: File in bytes
+        """
+        return self.cache.read(offset, size, self.read_block,
+                               self.read_direct)
+
+    def read_block(self, offset: int) -> bytes:
+        """
+        Read a single chunk from the ewf file
+
+        :param offset: Chunk aligned offset in bytes
+
+        :return: Chunk in bytes
+        """
+        return self.read_direct(offset, self.cache.block_size)
+
+    def read_direct(self, offset: int, size: int) -> bytes:
+        """
+        Read the ewf file without the cache
+
+        :param offset: Offset in bytes
+        :param size: Size in bytes
+
         :return: File in bytes
         """
         self.ewf_handle.seek(offset)
@@ -51,14 +217,233 @@ class Ewf(Img_Info):
         return self.ewf_handle.get_media_size()
 
 
+class Raw(Img_Info):
+    # Extensions of single raw images, split images have a numbered
+    # extension
+    EXTENSIONS = ['dd', 'raw', 'img']
+
+    def __init__(self, paths: List[str]):
+        self.files = []
+        self.maps = []
+        self.offsets = []
+        self.size = 0
+
+        for path in paths:
+            file = open(path, 'rb')
+            size = fstat(file.fileno()).st_size
+
+            # Empty segments can't be mapped and don't add any data
+            if size == 0:
+                file.close()
+                continue
+
+            self.files.append(file)
+            self.maps.append(mmap(file.fileno(), 0, access=ACCESS_READ))
+            self.offsets.append(self.size)
+            self.size += size
+
+        # noinspection PyArgumentList
+        super(Raw, self).__init__(url='',
+                                  type=TSK_IMG_TYPE_EXTERNAL)
+
+    @staticmethod
+    def is_raw(path: str) -> bool:
+        """
+        Check if an image can be memory mapped as a raw image, only regular
+        raw files and numbered split images that aren't empty can. Block
+        devices report no size and other formats are read by TSK
+
+        :param path: Path to the selected segment
+
+        :return: Whether the image is a raw image or not
+        """
+        ext = PathlibPath(path).suffix.lower()[1:]
+
+        if not ext.isdigit() and ext not in Raw.EXTENSIONS:
+            return False
+
+        try:
+            info = stat(path)
+        except OSError:
+            return False
+
+        return S_ISREG(info.st_mode) and info.st_size > 0
+
+    @staticmethod
+    def open(path: str) -> Img_Info:
+        """
+        Open an image that isn't an EWF image, raw images are memory mapped
+        and every other image is opened by TSK
+
+        :param path: Path to the selected segment
+
+        :return: Image handle
+        """
+        if Raw.is_raw(path):
+            return Raw(Raw.segments(path))
+
+        return Img_Info(path)
+
+    @staticmethod
+    def segments(path: str) -> List[str]:
+        """
+        Get all segments of a raw image, split images have a numbered
+        extension like image.001, image.002
+
+        :param path: Path to the selected segment
+
+        :return: Paths to all segments in order
+        """
+        image = PathlibPath(path)
+        ext = image.suffix[1:]
+
+        if not ext.isdigit():
+            return [path]
+
+        return sorted(str(segment) for segment in image.parent.glob(
+            '{}.{}'.format(glob_escape(image.stem), '[0-9]' * len(ext))))
+
+    def close(self):
+        """
+        Closes the memory maps and the segments of the raw image
+
+        :return: None
+        """
+        for memory_map in self.maps:
+            memory_map.close()
+
+        for file in self.files:
+            file.close()
+
+    # noinspection PyUnusedLocal
+    def read(self, offset, size, **kwargs):
+        """
+        Read the raw image from the memory maps of the segments
+
+        :param offset: Offset in bytes
+        :param size: Size in bytes
+        :param kwargs: Kwargs
+
+        :return: File in bytes
+        """
+        chunks = []
+        index = bisect_right(self.offsets, offset) - 1
+
+        while size > 0 and 0 <= index < len(self.maps):
+            start = offset - self.offsets[index]
+            data = self.maps[index][start:start + size]
+            if not data:
+                break
+
+            chunks.append(data)
+            offset += len(data)
+            size -= len(data)
+            index += 1
+
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def get_size(self):
+        """
+        Get size of the raw image
+
+        :return: Size in bytes
+        """
+        return self.size
+
+
+class FileStream(RawIOBase):
+    def __init__(self, fs_object: File) -> None:
+        super(FileStream, self).__init__()
+        self.fs_object = fs_object
+        self.size = getattr(fs_object.info.meta, 'size', 0)
+        self.position = 0
+
+    def readable(self) -> bool:
+        """
+        Whether the stream can be read
+
+        :return: True
+        """
+        return True
+
+    def seekable(self) -> bool:
+        """
+        Whether the stream supports seeking
+
+        :return: True
+        """
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:
+        """
+        Read bytes from the file into a buffer
+
+        :param buffer: Buffer to read into
+
+        :return: Number of bytes read
+        """
+        size = min(len(buffer), self.size - self.position)
+        if size <= 0:
+            return 0
+
+        data = self.fs_object.read_random(self.position, size)
+        buffer[:len(data)] = data
+        self.position += len(data)
+
+        return len(data)
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        """
+        Change the position in the stream
+
+        :param offset: Offset in bytes
+        :param whence: Position the offset is relative to
+
+        :return: New position
+        """
+        if whence == SEEK_CUR:
+            offset += self.position
+        elif whence == SEEK_END:
+            offset += self.size
+
+        if offset < 0:
+            raise ValueError('Negative seek position {}'.format(offset))
+
+        self.position = offset
+
+        return self.position
+
+    def tell(self) -> int:
+        """
+        Get the position in the stream
+
+        :return: Position in bytes
+        """
+        return self.position
+
+
 class ImageHandler:
+    CATALOG_BATCH = 10000
+    CACHE_SIZE = 64 * 1024 * 1024
+    CACHE_READ_LIMIT = 256 * 1024
+    PARALLEL_WALK = True
+    SPLIT_SUBTREES = True
+    CHECKPOINT_INTERVAL = 30
+    MFT_FAST_PATH = True
+    MFT_BLOCK_SIZE = 4 * 1024 * 1024
+    WALK_PROCESSES = cpu_count()
+    STREAM_BUFFER = 1024 * 1024
+    SNIFF_CHUNK = 1024
+
     def __init__(self) -> None:
         self.logger = Logging(self.__class__.__name__).logger
         self.store = ImageStore().image_store
 
-        setrecursionlimit(100000)
-
         self.image_handle = None
+        self.volume = None
+        self.volume_checked = False
+        self.fs_handles = {}
+        self.fs_offsets = {}
 
         self.ext = PathlibPath(self.store.get_state()).suffix.lower()[1:]
         self.search_result = None
@@ -66,16 +451,51 @@ class ImageHandler:
 
         if self.store.get_state() != 'initial':
             if self.encase_image(self.ext):
+                segments = glob(self.store.get_state())
                 self.ewf_handle = handle()
-                self.ewf_handle.open(glob(self.store.get_state()))
+                self.ewf_handle.open(segments)
                 self.logger.debug('EWF handle opened')
                 self.logger.info('{} loaded with EWF'.format(
                     self.store.get_state().split(sep)[-1])
                 )
 
-                self.image_handle = Ewf(self.ewf_handle)
+                self.image_handle = Ewf(self.ewf_handle,
+                                        self.CACHE_SIZE,
+                                        self.CACHE_READ_LIMIT,
+                                        Ewf.sectors_per_chunk(segments[0]))
             else:
-                self.image_handle = Img_Info(self.store.get_state())
+                self.image_handle = Raw.open(self.store.get_state())
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Get the statistics of the block cache under the image handle
+
+        :return: Cache statistics, empty when the handle has no cache
+        """
+        cache = getattr(self.image_handle, 'cache', None)
+
+        return {} if cache is None else cache.stats()
+
+    def close(self) -> None:
+        """
+        Close the image handle and log the cache statistics
+
+        :return: None
+        """
+        if self.image_handle is None:
+            return
+
+        stats = self.cache_stats()
+        if len(stats) > 0:
+            self.logger.info('Block cache hits: {}, misses: {}'.format(
+                stats['hits'], stats['misses']))
+
+        self.fs_handles = {}
+        self.fs_offsets = {}
+        self.volume = None
+        self.volume_checked = False
+        self.image_handle.close()
+        self.image_handle = None
 
     def check_file_path(self) -> bool:
         """
@@ -144,6 +564,54 @@ class ImageHandler:
 
         return metadata
 
+    def verify_image(self, progress: Callable[[Dict[str, float]], None] =
+                     None) -> List[str]:
+        """
+        Verify the media of an ewf file against the stored hashes, the media
+        is read through its own handle so the walk cache isn't flushed
+
+        :param progress: Called with the progress, logged when None
+
+        :return: Verification results
+        """
+        if not self.encase_image(self.ext):
+            return []
+
+        if progress is None:
+            def progress(stats: Dict[str, float]) -> None:
+                self.logger.info('Verifying image: {}'.format(
+                    Verifier.format_stats(stats)))
+
+        ewf_handle = handle()
+        ewf_handle.open(glob(self.store.get_state()))
+
+        def read(offset: int, size: int) -> bytes:
+            ewf_handle.seek(offset)
+            return ewf_handle.read(size)
+
+        verifier = Verifier(read, ewf_handle.get_media_size(), progress)
+
+        try:
+            computed = verifier.run()
+        except IOError as e:
+            self.logger.error('Image verification failed: {}'.format(e))
+            return ['EWF Verification', '', '- Failed: {}'.format(e)]
+        finally:
+            ewf_handle.close()
+
+        matches = Verifier.compare(computed,
+                                   self.ewf_handle.get_hash_values())
+        stats = verifier.stats()
+
+        self.logger.info('Image verification: {}'.format(matches))
+
+        return [
+            'EWF Verification',
+            '',
+            *Verifier.format_results(computed, matches),
+            '- Speed: {:.1f} MB/s'.format(stats['speed'])
+        ]
+
     def volume_info(self) -> List[Union[str, str]]:
         """
         Get all volume info from an image
@@ -172,6 +640,39 @@ class ImageHandler:
 
         return volume_info
 
+    def image_identity(self) -> str:
+        """
+        Get an identity of the image that is stable between runs, the stored
+        acquisition hashes are used for ewf images so a copy of the same
+        evidence has the same identity
+
+        :return: Identity of the image
+        """
+        identity = sha256()
+        stored_hashes = {}
+
+        if self.encase_image(self.ext):
+            segments = glob(self.store.get_state())
+            stored_hashes = self.ewf_handle.get_hash_values()
+            identity.update(
+                str(self.ewf_handle.get_media_size()).encode('UTF-8'))
+        else:
+            segments = Raw.segments(self.store.get_state())
+
+        for key in sorted(stored_hashes):
+            identity.update('{}:{}'.format(key, stored_hashes[key])
+                            .encode('UTF-8'))
+
+        if len(stored_hashes) == 0:
+            for segment in segments:
+                segment_stat = stat(segment)
+                identity.update('{}:{}:{}'.format(
+                    PathlibPath(segment).resolve(),
+                    segment_stat.st_size,
+                    segment_stat.st_mtime_ns).encode('UTF-8'))
+
+        return identity.hexdigest()
+
     @staticmethod
     def encase_image(ext: str) -> bool:
         """
@@ -221,33 +722,11 @@ class ImageHandler:
 
         :return: Volume info object and the handle
         """
-        return self.info(), self.image_handle
-
-    @staticmethod
-    def open_fs_single_vol(img: Img_Info, path: str) -> \
-            Union[Tuple[FS_Info, Directory], Tuple[None, None]]:
-        """
-        Open a single file system
+        if not self.volume_checked:
+            self.volume = self.info()
+            self.volume_checked = True
 
-        :param img: Current image handle
-        :param path: Path to open on the filesystem
-
-        :return: Filesystem object and the selected directory
-        """
-        try:
-            fs = FS_Info(img)
-            # noinspection PyArgumentList
-            root = fs.open_dir(path=path)
-
-            return fs, root
-        except IOError:
-            pass
-
-            return None, None
-        except RuntimeError:
-            pass
-
-            return None, None
+        return self.volume, self.image_handle
 
     @staticmethod
     def open_fs(img: Img_Info, vol: Volume_Info, path: str,
@@ -292,8 +771,308 @@ class ImageHandler:
             fs_object.info.name, 'name') or \
             fs_object.info.name.name.decode('UTF-8') in ['.', '..']
 
+    @staticmethod
+    def partition_number(partition: str) -> int:
+        """
+        Get the partition address from a partition column
+
+        :param partition: Partition column, for example 'PARTITION 2'
+
+        :return: Partition address
+        """
+        return int(partition.split(' ')[-1])
+
+    def fs_info(self, partition: int) -> Union[FS_Info, None]:
+        """
+        Get the filesystem of a partition, filesystems are opened once and
+        cached per partition
+
+        :param partition: Partition address in the image
+
+        :return: Filesystem object
+        """
+        if partition not in self.fs_handles:
+            vol, img = self.get_handle()
+            fs = None
+            offset = 0
+
+            try:
+                if vol is None:
+                    fs = FS_Info(img)
+                else:
+                    for part in vol:
+                        if part.addr == partition and \
+                                self.partition_check(part):
+                            offset = part.start * vol.info.block_size
+                            fs = FS_Info(img, offset=offset)
+            except (IOError, RuntimeError):
+                fs = None
+
+            self.fs_handles[partition] = fs
+            self.fs_offsets[partition] = offset
+
+        return self.fs_handles[partition]
+
+    def open_file(self, partition: int, inode: int = None,
+                  path: str = None) -> Union[File, None]:
+        """
+        Open a file by its meta address or by its full path
+
+        :param partition: Partition address in the image
+        :param inode: Meta address of the file
+        :param path: Full path to the file
+
+        :return: File object
+        """
+        fs = self.fs_info(partition)
+
+        if fs is None:
+            return None
+
+        try:
+            if inode is not None and inode != '':
+                return fs.open_meta(inode=inode)
+            # noinspection PyArgumentList
+            return fs.open(path=path)
+        except (IOError, RuntimeError):
+            return None
+
+    def physical_offset(self, partition: int, inode: int = None,
+                        path: str = None) -> int:
+        """
+        Get the offset in the image of the first data block of a file, files
+        without data blocks (resident or empty) get the offset of their
+        partition
+
+        :param partition: Partition address in the image
+        :param inode: Meta address of the file
+        :param path: Full path to the file
+
+        :return: Offset in bytes
+        """
+        fs_object = self.open_file(partition, inode, path)
+        offset = self.fs_offsets.get(partition, 0)
+
+        if fs_object is None:
+            return offset
+
+        try:
+            block_size = self.fs_info(partition).info.block_size
+
+            for attribute in fs_object:
+                if attribute.info.type not in [TSK_FS_ATTR_TYPE_DEFAULT,
+                                               TSK_FS_ATTR_TYPE_NTFS_DATA]:
+                    continue
+
+                for run in attribute:
+                    # Sparse runs don't have a block in the image
+                    if run.addr > 0:
+                        return offset + run.addr * block_size
+        except (IOError, RuntimeError):
+            pass
+
+        return offset
+
+    def file_hash(self, partition: int, inode: int = None,
+                  path: str = None) -> str:
+        """
+        Get the hash of a file by its meta address or by its full path
+
+        :param partition: Partition address in the image
+        :param inode: Meta address of the file
+        :param path: Full path to the file
+
+        :return: The hash of the file
+        """
+        return self.file_digests(partition, inode, path).get('sha256', '')
+
+    def file_digests(self, partition: int, inode: int = None,
+                     path: str = None, engine: HashEngine = None) -> \
+            Dict[str, Any]:
+        """
+        Read a file once and get the result of every digest and consumer of
+        a hash engine
+
+        :param partition: Partition address in the image
+        :param inode: Meta address of the file
+        :param path: Full path to the file
+        :param engine: Hash engine, only sha256 when None
+
+        :return: Results by name, empty for directories and unreadable files
+        """
+        fs_object = self.open_file(partition, inode, path)
+
+        meta = None if fs_object is None else \
+            getattr(fs_object.info, 'meta', None)
+
+        if meta is None or meta.type == TSK_FS_META_TYPE_DIR:
+            return {}
+
+        try:
+            return (engine or HashEngine()).read(
+                fs_object.read_random, getattr(meta, "size", 0))
+        except IOError:
+            return {}
+
+    def file_type(self, partition: int, inode: int = None,
+                  path: str = None) -> str:
+        """
+        Detect the type of a file from its first bytes, only SNIFF_SIZE bytes
+        of the file are read
+
+        :param partition: Partition address in the image
+        :param inode: Meta address of the file
+        :param path: Full path to the file
+
+        :return: Detected type, empty for directories, unreadable files and
+                 unknown types
+        """
+        fs_object = self.open_file(partition, inode, path)
+
+        meta = None if fs_object is None else \
+            getattr(fs_object.info, 'meta', None)
+
+        if meta is None or meta.type == TSK_FS_META_TYPE_DIR:
+            return ''
+
+        size = min(Sniffer.SNIFF_SIZE, getattr(meta, 'size', 0))
+        if size <= 0:
+            return ''
+
+        try:
+            return Sniffer.detect(fs_object.read_random(0, size))
+        except IOError:
+            return ''
+
+    @staticmethod
+    def type_task(key: Tuple[int, int]) -> str:
+        """
+        Detect the type of a file in a worker process
+
+        :param key: Partition address and meta address of the file
+
+        :return: Detected type
+        """
+        return HandlePool.get().file_type(key[0], inode=key[1])
+
+    def detect_types(self, store: RecordStore, indexes: Iterable[int],
+                     processes: int = None) -> None:
+        """
+        Detect the type of files from their first bytes on multiple processes
+        and keep it in the record store, so a renamed file is still found.
+        Files that were already sniffed by another module or an earlier run
+        get their type from the catalog and aren't read again
+
+        :param store: Record store with the files
+        :param indexes: Indexes of the records to detect the type of
+        :param processes: Number of worker processes
+
+        :return: None
+        """
+        indexes = self.load_types(store, indexes)
+
+        if len(indexes) == 0:
+            return
+
+        sniffed = []
+
+        with Pipeline(processes, HandlePool.init_worker) as pipeline:
+            for position, kind, error in pipeline.map(
+                    self.type_task,
+                    [(store.partition_table[store.partition[index]],
+                      store.inode[index]) for index in indexes],
+                    chunk_size=self.SNIFF_CHUNK):
+                if error is None:
+                    store.set_kind(indexes[position], kind)
+                    sniffed.append(indexes[position])
+
+        self.save_types(store, sniffed)
+
+    def load_types(self, store: RecordStore, indexes: Iterable[int]) -> \
+            List[int]:
+        """
+        Set the types of files that were saved in the catalog
+
+        :param store: Record store with the files
+        :param indexes: Indexes of the records to get the type of
+
+        :return: Indexes of the files that still have to be sniffed
+        """
+        catalog = Catalog(self.image_identity())
+
+        try:
+            kinds = catalog.kinds()
+        finally:
+            catalog.close()
+
+        pending = []
+
+        for index in indexes:
+            # Directories, empty files and files that already have a type
+            if store.type[index] != RecordStore.TYPES.index('FILE') or \
+                    store.size[index] <= 0 or store.inode[index] < 0 or \
+                    store.kind[index] != 0:
+                continue
+
+            kind = kinds.get((store.partition_table[store.partition[index]],
+                              store.inode[index]))
+
+            if kind is None:
+                pending.append(index)
+            else:
+                store.set_kind(index, kind)
+
+        return pending
+
+    def save_types(self, store: RecordStore, indexes: Iterable[int]) -> None:
+        """
+        Save the detected types of files in the catalog, unknown types are
+        saved as well so those files aren't sniffed again
+
+        :param store: Record store with the files
+        :param indexes: Indexes of the records that were sniffed
+
+        :return: None
+        """
+        kinds = [(store.partition_table[store.partition[index]],
+                  store.inode[index], store.get_kind(index))
+                 for index in indexes if store.inode[index] >= 0]
+
+        if len(kinds) == 0:
+            return
+
+        catalog = Catalog(self.image_identity())
+
+        try:
+            catalog.begin()
+            catalog.add_kinds(kinds)
+            catalog.commit()
+        finally:
+            catalog.close()
+
+    def open_stream(self, partition: int, inode: int = None,
+                    path: str = None) -> Union[BufferedReader, None]:
+        """
+        Open a buffered, seekable and read-only stream over a file by its
+        meta address or by its full path
+
+        :param partition: Partition address in the image
+        :param inode: Meta address of the file
+        :param path: Full path to the file
+
+        :return: File like object
+        """
+        fs_object = self.open_file(partition, inode, path)
+
+        if fs_object is None or not hasattr(fs_object.info, 'meta') or \
+                fs_object.info.meta is None:
+            return None
+
+        return BufferedReader(FileStream(fs_object), self.STREAM_BUFFER)
+
     def single_file(self, partition: int, path: str, filename: str,
-                    hashing: bool = False) -> Union[str, bytes, None]:
+                    hashing: bool = False) -> \
+            Union[str, BufferedReader, None]:
         """
         Get a single file from an image
 
@@ -302,177 +1081,400 @@ class ImageHandler:
         :param filename: Filename
         :param hashing: Whether te return the hash of the file or not
 
-        :return: The hash of the file or the tho file as bytes
+        :return: The hash of the file or a stream over the file
         """
-        vol, img = self.get_handle()
-        fs, root = None, None
+        file_path = '{}/{}'.format(path.rstrip('/'), filename)
 
-        if vol is not None:
-            all_partitions = [x for x in vol]
-            part = all_partitions[partition]
-            if self.partition_check(part):
-                fs, root = self.open_fs(img, vol, path, part)
-        else:
-            fs, root = self.open_fs_single_vol(img, path)
+        return self.file_hash(partition, path=file_path) if hashing else \
+            self.open_stream(partition, path=file_path)
+
+    def file_systems(self, path: str) -> \
+            Iterator[Tuple[int, FS_Info, Directory]]:
+        """
+        Open the file system of every valid partition in the image
+
+        :param path: Path to open on the filesystems
+
+        :return: Partition address, filesystem object and selected directory
+        """
+        for partition in self.partitions():
+            fs = self.fs_info(partition)
+            if fs is None:
+                continue
 
-        if fs is not None and root is not None:
             try:
-                for fs_object in root:
-                    if self.nameless_dir(fs_object):
-                        continue
-
-                    try:
-                        file_name = fs_object.info.name.name.decode('UTF-8')
-
-                        if file_name.lower() == filename.lower():
-                            return self.hash_file(fs_object) if hashing else \
-                                self.read_file(fs_object)
-                    except IOError:
-                        pass
-            except RuntimeError:
-                pass
+                # noinspection PyArgumentList
+                yield partition, fs, fs.open_dir(path=path)
+            except (IOError, RuntimeError):
+                continue
+
+    def partitions(self) -> List[int]:
+        """
+        Get the addresses of all valid partitions in the image
+
+        :return: Partition addresses
+        """
+        vol, _ = self.get_handle()
 
-        return '' if hashing else None
+        if vol is None:
+            return [1]
 
-    def files(self, search_str: str = None) -> \
-            List[List[Union[str, datetime]]]:
+        return [part.addr for part in vol if self.partition_check(part)]
+
+    def records(self, search_str: str = None) -> RecordStore:
         """
-        Get all files in an image
+        Get all files in an image as a compact record store
 
         :param search_str: Search for a specific regex match
 
-        :return: Files in the image
+        :return: Record store with the files in the image
         """
-        vol, img = self.get_handle()
-        recursed_data = []
+        return RecordStore(self.iter_records(search_str))
 
-        # Open FS and Recurse
-        if vol is not None:
-            for part in vol:
-                if self.partition_check(part):
-                    fs, root = self.open_fs(img, vol, '/', part)
-                    if fs is not None and root is not None:
-                        data = self.recurse_files(part.addr, fs, root, [],
-                                                  [], [''], search_str)
-                        recursed_data.append(data)
-        else:
-            fs, root = self.open_fs_single_vol(img, '/')
-            if fs is not None and root is not None:
-                data = self.recurse_files(1, fs, root, [], [], [''],
-                                          search_str)
-                recursed_data.append(data)
+    def iter_records(self, search_str: str = None) -> Iterator[Record]:
+        """
+        Iterate over the records of all files in an image, the image is only
+        walked when the catalog of the image isn't complete yet
 
-        return recursed_data
+        :param search_str: Search for a specific regex match
 
-    def recurse_files(self, part: int, fs: FS_Info,
-                      root_dir: Directory, dirs: List[Directory],
-                      data: List[List[Union[str, datetime]]],
-                      parent: List[str], search_str: str = None) -> \
-            List[List[Union[str, datetime]]]:
+        :return: Records of the files in the image
         """
-        Recurse over all the folder in the image
+        catalog = Catalog(self.image_identity())
 
-        :param part: Partition in the image
-        :param fs: Filesystem
-        :param root_dir: Current directory
-        :param dirs: All directories in the current directory
-        :param data: All files and directories in the current directory
-        :param parent: Parent directory
+        try:
+            if not catalog.is_complete():
+                yield from self.catalog_files(catalog, search_str)
+            else:
+                yield from catalog.records(search_str=search_str)
+        finally:
+            catalog.close()
+
+    def catalog_files(self, catalog: Catalog, search_str: str = None) -> \
+            Iterator[Record]:
+        """
+        Walk all files in the image and write them to the catalog, the catalog
+        is committed at every checkpoint so an interrupted walk resumes after
+        the last checkpoint instead of starting over
+
+        :param catalog: Catalog of the image
         :param search_str: Search for a specific regex match
 
-        :return: All recursed data
+        :return: Records of the files in the image
         """
-        # print('Recurse')
-        dirs.append(root_dir.info.fs_file.meta.addr)
-        for fs_object in root_dir:
-            # Skip '.', '..' or directory entries without a name.
-            if self.nameless_dir(fs_object):
+        catalog.lock()
+
+        try:
+            # Another process could have written the catalog while we were
+            # waiting for the lock.
+            if catalog.is_complete():
+                catalog.unlock()
+
+                yield from catalog.records(search_str=search_str)
+                return
+
+            units = catalog.checkpoint()
+
+            if units > 0:
+                self.logger.info('Resuming catalog {} after {} units'.format(
+                    catalog.path, units))
+
+                yield from catalog.records(search_str=search_str)
+            else:
+                self.logger.info('Writing catalog {}'.format(catalog.path))
+
+            catalog.begin()
+
+            if units == 0:
+                catalog.clear()
+
+            checkpoint = monotonic()
+            for records in self.walk_units(self.PARALLEL_WALK, units):
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) == self.CATALOG_BATCH:
+                        catalog.add(batch)
+                        batch = []
+
+                    if search_str is None or \
+                            Catalog.regexp(search_str, record[1]):
+                        yield record
+
+                catalog.add(batch)
+                units += 1
+
+                if monotonic() - checkpoint >= self.CHECKPOINT_INTERVAL:
+                    catalog.set_checkpoint(units)
+                    catalog.commit()
+                    catalog.begin()
+                    checkpoint = monotonic()
+
+            catalog.set_checkpoint(units)
+            catalog.mark_complete()
+            catalog.commit()
+        finally:
+            if catalog.connection.in_transaction:
+                catalog.rollback()
+
+            catalog.unlock()
+
+    def walk_plan(self) -> List[Union[List[Record],
+                                      Tuple[int, Union[int, None], str]]]:
+        """
+        Split the walk of all valid partitions in units, a unit is either a
+        list of entries in a root directory or a task that walks a partition
+        or a top level directory. NTFS partitions are always a single task so
+        they are listed from the $MFT. Walking the units in order gives the
+        same order as walking the partitions one by one.
+
+        :return: Units of the walk
+        """
+        units = []
+
+        for part, fs, root in self.file_systems('/'):
+            if not self.SPLIT_SUBTREES or self.use_mft(fs):
+                units.append((part, None, ''))
                 continue
-            try:
-                file_name = fs_object.info.name.name.decode('UTF-8')
-                file_path = '{}/{}'.format(
-                    '/'.join(parent),
-                    fs_object.info.name.name.decode('UTF-8'))
+
+            root_inode = root.info.fs_file.meta.addr
+            entries = []
+
+            for fs_object in root:
                 try:
-                    if fs_object.info.meta.type == TSK_FS_META_TYPE_DIR:
-                        f_type = 'DIR'
-                        file_ext = ''
-                    else:
-                        f_type = 'FILE'
-                        file_ext = file_name.rsplit('.')[-1].lower() \
-                            if '.' in file_name else ''
-                except AttributeError:
+                    record = self.directory_entry(part, fs_object, '')
+                except IOError:
                     continue
 
-                if search_str is None or search(search_str,
-                                                file_name,
-                                                I) is not None:
-                    size = fs_object.info.meta.size
-                    create = self.convert_time(fs_object.info.meta.crtime)
-                    change = self.convert_time(fs_object.info.meta.ctime)
-                    modify = self.convert_time(fs_object.info.meta.mtime)
-
-                    data.append(
-                        ['PARTITION {}'.format(part), file_name, file_ext,
-                         f_type, create, change, modify, size, file_path])
-
-                if f_type == 'DIR':
-                    parent.append(fs_object.info.name.name.decode('UTF-8'))
-                    sub_directory = fs_object.as_directory()
-                    inode = fs_object.info.meta.addr
-
-                    # This ensures that we don't recurse into a directory
-                    # above the current level and thus avoid circular loops.
-                    if inode not in dirs:
-                        self.recurse_files(part, fs, sub_directory,
-                                           dirs, data, parent, search_str)
-                    parent.pop(-1)
+                if record is None:
+                    continue
 
-            except IOError:
-                pass
-        dirs.pop(-1)
-        return data
+                entries.append(record)
+                if record[3] == 'DIR' and record[9] != root_inode:
+                    units.append(entries)
+                    units.append((part, record[9], record[8]))
+                    entries = []
 
-    @staticmethod
-    def read_file(fs_object: File) -> bytes:
+            if len(entries) > 0:
+                units.append(entries)
+
+        return units
+
+    def walk_units(self, parallel: bool = False, skip: int = 0) -> \
+            Iterator[Iterable[Record]]:
         """
-        Read the bytes from an fs_object file
+        Walk the units of the image in order, tasks are walked by their own
+        worker when walking on multiple processes
 
-        :param fs_object: fs_oject from the image
+        :param parallel: Walk the tasks on multiple processes
+        :param skip: Number of units that have already been walked
 
-        :return: Bytes of the fs_object file
+        :return: Records of every unit
         """
-        offset = 0
-        size = getattr(fs_object.info.meta, "size", 0)
+        units = self.walk_plan()[skip:]
+        tasks = [unit for unit in units if isinstance(unit, tuple)]
+
+        if not parallel or len(tasks) == 0:
+            for unit in units:
+                yield unit if isinstance(unit, list) else self.run_task(unit)
+            return
 
-        return fs_object.read_random(offset, size)
+        with Pool(processes=min(self.WALK_PROCESSES, len(tasks)),
+                  initializer=HandlePool.init_worker) as pool:
+            results = pool.imap(self.walk_task, tasks)
+
+            for unit in units:
+                yield unit if isinstance(unit, list) else next(results)
+
+            pool.close()
+            pool.join()
 
     @staticmethod
-    def hash_file(fs_object: File) -> str:
+    def walk_task(task: Tuple[int, Union[int, None], str]) -> List[Record]:
         """
-        Hash an fs_object from the image
+        Walk a partition or a subtree in a worker process
 
-        :param fs_object: fs_oject from the image
+        :param task: Partition address, meta address of the directory to
+                     start in or None for the root and the path of that
+                     directory
 
-        :return: Sha256 of the fs_object file
+        :return: All walked records
         """
-        if fs_object.info.meta.type == TSK_FS_META_TYPE_DIR:
-            return ''
+        return list(HandlePool.get().run_task(task))
 
+    def run_task(self, task: Tuple[int, Union[int, None], str]) -> \
+            Iterator[Record]:
+        """
+        Walk a partition or a subtree
+
+        :param task: Partition address, meta address of the directory to
+                     start in or None for the root and the path of that
+                     directory
+
+        :return: All walked records
+        """
+        part, inode, path = task
+        fs = self.fs_info(part)
+
+        if inode is None and self.use_mft(fs):
+            return self.mft_walk(part, fs)
+
+        try:
+            if inode is None:
+                # noinspection PyArgumentList
+                directory = fs.open_dir(path='/')
+                visited = None
+            else:
+                # noinspection PyArgumentList
+                directory = fs.open_dir(inode=inode)
+                # noinspection PyArgumentList
+                visited = {fs.open_dir(path='/').info.fs_file.meta.addr}
+        except (IOError, RuntimeError):
+            return iter([])
+
+        return self.walk(part, fs, directory, path, visited)
+
+    def use_mft(self, fs: FS_Info) -> bool:
+        """
+        Check if a filesystem can be listed from its $MFT
+
+        :param fs: Filesystem
+
+        :return: Whether the $MFT fast path can be used or not
+        """
+        return self.MFT_FAST_PATH and fs.info.ftype == TSK_FS_TYPE_NTFS
+
+    def mft_walk(self, part: int, fs: FS_Info) -> Iterator[Record]:
+        """
+        List an NTFS filesystem by reading the $MFT sequentially in large
+        blocks instead of opening every directory, falls back on a directory
+        walk when the $MFT can't be read
+
+        :param part: Partition in the image
+        :param fs: NTFS filesystem
+
+        :return: All records in $MFT order
+        """
+        parser = MftParser()
+
+        try:
+            # noinspection PyArgumentList
+            mft = fs.open_meta(inode=0)
+            mft_size = mft.info.meta.size
+            data = mft.read_random(0, min(self.MFT_BLOCK_SIZE, mft_size))
+        except (IOError, RuntimeError):
+            data = b''
+
+        if len(data) == 0:
+            self.logger.warning('Unable to read the $MFT of partition {}, '
+                                'walking directories instead'.format(part))
+            # noinspection PyArgumentList
+            yield from self.walk(part, fs, fs.open_dir(path='/'))
+            return
+
+        record_size = MftParser.record_size(data)
+        # Keep every block aligned on whole records
+        block_size = max(record_size,
+                         self.MFT_BLOCK_SIZE // record_size * record_size)
         offset = 0
-        buff_size = 1024 * 1024
-        size = getattr(fs_object.info.meta, "size", 0)
 
-        sha256_sum = sha256()
-        while offset < size:
-            available_to_read = min(buff_size, size - offset)
-            data = fs_object.read_random(offset, available_to_read)
-            if not data:
+        while offset < mft_size:
+            if offset > 0:
+                try:
+                    data = mft.read_random(offset,
+                                           min(block_size, mft_size - offset))
+                except IOError:
+                    break
+
+            if len(data) == 0:
                 break
 
-            offset += len(data)
-            sha256_sum.update(data)
-        return sha256_sum.hexdigest()
+            parser.parse_block(data[:block_size], offset // record_size,
+                               record_size)
+            offset += block_size
+
+        self.logger.debug('$MFT of partition {}: {}'.format(part,
+                                                            parser.stats()))
+
+        yield from parser.records(part)
+
+    @staticmethod
+    def directory_entry(part: int, fs_object: File, parent: str) -> \
+            Union[Record, None]:
+        """
+        Create a record for an entry in a directory
+
+        :param part: Partition in the image
+        :param fs_object: Directory entry
+        :param parent: Path of the directory
+
+        :return: Record or None for '.', '..' and unreadable entries
+        """
+        # Skip '.', '..' or directory entries without a name.
+        name = getattr(getattr(fs_object.info, 'name', None), 'name', None)
+        if name is None or name in [b'.', b'..']:
+            return None
+
+        file_name = name.decode('UTF-8')
+        meta = fs_object.info.meta
+
+        try:
+            if meta.type == TSK_FS_META_TYPE_DIR:
+                f_type = 'DIR'
+                file_ext = ''
+            else:
+                f_type = 'FILE'
+                file_ext = file_name.rsplit('.')[-1].lower() \
+                    if '.' in file_name else ''
+        except AttributeError:
+            return None
+
+        return (part, file_name, file_ext, f_type, meta.crtime, meta.ctime,
+                meta.mtime, meta.size, '{}/{}'.format(parent, file_name),
+                meta.addr)
+
+    def walk(self, part: int, fs: FS_Info, root_dir: Directory,
+             parent: str = '', visited: Set[int] = None) -> \
+            Iterator[Record]:
+        """
+        Walk over all the folders in a filesystem with an explicit stack,
+        records are yielded as soon as they are found
+
+        :param part: Partition in the image
+        :param fs: Filesystem
+        :param root_dir: Directory to start the walk in
+        :param parent: Path of the directory to start the walk in
+        :param visited: Meta addresses of directories that shouldn't be
+                        walked
+
+        :return: All walked records
+        """
+        visited = set() if visited is None else set(visited)
+        visited.add(root_dir.info.fs_file.meta.addr)
+        stack = [(iter(root_dir), parent)]
+
+        while stack:
+            entries, parent = stack[-1]
+            fs_object = next(entries, None)
+
+            if fs_object is None:
+                stack.pop()
+                continue
+
+            try:
+                record = self.directory_entry(part, fs_object, parent)
+                if record is None:
+                    continue
+
+                yield record
+
+                # The visited set ensures that we don't walk into a directory
+                # twice and thus avoid circular loops.
+                if record[3] == 'DIR' and record[9] not in visited:
+                    visited.add(record[9])
+                    stack.append((iter(fs_object.as_directory()), record[8]))
+            except IOError:
+                pass
 
     @staticmethod
     def convert_time(ts: float) -> Union[str, datetime]:
@@ -483,4 +1485,56 @@ class ImageHandler:
 
         :return: UTC timestamp
         """
-        return '' if str(ts) == '0' else datetime.utcfromtimestamp(ts)
+        return RecordStore.convert_time(ts)
+
+
+class HandlePool:
+    handlers = {}
+    pid = None
+
+    @staticmethod
+    def get() -> ImageHandler:
+        """
+        Get the image handler of the selected image for the current process,
+        the image, volume and filesystem handles are opened once per process
+        and reused for every file
+
+        :return: Image handler
+        """
+        # Handles inherited from a parent process share their file offsets,
+        # every process opens the image on its own.
+        if HandlePool.pid != getpid():
+            HandlePool.handlers = {}
+            HandlePool.pid = getpid()
+            Finalize(None, HandlePool.close, exitpriority=10)
+
+        image = ImageStore().image_store.get_state()
+        if image not in HandlePool.handlers:
+            HandlePool.handlers[image] = ImageHandler()
+
+        return HandlePool.handlers[image]
+
+    @staticmethod
+    def init_worker() -> None:
+        """
+        Initializer for worker processes, opens the image before the first
+        task arrives
+
+        :return: None
+        """
+        HandlePool.get()
+
+    @staticmethod
+    def close() -> None:
+        """
+        Close all image handlers of the current process
+
+        :return: None
+        """
+        if HandlePool.pid != getpid():
+            return
+
+        for handler in HandlePool.handlers.values():
+            handler.close()
+
+        HandlePool.handlers = {}
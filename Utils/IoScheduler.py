@@ -0,0 +1,51 @@
+from typing import Any, List
+
+
+class IoScheduler:
+    @staticmethod
+    def order(jobs: List[Any], offsets: List[int]) -> List[Any]:
+        """
+        Sort jobs on the offset of their data in the image
+
+        :param jobs: Jobs to sort
+        :param offsets: Offset in the image of every job
+
+        :return: Jobs in the order of their offsets
+        """
+        return [jobs[i] for i in sorted(range(len(jobs)),
+                                        key=offsets.__getitem__)]
+
+    @staticmethod
+    def batches(jobs: List[Any], offsets: List[int], sizes: List[int],
+                max_bytes: int, max_jobs: int) -> List[List[Any]]:
+        """
+        Split jobs in batches that each cover a contiguous range of the
+        image, a batch is closed when it reaches the maximum number of bytes
+        or jobs
+
+        :param jobs: Jobs to split
+        :param offsets: Offset in the image of every job
+        :param sizes: Number of bytes every job reads
+        :param max_bytes: Maximum number of bytes in a batch
+        :param max_jobs: Maximum number of jobs in a batch
+
+        :return: Batches of jobs in the order of their offsets
+        """
+        batches = []
+        batch = []
+        batch_bytes = 0
+
+        for i in sorted(range(len(jobs)), key=offsets.__getitem__):
+            if len(batch) > 0 and (batch_bytes + sizes[i] > max_bytes or
+                                   len(batch) == max_jobs):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+
+            batch.append(jobs[i])
+            batch_bytes += sizes[i]
+
+        if len(batch) > 0:
+            batches.append(batch)
+
+        return batches
@@ -0,0 +1,85 @@
+from pathlib import Path
+from sqlite3 import connect
+from typing import Dict, Iterable, Tuple
+
+from Utils.Cache import Cache
+
+
+class Journal:
+    BUSY_TIMEOUT = 3600
+
+    def __init__(self, identity: str, module: str) -> None:
+        self.identity = identity
+        self.module = module
+        self.path = self.get_journal_path(identity, module)
+
+        self.connection = connect(str(self.path),
+                                  timeout=self.BUSY_TIMEOUT,
+                                  isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                'stage TEXT, '
+                                'id INTEGER, '
+                                'path TEXT, '
+                                'value TEXT, '
+                                'PRIMARY KEY (stage, id))')
+
+    @staticmethod
+    def get_journal_path(identity: str, module: str) -> Path:
+        """
+        Get the path of the journal of a module for an image
+
+        :param identity: Identity of the image
+        :param module: Name of the module
+
+        :return: Path to the journal database
+        """
+        cache_path = Cache.get_cache_folder()
+
+        return Path(cache_path.joinpath('{}.{}.journal'.format(identity,
+                                                               module)))
+
+    def add(self, stage: str, results: Iterable[Tuple[int, str, str]]) -> \
+            None:
+        """
+        Write the results of a stage to the journal in a single transaction
+
+        :param stage: Name of the stage, for example 'hashing'
+        :param results: Id, path and result of every file
+
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO results (stage, id, path, value) '
+                'VALUES (?, ?, ?, ?)',
+                ((stage, *result) for result in results))
+
+    def results(self, stage: str) -> Dict[int, Tuple[str, str]]:
+        """
+        Get the results of a stage that have been written by an earlier run
+
+        :param stage: Name of the stage
+
+        :return: Path and result by id
+        """
+        return {row[0]: (row[1], row[2]) for row in self.connection.execute(
+            'SELECT id, path, value FROM results WHERE stage = ?', (stage,))}
+
+    def clear(self) -> None:
+        """
+        Remove all results from the journal
+
+        :return: None
+        """
+        self.connection.execute('DELETE FROM results')
+
+    def close(self) -> None:
+        """
+        Close the journal database
+
+        :return: None
+        """
+        self.connection.close()
@@ -0,0 +1,301 @@
+from struct import unpack_from
+from typing import Dict, Iterator, List, Tuple, Union
+
+from Utils.Catalog import Record
+
+
+class MftParser:
+    SIGNATURE = b'FILE'
+    ROOT = 5
+    ORPHANS = '/$OrphanFiles'
+
+    FLAG_IN_USE = 0x01
+    FLAG_DIRECTORY = 0x02
+
+    ATTRIBUTE_STANDARD_INFORMATION = 0x10
+    ATTRIBUTE_FILE_NAME = 0x30
+    ATTRIBUTE_DATA = 0x80
+    ATTRIBUTE_END = 0xFFFFFFFF
+
+    NAMESPACE_DOS = 2
+
+    # Difference between the Windows epoch (1601) and the Unix epoch (1970)
+    # in 100 nanosecond intervals
+    FILETIME_EPOCH = 116444736000000000
+    # TSK reports times as 32 bit unix timestamps, times outside that range
+    # are reported as no time
+    MAX_TIME = (1 << 32) - 1
+
+    def __init__(self) -> None:
+        # Record number -> (sequence, directory)
+        self.entries = {}
+        # Record number -> (create, change, modify)
+        self.times = {}
+        # Record number -> size of the unnamed data stream
+        self.sizes = {}
+        # Record number -> [(parent, parent sequence, name, namespace)]
+        self.names = {}
+
+        self.paths = {self.ROOT: ''}
+
+    @staticmethod
+    def record_size(data: bytes) -> int:
+        """
+        Get the size of a single record from the first record of the $MFT
+
+        :param data: Start of the $MFT
+
+        :return: Size of a record in bytes
+        """
+        if data[:4] != MftParser.SIGNATURE:
+            return 1024
+
+        return unpack_from('<I', data, 0x1C)[0]
+
+    @staticmethod
+    def convert_time(filetime: int) -> int:
+        """
+        Convert a Windows FILETIME to an epoch timestamp
+
+        :param filetime: 100 nanosecond intervals since 1601
+
+        :return: Epoch timestamp in seconds, 0 when the time doesn't fit in
+                 the 32 bit timestamps TSK reports
+        """
+        if filetime < MftParser.FILETIME_EPOCH:
+            return 0
+
+        ts = (filetime - MftParser.FILETIME_EPOCH) // 10000000
+
+        return ts if ts <= MftParser.MAX_TIME else 0
+
+    @staticmethod
+    def apply_fixups(record: bytearray) -> bool:
+        """
+        Replace the update sequence numbers at the end of every sector with
+        the original bytes
+
+        :param record: Raw record, changed in place
+
+        :return: Whether the record is consistent or not
+        """
+        usa_offset, usa_count = unpack_from('<HH', record, 0x04)
+
+        if usa_count < 2 or usa_offset + usa_count * 2 > len(record):
+            return False
+
+        stride = len(record) // (usa_count - 1)
+        usn = record[usa_offset:usa_offset + 2]
+
+        for i in range(1, usa_count):
+            end = i * stride
+            if record[end - 2:end] != usn:
+                return False
+
+            fixup = usa_offset + i * 2
+            record[end - 2:end] = record[fixup:fixup + 2]
+
+        return True
+
+    def parse_block(self, data: bytes, first_record: int,
+                    record_size: int) -> None:
+        """
+        Parse a block of consecutive records from the $MFT
+
+        :param data: Raw records
+        :param first_record: Record number of the first record in the block
+        :param record_size: Size of a single record in bytes
+
+        :return: None
+        """
+        for i in range(len(data) // record_size):
+            offset = i * record_size
+
+            if data[offset:offset + 4] != self.SIGNATURE:
+                continue
+
+            self.parse_record(
+                bytearray(data[offset:offset + record_size]),
+                first_record + i)
+
+    def parse_record(self, record: bytearray, number: int) -> None:
+        """
+        Parse a single FILE record
+
+        :param record: Raw record
+        :param number: Record number
+
+        :return: None
+        """
+        if not self.apply_fixups(record):
+            return
+
+        sequence, _, attribute_offset, flags = unpack_from('<HHHH', record,
+                                                           0x10)
+        base = unpack_from('<Q', record, 0x20)[0] & 0xFFFFFFFFFFFF
+
+        if not flags & self.FLAG_IN_USE:
+            return
+
+        # Extension records hold attributes of their base record
+        if base == 0:
+            self.entries[number] = (sequence,
+                                    bool(flags & self.FLAG_DIRECTORY))
+        else:
+            number = base
+
+        used = min(unpack_from('<I', record, 0x18)[0], len(record))
+        offset = attribute_offset
+
+        while offset + 16 <= used:
+            attribute_type, length = unpack_from('<II', record, offset)
+
+            if attribute_type == self.ATTRIBUTE_END or length == 0 or \
+                    offset + length > used:
+                break
+
+            self.parse_attribute(record, offset, attribute_type, number)
+            offset += length
+
+    def parse_attribute(self, record: bytearray, offset: int,
+                        attribute_type: int, number: int) -> None:
+        """
+        Parse the attributes that are needed for a file listing
+
+        :param record: Raw record
+        :param offset: Offset of the attribute in the record
+        :param attribute_type: Type of the attribute
+        :param number: Record number of the base record
+
+        :return: None
+        """
+        non_resident, name_length = unpack_from('<BB', record, offset + 8)
+
+        if non_resident:
+            if attribute_type == self.ATTRIBUTE_DATA and name_length == 0 \
+                    and unpack_from('<Q', record, offset + 16)[0] == 0:
+                self.sizes[number] = unpack_from('<Q', record, offset + 48)[0]
+            return
+
+        content_size, content_offset = unpack_from('<IH', record, offset + 16)
+        content = offset + content_offset
+
+        if attribute_type == self.ATTRIBUTE_STANDARD_INFORMATION:
+            create, modify, change = unpack_from('<QQQ', record, content)
+            self.times[number] = (self.convert_time(create),
+                                  self.convert_time(change),
+                                  self.convert_time(modify))
+        elif attribute_type == self.ATTRIBUTE_FILE_NAME:
+            parent = unpack_from('<Q', record, content)[0]
+            length, namespace = unpack_from('<BB', record, content + 64)
+            name = bytes(record[content + 66:content + 66 + length * 2])
+
+            self.names.setdefault(number, []).append((
+                parent & 0xFFFFFFFFFFFF,
+                parent >> 48,
+                name.decode('UTF-16-LE', 'replace'),
+                namespace))
+
+            # Fall back on the times in the file name for records without
+            # a standard information attribute
+            if number not in self.times:
+                create, modify, change = unpack_from('<QQQ', record,
+                                                     content + 8)
+                self.times[number] = (self.convert_time(create),
+                                      self.convert_time(change),
+                                      self.convert_time(modify))
+        elif attribute_type == self.ATTRIBUTE_DATA and name_length == 0:
+            self.sizes[number] = content_size
+
+    def links(self, number: int) -> List[Tuple[int, str]]:
+        """
+        Get the parent and name of every hard link of a record, DOS names are
+        only used when there is no other name in the same directory
+
+        :param number: Record number
+
+        :return: Parent record number and name of every link
+        """
+        links = {}
+
+        for parent, sequence, name, namespace in self.names.get(number, []):
+            if parent not in self.entries or \
+                    (sequence != 0 and self.entries[parent][0] != sequence):
+                parent = None
+
+            if parent not in links or \
+                    links[parent][1] == self.NAMESPACE_DOS:
+                links[parent] = (name, namespace)
+
+        return [(parent, name) for parent, (name, _) in links.items()]
+
+    def path(self, number: Union[int, None]) -> str:
+        """
+        Get the full path of a directory, directories that can't be traced
+        back to the root end up in the orphan files directory
+
+        :param number: Record number of the directory
+
+        :return: Full path of the directory
+        """
+        chain = []
+        seen = set()
+
+        while number not in self.paths:
+            links = self.links(number) if number is not None else []
+
+            if number in seen or len(links) == 0:
+                base = self.ORPHANS
+                break
+
+            seen.add(number)
+            chain.append((number, links[0][1]))
+            number = links[0][0]
+        else:
+            base = self.paths[number]
+
+        for directory, name in reversed(chain):
+            base = '{}/{}'.format(base, name)
+            self.paths[directory] = base
+
+        return base
+
+    def records(self, part: int) -> Iterator[Record]:
+        """
+        Get the walker records of all files in the parsed records
+
+        :param part: Partition in the image
+
+        :return: All records in $MFT order
+        """
+        for number in sorted(self.entries):
+            if number == self.ROOT:
+                continue
+
+            directory = self.entries[number][1]
+            create, change, modify = self.times.get(number, (0, 0, 0))
+            size = self.sizes.get(number, 0)
+
+            for parent, file_name in self.links(number):
+                if directory:
+                    f_type = 'DIR'
+                    file_ext = ''
+                else:
+                    f_type = 'FILE'
+                    file_ext = file_name.rsplit('.')[-1].lower() \
+                        if '.' in file_name else ''
+
+                yield (part, file_name, file_ext, f_type, create, change,
+                       modify, size,
+                       '{}/{}'.format(self.path(parent), file_name), number)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of parsed records
+
+        :return: Parser statistics
+        """
+        return {
+            'records': len(self.entries),
+            'directories': len(self.paths) - 1
+        }
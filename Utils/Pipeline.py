@@ -0,0 +1,202 @@
+from multiprocessing import Pool, cpu_count
+from queue import Queue
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
+
+from Utils.Logging.Logging import Logging
+
+Result = Tuple[Any, Any, Union[str, None]]
+
+
+class Pipeline:
+    CHUNK_SIZE = 64
+    CHUNKS_PER_PROCESS = 2
+
+    def __init__(self, processes: int = None, initializer: Callable = None,
+                 progress: Callable[[int, Union[int, None]], None] = None) \
+            -> None:
+        """
+        Run tasks on multiple processes in chunks, only a limited number of
+        chunks is in flight so results are streamed back while the rest of
+        the input is still waiting. The worker processes are started when
+        entering the context and are reused by every map
+
+        :param processes: Number of worker processes, cpu count when None
+        :param initializer: Initializer of the worker processes
+        :param progress: Called with the number of finished tasks and the
+                         total number of tasks, or None when unknown, after
+                         every chunk
+        """
+        self.logger = Logging(self.__class__.__name__).logger
+        self.processes = processes or cpu_count()
+        self.initializer = initializer
+        self.progress = progress
+        self.max_chunks = self.processes * self.CHUNKS_PER_PROCESS
+        self.errors = []
+        self.pool = None
+
+    def __enter__(self) -> 'Pipeline':
+        self.pool = Pool(processes=self.processes,
+                         initializer=self.initializer)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            # Let the workers exit so they close their image handles
+            self.pool.close()
+        else:
+            self.pool.terminate()
+
+        self.pool.join()
+        self.pool = None
+
+    @staticmethod
+    def run_chunk(func: Callable[[Any], Any],
+                  chunk: List[Tuple[Any, Any]]) -> List[Result]:
+        """
+        Run a task for every item in a chunk, an exception only fails its own
+        task
+
+        :param func: Task
+        :param chunk: Tag and argument of every task
+
+        :return: Tag, result and error of every task
+        """
+        results = []
+
+        for tag, item in chunk:
+            try:
+                results.append((tag, func(item), None))
+            except Exception as e:
+                results += Pipeline.failed([(tag, item)], e)
+
+        return results
+
+    @staticmethod
+    def failed(chunk: List[Tuple[Any, Any]], error: BaseException) -> \
+            List[Result]:
+        """
+        Fail every task in a chunk that couldn't be run at all, for example
+        because an argument couldn't be pickled
+
+        :param chunk: Tag and argument of every task
+        :param error: Exception raised by the pool
+
+        :return: Tag, result and error of every task
+        """
+        return [(tag, None, '{}: {}'.format(error.__class__.__name__, error))
+                for tag, _ in chunk]
+
+    def check(self, results: List[Result]) -> List[Result]:
+        """
+        Log and keep the errors of the tasks in a chunk
+
+        :param results: Tag, result and error of every task
+
+        :return: The same results
+        """
+        for result in results:
+            if result[2] is not None:
+                self.logger.warning('Task {} failed: {}'.format(result[0],
+                                                                result[2]))
+                self.errors.append(result)
+
+        return results
+
+    @staticmethod
+    def chunks(items: Iterable[Any], chunk_size: int) -> \
+            Iterator[List[Tuple[int, Any]]]:
+        """
+        Split items in chunks, every item is tagged with its index
+
+        :param items: Arguments of the tasks
+        :param chunk_size: Number of tasks in a chunk
+
+        :return: Chunks of tagged items
+        """
+        chunk = []
+
+        for index, item in enumerate(items):
+            chunk.append((index, item))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+
+        if len(chunk) > 0:
+            yield chunk
+
+    def map(self, func: Callable[[Any], Any], items: Iterable[Any],
+            ordered: bool = False, chunk_size: int = None) -> \
+            Iterator[Result]:
+        """
+        Run a task for every item
+
+        :param func: Task, must be picklable
+        :param items: Arguments of the tasks
+        :param ordered: Yield the results in the order of the items
+        :param chunk_size: Number of tasks in a chunk
+
+        :return: Index, result and error of every task
+        """
+        total = len(items) if hasattr(items, '__len__') else None
+
+        return self.map_chunks(func,
+                               self.chunks(items,
+                                           chunk_size or self.CHUNK_SIZE),
+                               ordered, total)
+
+    def map_chunks(self, func: Callable[[Any], Any],
+                   chunks: Iterable[List[Tuple[Any, Any]]],
+                   ordered: bool = False, total: int = None) -> \
+            Iterator[Result]:
+        """
+        Run a task for every item in chunks that are made by the caller
+
+        :param func: Task, must be picklable
+        :param chunks: Chunks of tag and argument pairs
+        :param ordered: Yield the results in the order of the chunks
+        :param total: Total number of tasks for the progress callback
+
+        :return: Tag, result and error of every task
+        """
+        finished = Queue()
+        source = enumerate(chunks)
+        buffered = {}
+        submitted = 0
+        yielded = 0
+        done = 0
+
+        while True:
+            # Results that are waiting to be yielded count as in flight
+            # so an ordered run can't run ahead of a slow chunk
+            while submitted - yielded < self.max_chunks:
+                number, chunk = next(source, (None, None))
+                if chunk is None:
+                    break
+
+                self.pool.apply_async(
+                    self.run_chunk, (func, chunk),
+                    callback=lambda r, n=number: finished.put((n, r)),
+                    error_callback=lambda e, n=number, c=chunk:
+                    finished.put((n, self.failed(c, e))))
+                submitted += 1
+
+            if submitted == yielded:
+                break
+
+            number, results = finished.get()
+            buffered[number] = results
+
+            while len(buffered) > 0:
+                number = yielded if ordered else next(iter(buffered))
+                if number not in buffered:
+                    break
+
+                results = buffered.pop(number)
+                yielded += 1
+                done += len(results)
+
+                yield from self.check(results)
+
+                if self.progress is not None:
+                    self.progress(done, total)
@@ -0,0 +1,267 @@
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Union
+
+from Utils.Catalog import Record
+
+
+class RecordStore:
+    TYPES = ['FILE', 'DIR']
+
+    def __init__(self, records: Iterable[Record] = ()) -> None:
+        self.partition_table = []
+        self.ext_table = []
+        self.directory_table = []
+        # Types detected from the content, '' until a type is set
+        self.kind_table = ['']
+        self.lookup = {
+            'partition': {},
+            'ext': {},
+            'directory': {},
+            'kind': {'': 0}
+        }
+
+        self.partition = array('L')
+        self.name = []
+        self.ext = array('L')
+        self.type = array('B')
+        self.crtime = array('q')
+        self.ctime = array('q')
+        self.mtime = array('q')
+        self.size = array('q')
+        self.directory = array('L')
+        self.inode = array('q')
+        self.kind = array('B')
+
+        self.extend(records)
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def intern(self, table: List, column: str,
+               value: Union[int, str]) -> int:
+        """
+        Get the index of a value in an interned table, the value is added to
+        the table when it isn't in there yet
+
+        :param table: Table with the unique values
+        :param column: Name of the column
+        :param value: Value to intern
+
+        :return: Index of the value in the table
+        """
+        index = self.lookup[column].get(value)
+
+        if index is None:
+            index = len(table)
+            table.append(value)
+            self.lookup[column][value] = index
+
+        return index
+
+    def append(self, record: Record) -> None:
+        """
+        Add a single walker record to the store
+
+        :param record: Record from the walker or the catalog
+
+        :return: None
+        """
+        part, file_name, file_ext, f_type, create, change, modify, size, \
+            file_path, inode = record
+
+        directory = file_path[:len(file_path) - len(file_name)]
+
+        self.partition.append(
+            self.intern(self.partition_table, 'partition', part))
+        self.name.append(file_name)
+        self.ext.append(self.intern(self.ext_table, 'ext', file_ext))
+        self.type.append(self.TYPES.index(f_type))
+        self.crtime.append(create or 0)
+        self.ctime.append(change or 0)
+        self.mtime.append(modify or 0)
+        self.size.append(size or 0)
+        self.directory.append(
+            self.intern(self.directory_table, 'directory', directory))
+        self.inode.append(-1 if inode is None or inode == '' else inode)
+        self.kind.append(0)
+
+    def extend(self, records: Iterable[Record]) -> None:
+        """
+        Add walker records to the store
+
+        :param records: Records from the walker or the catalog
+
+        :return: None
+        """
+        for record in records:
+            self.append(record)
+
+    def record(self, index: int) -> Record:
+        """
+        Get a single record from the store
+
+        :param index: Index of the record
+
+        :return: Record in the walker format
+        """
+        inode = self.inode[index]
+
+        return (self.partition_table[self.partition[index]],
+                self.name[index],
+                self.ext_table[self.ext[index]],
+                self.TYPES[self.type[index]],
+                self.crtime[index],
+                self.ctime[index],
+                self.mtime[index],
+                self.size[index],
+                self.directory_table[self.directory[index]] +
+                self.name[index],
+                '' if inode < 0 else inode)
+
+    def set_kind(self, index: int, kind: str) -> None:
+        """
+        Set the type of a record that was detected from its content
+
+        :param index: Index of the record
+        :param kind: Detected type, for example 'zip' or 'text'
+
+        :return: None
+        """
+        self.kind[index] = self.intern(self.kind_table, 'kind', kind)
+
+    def get_kind(self, index: int) -> str:
+        """
+        Get the type of a record that was detected from its content
+
+        :param index: Index of the record
+
+        :return: Detected type, an empty string when it isn't known
+        """
+        return self.kind_table[self.kind[index]]
+
+    def row(self, index: int) -> List[Union[str, int, datetime]]:
+        """
+        Get a single record as a file listing row
+
+        :param index: Index of the record
+
+        :return: File information
+        """
+        return self.format_record(self.record(index))
+
+    def rows(self, indexes: Iterable[int] = None) -> \
+            Iterator[List[Union[str, int, datetime]]]:
+        """
+        Get records as file listing rows
+
+        :param indexes: Indexes of the records, all records when None
+
+        :return: File information
+        """
+        for index in range(len(self)) if indexes is None else indexes:
+            yield self.row(index)
+
+    def partitions(self) -> List[int]:
+        """
+        Get all partitions in the store
+
+        :return: Partition addresses in walk order
+        """
+        return list(self.partition_table)
+
+    def select(self, partition: int = None, extensions: List[str] = None,
+               f_type: str = None, kinds: List[str] = None) -> List[int]:
+        """
+        Get the indexes of all records that match the filters
+
+        :param partition: Partition address
+        :param extensions: Lower case file extensions
+        :param f_type: 'FILE' or 'DIR'
+        :param kinds: Detected types, a record matches when it has one of
+                      the extensions or one of the detected types
+
+        :return: Indexes of the matching records
+        """
+        checks = []
+
+        if partition is not None:
+            checks.append([(self.partition, {
+                self.lookup['partition'].get(partition)})])
+
+        if extensions is not None or kinds is not None:
+            checks.append([(self.ext, {self.lookup['ext'][ext]
+                                       for ext in extensions or []
+                                       if ext in self.lookup['ext']}),
+                           (self.kind, {self.lookup['kind'][kind]
+                                        for kind in kinds or []
+                                        if kind in self.lookup['kind']})])
+
+        if f_type is not None:
+            checks.append([(self.type, {self.TYPES.index(f_type)})])
+
+        return [index for index in range(len(self))
+                if all(any(column[index] in values
+                           for column, values in check) for check in checks)]
+
+    def order_by(self, column: str, indexes: List[int] = None) -> List[int]:
+        """
+        Sort indexes on one of the integer columns
+
+        :param column: Name of the column, for example 'mtime' or 'size'
+        :param indexes: Indexes to sort, all records when None
+
+        :return: Sorted indexes
+        """
+        values = getattr(self, column)
+
+        return sorted(range(len(self)) if indexes is None else indexes,
+                      key=values.__getitem__)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of records and unique values in the interned tables
+
+        :return: Store statistics
+        """
+        return {
+            'records': len(self),
+            'partitions': len(self.partition_table),
+            'extensions': len(self.ext_table),
+            'directories': len(self.directory_table)
+        }
+
+    @staticmethod
+    def format_record(record: Record) -> List[Union[str, int, datetime]]:
+        """
+        Format a walker record as a file listing row
+
+        :param record: Record from the walker or the catalog
+
+        :return: File information
+        """
+        part, file_name, file_ext, f_type, create, change, modify, size, \
+            file_path, inode = record
+
+        return ['PARTITION {}'.format(part), file_name, file_ext, f_type,
+                RecordStore.convert_time(create),
+                RecordStore.convert_time(change),
+                RecordStore.convert_time(modify), size, file_path, inode]
+
+    @staticmethod
+    def convert_time(ts: int) -> Union[str, datetime]:
+        """
+        Covert an epoch timestamp to an UTC date time
+
+        :param ts: Epoch timestamp
+
+        :return: UTC date time or an empty string when there is no timestamp
+                 or the timestamp is out of range
+        """
+        if not ts:
+            return ''
+
+        try:
+            return datetime.utcfromtimestamp(ts)
+        except (OverflowError, OSError, ValueError):
+            return ''
@@ -0,0 +1,116 @@
+from codecs import getincrementaldecoder
+from typing import Dict, List, Tuple
+
+from Utils.HashEngine import Consumer
+
+
+class Sniffer:
+    SNIFF_SIZE = 512
+    # Offset, magic bytes and type
+    SIGNATURES = [
+        (0, b'PK\x03\x04', 'zip'),
+        (0, b'PK\x05\x06', 'zip'),
+        (0, b'\x1f\x8b', 'gz'),
+        (0, b'BZh', 'bz2'),
+        (0, b'\xfd7zXZ\x00', 'xz'),
+        (257, b'ustar', 'tar'),
+        (0, b'7z\xbc\xaf\x27\x1c', '7z'),
+        (0, b'Rar!\x1a\x07', 'rar'),
+        (0, b'\xff\xd8\xff', 'jpeg'),
+        (0, b'\x89PNG\r\n\x1a\n', 'png'),
+        (0, b'GIF87a', 'gif'),
+        (0, b'GIF89a', 'gif'),
+        (0, b'II*\x00', 'tiff'),
+        (0, b'MM\x00*', 'tiff'),
+        (0, b'%PDF-', 'pdf'),
+        (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole'),
+        (0, b'SQLite format 3\x00', 'sqlite'),
+        (0, b'MZ', 'exe'),
+        (0, b'\x7fELF', 'elf'),
+        (0, b'\xef\xbb\xbf', 'text'),
+        (0, b'\xff\xfe', 'text'),
+        (0, b'\xfe\xff', 'text')
+    ]
+    TEXT = 'text'
+    # Filled with the compiled signatures when the module is loaded
+    TABLE = []
+    # Control characters that don't appear in text files
+    BINARY = set(range(0, 32)) - {8, 9, 10, 12, 13, 27}
+
+    @staticmethod
+    def compile(signatures: List[Tuple[int, bytes, str]]) -> \
+            List[Tuple[int, List[Tuple[int, Dict[bytes, str]]]]]:
+        """
+        Group the signatures by offset and by length, a lookup is a single
+        dict lookup for every length. Longer signatures are tried first so
+        they win over a shorter signature with the same start
+
+        :param signatures: Offset, magic bytes and type of every signature
+
+        :return: Signatures by length by offset
+        """
+        table = {}
+
+        for offset, magic, kind in signatures:
+            table.setdefault(offset, {}).setdefault(len(magic), {})[magic] = \
+                kind
+
+        return [(offset, sorted(lengths.items(), reverse=True))
+                for offset, lengths in sorted(table.items(), reverse=True)]
+
+    @staticmethod
+    def detect(head: bytes) -> str:
+        """
+        Detect the type of a file by its first bytes
+
+        :param head: First SNIFF_SIZE bytes of the file
+
+        :return: Type of the file, 'text' for text without a signature or an
+                 empty string when the type is unknown
+        """
+        for offset, lengths in Sniffer.TABLE:
+            for length, magics in lengths:
+                kind = magics.get(head[offset:offset + length])
+                if kind is not None:
+                    return kind
+
+        if len(head) > 0 and not Sniffer.BINARY.intersection(head):
+            try:
+                # A character can be cut off at the end of the head
+                getincrementaldecoder('utf-8')().decode(head)
+                return Sniffer.TEXT
+            except UnicodeDecodeError:
+                pass
+
+        return ''
+
+
+class HeadSniffer(Consumer):
+    def __init__(self) -> None:
+        """
+        Keep the first SNIFF_SIZE bytes of a file that is read for something
+        else, for example its hash, and detect its type from them
+        """
+        self.head = b''
+
+    def update(self, data: bytes) -> None:
+        """
+        Keep the start of the next block while the head isn't complete yet
+
+        :param data: Block of the file
+
+        :return: None
+        """
+        if len(self.head) < Sniffer.SNIFF_SIZE:
+            self.head += data[:Sniffer.SNIFF_SIZE - len(self.head)]
+
+    def result(self) -> str:
+        """
+        Detect the type of the file
+
+        :return: Detected type, empty when the type is unknown
+        """
+        return Sniffer.detect(self.head)
+
+
+Sniffer.TABLE = Sniffer.compile(Sniffer.SIGNATURES)
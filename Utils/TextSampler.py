@@ -0,0 +1,192 @@
+from codecs import getincrementaldecoder
+from io import SEEK_END, SEEK_SET, BytesIO
+from typing import BinaryIO, Callable, Dict, Iterator, List, Tuple, Union
+
+from Utils.HashEngine import Consumer
+
+
+class TextSampler:
+    MODES = ['prefix', 'windows']
+    ENCODINGS = ['utf-8', 'utf-16']
+
+    def __init__(self, mode: str = 'windows', read_size: int = 1024 * 1024,
+                 window_size: int = 64 * 1024, windows: int = 8,
+                 tolerance: float = 0.05) -> None:
+        """
+        Sample the text of a file instead of reading all of it
+
+        :param mode: 'prefix' reads the first read_size bytes, 'windows'
+                     reads windows that are spread over the whole file and
+                     stops when the result converges
+        :param read_size: Number of bytes to read in prefix mode
+        :param window_size: Size of a window in bytes
+        :param windows: Maximum number of windows
+        :param tolerance: The result has converged when the most likely
+                          outcome stays the same and its probability changes
+                          less than this between two windows
+        """
+        if mode not in self.MODES:
+            raise ValueError('Unknown sampling mode {}'.format(mode))
+
+        self.mode = mode
+        self.read_size = read_size
+        self.window_size = window_size
+        self.windows = max(1, windows)
+        self.tolerance = tolerance
+
+    def sample_size(self) -> int:
+        """
+        Get the maximum number of bytes that are read from a file
+
+        :return: Number of bytes
+        """
+        return self.read_size if self.mode == 'prefix' else \
+            self.window_size * self.windows
+
+    def offsets(self, size: int) -> List[Tuple[int, int]]:
+        """
+        Get the windows to read, the first window is always at the start of
+        the file so it can be used to find the encoding
+
+        :param size: Size of the file in bytes
+
+        :return: Offset and size of every window
+        """
+        if self.mode == 'prefix':
+            return [(0, min(size, self.read_size))]
+
+        if size <= self.window_size * self.windows or self.windows == 1:
+            return [(0, min(size, self.window_size * self.windows))]
+
+        stride = (size - self.window_size) // (self.windows - 1)
+
+        # Even offsets so UTF-16 windows start at the start of a character
+        return [(i * stride & ~1, self.window_size)
+                for i in range(self.windows)]
+
+    @staticmethod
+    def encoding(data: bytes) -> Union[str, None]:
+        """
+        Find the encoding of the start of a file, a character that was cut
+        off at the end of the data is ignored
+
+        :param data: Start of the file
+
+        :return: Encoding or None when the data isn't text
+        """
+        for encoding in TextSampler.ENCODINGS:
+            try:
+                getincrementaldecoder(encoding)().decode(data)
+            except UnicodeDecodeError:
+                continue
+
+            # The byte order mark is only at the start of the file, the
+            # other windows need the byte order in the name of the encoding
+            if encoding == 'utf-16':
+                return 'utf-16-be' if data[:2] == b'\xfe\xff' else \
+                    'utf-16-le'
+
+            return encoding
+
+        return None
+
+    def texts(self, stream: BinaryIO) -> Iterator[str]:
+        """
+        Read and decode the windows of a file
+
+        :param stream: Seekable file like object
+
+        :return: Text of every window
+        """
+        size = stream.seek(0, SEEK_END)
+        encoding = None
+
+        for offset, length in self.offsets(size):
+            stream.seek(offset, SEEK_SET)
+            data = stream.read(length)
+
+            if encoding is None:
+                encoding = self.encoding(data)
+                if encoding is None:
+                    return
+
+                yield getincrementaldecoder(encoding)().decode(
+                    data).lstrip('\ufeff')
+            else:
+                # Later windows can start and end in the middle of a
+                # character
+                yield getincrementaldecoder(encoding)(
+                    errors='ignore').decode(data)
+
+    def sample(self, stream: BinaryIO,
+               detect: Callable[[str], Dict[str, float]]) -> Dict[str, float]:
+        """
+        Run a detector over the windows of a file, the probabilities of all
+        windows are averaged. Reading stops early once the most likely
+        outcome has converged
+
+        :param stream: Seekable file like object
+        :param detect: Detector that returns the probability of every outcome
+                       of a text, or an empty dict when it found nothing
+
+        :return: Averaged probability of every outcome
+        """
+        totals = {}
+        count = 0
+        previous = None
+
+        for text in self.texts(stream):
+            probabilities = detect(text)
+            if len(probabilities) == 0:
+                continue
+
+            count += 1
+            for outcome, probability in probabilities.items():
+                totals[outcome] = totals.get(outcome, 0) + probability
+
+            top = max(totals, key=totals.get)
+            current = (top, totals[top] / count)
+
+            if previous is not None and previous[0] == current[0] and \
+                    abs(previous[1] - current[1]) < self.tolerance:
+                break
+
+            previous = current
+
+        return {outcome: total / count for outcome, total in totals.items()}
+
+
+class TextSample(Consumer):
+    def __init__(self, sampler: TextSampler,
+                 detect: Callable[[str], Dict[str, float]]) -> None:
+        """
+        Sample the text of a stream that can't seek, only the start of the
+        stream is kept
+
+        :param sampler: Sampler to run over the start of the stream
+        :param detect: Detector that returns the probability of every outcome
+                       of a text
+        """
+        self.sampler = sampler
+        self.detect = detect
+        self.data = bytearray()
+
+    def update(self, data: bytes) -> None:
+        """
+        Keep the start of the stream
+
+        :param data: Block of the file
+
+        :return: None
+        """
+        remaining = self.sampler.sample_size() - len(self.data)
+        if remaining > 0:
+            self.data += data[:remaining]
+
+    def result(self) -> Dict[str, float]:
+        """
+        Run the detector over the start of the stream
+
+        :return: Averaged probability of every outcome
+        """
+        return self.sampler.sample(BytesIO(bytes(self.data)), self.detect)
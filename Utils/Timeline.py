@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from struct import Struct
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from Utils.Cache import Cache
+from Utils.ExternalSort import ExternalSort, Records
+
+Event = Tuple[Union[datetime, None], int, str]
+Times = Dict[str, Union[str, datetime]]
+
+
+class Timeline:
+    # Biased timestamp, file id and timestamp types, big endian so sorting
+    # the records as bytes sorts them by time
+    EVENT = Struct('>QIB')
+    TYPES = 'macb'
+    BIAS = 1 << 63
+    # Timestamp of the event of a file without timestamps, after all dates
+    NO_TIME = (1 << 64) - 1
+    EPOCH = datetime(1970, 1, 1)
+    RUN_SIZE = 1000000
+
+    def __init__(self, path: Path) -> None:
+        """
+        MAC timeline of sorted events that is memory mapped, an event is a
+        file and a timestamp with the types (modify, access, change or birth)
+        of that file that have that timestamp
+
+        :param path: Path to a timeline made by build()
+        """
+        self.path = path
+        self.file = open(str(path), 'rb')
+        self.data = None
+        self.events = []
+
+        if path.stat().st_size > 0:
+            self.data = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+            self.events = Records(self.data, self.EVENT.size)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[Event]:
+        return self.range()
+
+    def event(self, index: int) -> Event:
+        """
+        Get a single event
+
+        :param index: Position of the event in the timeline
+
+        :return: Date, file id and timestamp types, no date for a file
+                 without timestamps
+        """
+        ts, file_id, flags = self.EVENT.unpack(self.events[index])
+
+        if ts == self.NO_TIME:
+            return None, file_id, self.format_types(flags)
+
+        return self.EPOCH + timedelta(seconds=ts - self.BIAS), file_id, \
+            self.format_types(flags)
+
+    def range(self, start: datetime = None, end: datetime = None) -> \
+            Iterator[Event]:
+        """
+        Get the events between two dates with a binary search, both dates are
+        included. Files without timestamps are only in the whole timeline
+
+        :param start: First date, the start of the timeline when None
+        :param end: Last date, the end of the timeline when None
+
+        :return: Date, file id and timestamp types of every event
+        """
+        first = 0 if start is None else bisect_left(
+            self.events, self.EVENT.pack(self.timestamp(start), 0, 0))
+
+        if end is not None:
+            last = bisect_left(
+                self.events, self.EVENT.pack(self.timestamp(end) + 1, 0, 0))
+        elif start is not None:
+            last = bisect_left(self.events,
+                               self.EVENT.pack(self.NO_TIME, 0, 0))
+        else:
+            last = len(self.events)
+
+        for index in range(first, last):
+            yield self.event(index)
+
+    def close(self) -> None:
+        """
+        Close the memory map
+
+        :return: None
+        """
+        if self.data is not None:
+            self.data.close()
+
+        self.file.close()
+
+    @staticmethod
+    def timestamp(date: datetime) -> int:
+        """
+        Convert an UTC date time to a biased epoch timestamp
+
+        :param date: UTC date time
+
+        :return: Timestamp that sorts dates before 1970 correctly
+        """
+        return int((date - Timeline.EPOCH).total_seconds()) + Timeline.BIAS
+
+    @staticmethod
+    def format_types(flags: int) -> str:
+        """
+        Format timestamp types the way mactime does, for example 'm.cb'
+
+        :param flags: Bit for every type in TYPES
+
+        :return: Timestamp types
+        """
+        return ''.join(t if flags & (1 << i) else '.'
+                       for i, t in enumerate(Timeline.TYPES))
+
+    @staticmethod
+    def file_events(file_id: int, times: Times) -> List[bytes]:
+        """
+        Create the events of a file, timestamps that are the same become a
+        single event with multiple types. A file without timestamps gets a
+        single event without types at the end of the timeline, so every file
+        is in the timeline
+
+        :param file_id: Id of the file
+        :param times: Date time by timestamp type, for example 'm', types
+                      without a date time are skipped
+
+        :return: Packed events
+        """
+        flags = {}
+
+        for t, date in times.items():
+            if isinstance(date, datetime):
+                ts = Timeline.timestamp(date)
+                flags[ts] = flags.get(ts, 0) | 1 << Timeline.TYPES.index(t)
+
+        if len(flags) == 0:
+            return [Timeline.EVENT.pack(Timeline.NO_TIME, file_id, 0)]
+
+        return [Timeline.EVENT.pack(ts, file_id, flag)
+                for ts, flag in flags.items()]
+
+    @staticmethod
+    def build(files: Iterable[Tuple[int, Times]], path: Path) -> int:
+        """
+        Build a timeline with an external merge sort, only RUN_SIZE events
+        are in memory at the same time
+
+        :param files: Id and timestamps of every file
+        :param path: Path to write the timeline to
+
+        :return: Number of events
+        """
+        return ExternalSort.sort((event for file_id, times in files
+                                  for event in Timeline.file_events(file_id,
+                                                                    times)),
+                                 Timeline.EVENT.size, path,
+                                 run_size=Timeline.RUN_SIZE)
+
+    @staticmethod
+    def get_timeline_path(identity: str) -> Path:
+        """
+        Get the path of the timeline of an image
+
+        :param identity: Identity of the image
+
+        :return: Path to the timeline
+        """
+        cache_path = Cache.get_cache_folder()
+
+        return Path(cache_path.joinpath('{}.timeline'.format(identity)))
+
+    @staticmethod
+    def body_line(name: str, inode: int, mode: str, size: int, times: Times,
+                  md5: str = '0') -> str:
+        """
+        Format a file as a line of a bodyfile, the input format of mactime
+
+        :param name: Path of the file
+        :param inode: Meta address of the file
+        :param mode: Mode as a string, for example 'r/----------'
+        :param size: Size of the file in bytes
+        :param times: Date time by timestamp type
+        :param md5: MD5 hash of the file
+
+        :return: Bodyfile line
+        """
+        epoch = [Timeline.timestamp(times[t]) - Timeline.BIAS
+                 if isinstance(times.get(t), datetime) else 0 for t in 'amcb']
+
+        return '{}|{}|{}|{}|0|0|{}|{}|{}|{}|{}\n'.format(
+            md5, name.replace('|', '\\|'), inode or 0, mode, size or 0,
+            *epoch)
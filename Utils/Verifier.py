@@ -0,0 +1,172 @@
+from queue import Queue
+from threading import Thread
+from time import monotonic
+from typing import Callable, Dict, List, Union
+
+from Utils.HashEngine import HashEngine
+
+
+class Verifier:
+    BLOCK_SIZE = 4 * 1024 * 1024
+    QUEUE_SIZE = 16
+    ALGORITHMS = ['md5', 'sha1']
+    REPORT_INTERVAL = 1.0
+
+    def __init__(self, read: Callable[[int, int], bytes], size: int,
+                 progress: Callable[[Dict[str, float]], None] = None) -> None:
+        """
+        Verify media by hashing all bytes with every algorithm in one pass
+        of a hash engine, blocks are read and decompressed on a separate
+        thread so reading and hashing overlap
+
+        :param read: Function that reads size bytes at an offset
+        :param size: Size of the media in bytes
+        :param progress: Called with the progress every report interval
+        """
+        self.read = read
+        self.size = size
+        self.progress = progress
+
+        self.start = None
+        self.done = 0
+        self.error = None
+
+    def reader(self, blocks: Queue) -> None:
+        """
+        Read the media in blocks, the queue is closed with None
+
+        :param blocks: Queue the blocks are put in
+
+        :return: None
+        """
+        offset = 0
+
+        try:
+            while offset < self.size:
+                data = self.read(offset,
+                                 min(self.BLOCK_SIZE, self.size - offset))
+
+                if len(data) == 0:
+                    raise IOError('Unexpected end of media at offset '
+                                  '{}'.format(offset))
+
+                blocks.put(data)
+                offset += len(data)
+        except Exception as e:
+            self.error = e
+        finally:
+            blocks.put(None)
+
+    def run(self) -> Dict[str, str]:
+        """
+        Hash the whole media
+
+        :return: Hex digest of every algorithm
+        """
+        engine = HashEngine(self.ALGORITHMS)
+        consumers = engine.start()
+        blocks = Queue(maxsize=self.QUEUE_SIZE)
+
+        self.start = monotonic()
+        self.done = 0
+        self.error = None
+        reported = self.start
+
+        thread = Thread(target=self.reader, args=(blocks,), daemon=True)
+        thread.start()
+
+        while True:
+            data = blocks.get()
+            if data is None:
+                break
+
+            for consumer in consumers.values():
+                consumer.update(data)
+
+            self.done += len(data)
+
+            if self.progress is not None and \
+                    monotonic() - reported >= self.REPORT_INTERVAL:
+                reported = monotonic()
+                self.progress(self.stats())
+
+        thread.join()
+
+        if self.error is not None:
+            raise self.error
+
+        if self.progress is not None:
+            self.progress(self.stats())
+
+        return engine.finish(consumers)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the progress of the verification
+
+        :return: Bytes done, total bytes, speed in MB/s and ETA in seconds
+        """
+        elapsed = max(monotonic() - self.start, 1e-6)
+        speed = self.done / elapsed
+
+        return {
+            'done': self.done,
+            'total': self.size,
+            'speed': speed / (1024 * 1024),
+            'eta': (self.size - self.done) / speed if speed > 0 else 0
+        }
+
+    @staticmethod
+    def compare(computed: Dict[str, str], stored: Dict[str, str]) -> \
+            Dict[str, Union[bool, None]]:
+        """
+        Compare computed hashes with the hashes stored in the image
+
+        :param computed: Computed hex digests
+        :param stored: Stored hashes, for example the ewf hash values
+
+        :return: Whether every hash matches or None when it isn't stored
+        """
+        stored = {key.lower(): value.lower() for key, value in stored.items()
+                  if value}
+
+        return {algorithm: None if algorithm not in stored
+                else stored[algorithm] == digest.lower()
+                for algorithm, digest in computed.items()}
+
+    @staticmethod
+    def format_stats(stats: Dict[str, float]) -> str:
+        """
+        Format the progress of the verification
+
+        :param stats: Progress from stats()
+
+        :return: Progress line
+        """
+        percentage = 100 * stats['done'] / stats['total'] \
+            if stats['total'] > 0 else 100
+
+        return '{:.1f}% ({:.1f} MB/s, ETA {:.0f}s)'.format(
+            percentage, stats['speed'], stats['eta'])
+
+    @staticmethod
+    def format_results(computed: Dict[str, str],
+                       matches: Dict[str, Union[bool, None]]) -> List[str]:
+        """
+        Format the verification results
+
+        :param computed: Computed hex digests
+        :param matches: Result of compare()
+
+        :return: Result lines
+        """
+        results = []
+
+        for algorithm, digest in computed.items():
+            match = matches.get(algorithm)
+            results.append('- {}: {} ({})'.format(
+                algorithm.upper(), digest,
+                'not stored' if match is None else
+                'verified' if match else 'MISMATCH'))
+
+        return results
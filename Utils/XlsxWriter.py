@@ -7,6 +7,10 @@ from Utils.Store.Credentials import CredentialStore
 
 
 class XlsxWriter:
+    # Set when multiple images are processed so every image gets its own
+    # workbooks
+    IMAGE_NAME = None
+
     def __init__(self, name: str) -> None:
         self.workbook = Workbook(self.get_save_path(name))
         self.worksheets = {}
@@ -32,6 +36,9 @@ class XlsxWriter:
         case_path = Path(config_path.joinpath(case))
         Path.mkdir(Path(case_path), exist_ok=True)
 
+        if XlsxWriter.IMAGE_NAME is not None:
+            name = '{}-{}'.format(XlsxWriter.IMAGE_NAME, name)
+
         return str(
             case_path.joinpath('{}-{}.xlsx'.format(
                 credentials.time,
@@ -1,12 +1,46 @@
 import unittest
 
+from Tests.ArchiveExpander import TestMethods as ArchiveExpanderTests
+from Tests.Catalog import TestMethods as CatalogTests
+from Tests.Entropy import TestMethods as EntropyTests
+from Tests.Files import TestMethods as FilesTests
+from Tests.HashCache import TestMethods as HashCacheTests
+from Tests.HashEngine import TestMethods as HashEngineTests
+from Tests.HashSet import TestMethods as HashSetTests
+from Tests.ImageHandler import TestMethods as ImageHandlerTests
 from Tests.ImageStore import TestMethods as ImageTests
+from Tests.IoScheduler import TestMethods as IoSchedulerTests
+from Tests.Journal import TestMethods as JournalTests
+from Tests.MftParser import TestMethods as MftParserTests
+from Tests.Pipeline import TestMethods as PipelineTests
+from Tests.RecordStore import TestMethods as RecordStoreTests
+from Tests.Sniffer import TestMethods as SnifferTests
+from Tests.TextSampler import TestMethods as TextSamplerTests
+from Tests.Timeline import TestMethods as TimelineTests
+from Tests.Verifier import TestMethods as VerifierTests
 
 
 if __name__ == '__main__':
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
 
+    suite.addTests(loader.loadTestsFromModule(ArchiveExpanderTests()))
+    suite.addTests(loader.loadTestsFromModule(CatalogTests()))
+    suite.addTests(loader.loadTestsFromModule(EntropyTests()))
+    suite.addTests(loader.loadTestsFromModule(FilesTests()))
+    suite.addTests(loader.loadTestsFromModule(HashCacheTests()))
+    suite.addTests(loader.loadTestsFromModule(HashEngineTests()))
+    suite.addTests(loader.loadTestsFromModule(HashSetTests()))
+    suite.addTests(loader.loadTestsFromModule(ImageHandlerTests()))
     suite.addTests(loader.loadTestsFromModule(ImageTests()))
+    suite.addTests(loader.loadTestsFromModule(IoSchedulerTests()))
+    suite.addTests(loader.loadTestsFromModule(JournalTests()))
+    suite.addTests(loader.loadTestsFromModule(MftParserTests()))
+    suite.addTests(loader.loadTestsFromModule(PipelineTests()))
+    suite.addTests(loader.loadTestsFromModule(RecordStoreTests()))
+    suite.addTests(loader.loadTestsFromModule(SnifferTests()))
+    suite.addTests(loader.loadTestsFromModule(TextSamplerTests()))
+    suite.addTests(loader.loadTestsFromModule(TimelineTests()))
+    suite.addTests(loader.loadTestsFromModule(VerifierTests()))
 
     unittest.TextTestRunner(verbosity=2).run(suite)